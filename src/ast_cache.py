@@ -0,0 +1,216 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from itertools import islice
+from htmlnode import HtmlNode, LeafNode, ParentNode, RawNode
+from output_writer import write_atomic
+
+AST_CACHE_VERSION = 1
+MAGIC = b"SPAST\x00\x00\x01"
+# magic, string count, node count, prop count, string blob size
+HEADER = struct.Struct("<8sIIII")
+# offset and length of one string in the blob
+STRING = struct.Struct("<II")
+# kind, tag string, value string, child count, prop count; nodes are stored
+# in document order, each followed by its children
+NODE = struct.Struct("<BIIIH")
+# key string, value string
+PROP = struct.Struct("<II")
+NO_STRING = 0xFFFFFFFF
+LEAF, PARENT, RAW = 0, 1, 2
+NODE_CLASSES = {LEAF: LeafNode, PARENT: ParentNode, RAW: RawNode}
+
+
+class InternedStrings(dict):
+    def __init__(self, strings: list[str]):
+        super().__init__()
+        self.strings = strings
+
+    def __missing__(self, index: int) -> str:
+        text = self[index] = sys.intern(self.strings[index])
+        return text
+
+
+def encode_tree(root: HtmlNode) -> bytes:
+    # header, string index, node records, prop records, then the UTF-8 blob
+    # of every distinct string (tags, text, attribute names and values)
+    strings: dict[str, int] = {}
+    string_index = bytearray()
+    blob = bytearray()
+
+    def intern(text: str | None) -> int:
+        if text is None:
+            return NO_STRING
+        index = strings.get(text)
+        if index is None:
+            data = text.encode()
+            index = strings[text] = len(strings)
+            string_index.extend(STRING.pack(len(blob), len(data)))
+            blob.extend(data)
+        return index
+
+    nodes = bytearray()
+    props = bytearray()
+    node_count = 0
+    prop_count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        kind = PARENT if isinstance(node, ParentNode) else RAW if isinstance(node, RawNode) else LEAF
+        children = node.children if kind == PARENT else ()
+        node_props = node.props or {}
+        nodes.extend(NODE.pack(kind, intern(node.tag), intern(node.value), len(children), len(node_props)))
+        for key, value in node_props.items():
+            props.extend(PROP.pack(intern(key), intern(str(value))))
+        stack.extend(reversed(children))
+        node_count += 1
+        prop_count += len(node_props)
+    header = HEADER.pack(MAGIC, len(strings), node_count, prop_count, len(blob))
+    return b"".join((header, string_index, nodes, props, blob))
+
+
+def decode_tree(buffer) -> HtmlNode:
+    # rebuilds the tree from anything supporting the buffer protocol, such
+    # as an mmap; raises ValueError for a truncated or foreign buffer
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        raise ValueError("truncated AST cache entry")
+    magic, string_count, node_count, prop_count, blob_size = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("not an AST cache entry")
+    strings_end = HEADER.size + string_count * STRING.size
+    nodes_end = strings_end + node_count * NODE.size
+    props_end = nodes_end + prop_count * PROP.size
+    if len(view) != props_end + blob_size:
+        raise ValueError("truncated AST cache entry")
+    blob = view[props_end:]
+    strings = [str(blob[offset:offset + length], "utf-8") for offset, length in STRING.iter_unpack(view[HEADER.size:strings_end])]
+    props = PROP.iter_unpack(view[nodes_end:props_end])
+    # tag names are interned like HtmlNode.__init__ does, looked up lazily
+    tags = InternedStrings(strings)
+
+    root = None
+    # [children list, children still to come] of every open parent
+    stack = []
+    for kind, tag, value, child_count, node_prop_count in NODE.iter_unpack(view[strings_end:nodes_end]):
+        node_props = {strings[prop_key]: strings[prop_value] for prop_key, prop_value in islice(props, node_prop_count)} if node_prop_count else None
+        # slots are filled directly: the tree was valid when encoded, and
+        # children are appended as they are decoded
+        node = NODE_CLASSES[kind].__new__(NODE_CLASSES[kind])
+        node.tag = tags[tag] if tag != NO_STRING else None
+        node.props = node_props
+        if kind == PARENT:
+            node.value = None
+            node.children = []
+        else:
+            node.value = strings[value]
+            node.children = None
+        if stack:
+            stack[-1][0].append(node)
+            stack[-1][1] -= 1
+            while stack and stack[-1][1] == 0:
+                stack.pop()
+        else:
+            root = node
+        if kind == PARENT and child_count:
+            stack.append([node.children, child_count])
+    if root is None or stack:
+        raise ValueError("truncated AST cache entry")
+    return root
+
+
+class AstCache:
+    # parsed page trees, before base path rewriting and image annotation, in
+    # one file per markdown body hash. Entries are read through mmap, so
+    # tools that only need the tree (search, link checks, a table of
+    # contents) share the page cache instead of each parsing the markdown.
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+
+    @staticmethod
+    def key(markdown: str) -> str:
+        return hashlib.blake2b(f"{AST_CACHE_VERSION}\0{markdown}".encode(), digest_size=16).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + ".ast")
+
+    def get(self, key: str) -> HtmlNode | None:
+        path = self.entry_path(key)
+        tree = None
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                try:
+                    tree = decode_tree(mapped)
+                except (ValueError, IndexError, struct.error):
+                    # handled inside the with, so the views a failed decode
+                    # left behind are gone before the mmap closes
+                    pass
+            if tree is not None:
+                # the mtime doubles as last use for save()'s eviction
+                os.utime(path)
+        except (OSError, ValueError):
+            # missing, or empty (mmap refuses those)
+            pass
+        if tree is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tree
+
+    def put(self, key: str, tree: HtmlNode):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, encode_tree(tree))
+        self.written += 1
+
+    def worker_settings(self) -> tuple[str, int]:
+        return self.path, self.max_bytes
+
+    def start_worker(self):
+        self.hits = self.misses = self.written = 0
+
+    def take_worker_update(self) -> dict:
+        update = self.stats()
+        self.start_worker()
+        return update
+
+    def apply_worker_update(self, update: dict):
+        self.hits += update["hits"]
+        self.misses += update["misses"]
+        self.written += update["written"]
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "written": self.written}
+
+    def describe(self) -> str:
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        return f"ast cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), {self.written} trees written"
+
+    @classmethod
+    def load(cls, path: str, max_bytes: int = 64 * 1024 * 1024) -> "AstCache":
+        # entries are read on demand, so there is nothing to load up front
+        return cls(path, max_bytes)
+
+    def save(self, path: str | None = None):
+        # entries are written as pages render; this only evicts the least
+        # recently used ones once the directory outgrows max_bytes
+        entries = []
+        total = 0
+        for dir_name, _, filenames in os.walk(path or self.path):
+            for filename in filenames:
+                entry_path = os.path.join(dir_name, filename)
+                stat = os.stat(entry_path)
+                entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+                total += stat.st_size
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(entry_path)
+            total -= size
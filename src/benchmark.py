@@ -0,0 +1,162 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from generate_content import generate_pages_recursive
+from synthetic_corpus import generate_corpus
+from textnode import BlockType
+from utilities import block_to_block_type, markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+
+# usage:
+#   python3 src/benchmark.py --pages 200 --output bench.json
+#   python3 src/benchmark.py --pages 200 --compare bench.json --threshold 0.1
+
+TEMPLATE = '<!DOCTYPE html>\n<html>\n<head><title> {{ Title }} </title><link href="/index.css" rel="stylesheet"></head>\n<body><article>{{ Content }}</article></body>\n</html>\n'
+
+
+def time_call(func, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min_s": min(timings), "mean_s": sum(timings) / len(timings), "runs": repeat}
+
+
+def run_benchmarks(pages: int = 100, seed: int = 0, repeat: int = 5, **corpus_options) -> dict:
+    with tempfile.TemporaryDirectory() as root:
+        content_dir = os.path.join(root, "content")
+        public_dir = os.path.join(root, "public")
+        template_path = os.path.join(root, "template.html")
+        with open(template_path, "w") as f:
+            f.write(TEMPLATE)
+        paths = generate_corpus(content_dir, pages, seed, **corpus_options)
+        texts = []
+        for path in paths:
+            with open(path) as f:
+                texts.append(f.read())
+
+        blocks = [block for text in texts for block in markdown_to_blocks(text)]
+        inline_texts = [block for block in blocks if block_to_block_type(block) != BlockType.CODE]
+        nodes = [markdown_to_html_node(text) for text in texts]
+
+        def full_build():
+            # the per-page progress lines would dominate the timing
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_dir, template_path, public_dir, "/site/")
+
+        results = {
+            "markdown_to_blocks": time_call(lambda: [markdown_to_blocks(text) for text in texts], repeat),
+            "text_to_textnodes": time_call(lambda: [text_to_textnodes(text) for text in inline_texts], repeat),
+            "markdown_to_html_node": time_call(lambda: [markdown_to_html_node(text) for text in texts], repeat),
+            "to_html": time_call(lambda: [node.to_html() for node in nodes], repeat),
+            "generate_pages_recursive": time_call(full_build, repeat),
+        }
+        corpus_bytes = sum(len(text) for text in texts)
+
+    return {
+        "meta": {
+            "pages": pages,
+            "seed": seed,
+            "repeat": repeat,
+            "corpus_bytes": corpus_bytes,
+            "blocks": len(blocks),
+            "corpus_options": corpus_options,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+# meta fields that must match for two runs to time the same workload
+COMPARABLE_META = ("pages", "seed", "corpus_options", "corpus_bytes", "blocks")
+
+
+def meta_mismatches(baseline: dict, current: dict) -> list[str]:
+    before = baseline.get("meta", {})
+    after = current.get("meta", {})
+    return [f"{key}: {before.get(key)!r} vs {after.get(key)!r}" for key in COMPARABLE_META if before.get(key) != after.get(key)]
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> list[tuple[str, float, float]]:
+    # returns (benchmark, baseline min, current min) for every benchmark more
+    # than `threshold` (a fraction) slower than the baseline; raises
+    # ValueError when the two runs did not use the same corpus
+    mismatches = meta_mismatches(baseline, current)
+    if mismatches:
+        raise ValueError("baseline was run on a different corpus (" + "; ".join(mismatches) + ")")
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        if result["min_s"] > before["min_s"] * (1 + threshold):
+            regressions.append((name, before["min_s"], result["min_s"]))
+    return regressions
+
+
+def print_results(report: dict, baseline: dict | None = None):
+    meta = report["meta"]
+    print(f"{meta['pages']} pages, {meta['blocks']} blocks, {meta['corpus_bytes']} bytes, best of {meta['repeat']}")
+    for name, result in report["results"].items():
+        line = f"  {name:<26}{result['min_s'] * 1000:>10.2f} ms"
+        before = (baseline or {}).get("results", {}).get(name)
+        if before is not None:
+            line += f"  ({result['min_s'] / before['min_s'] - 1:+.1%} vs baseline)"
+        print(line)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time the build pipeline on a synthetic markdown corpus.")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--blocks-per-page", type=int, default=40)
+    parser.add_argument("--inline-density", type=float, default=0.2, help="chance that a word carries inline markup")
+    parser.add_argument("--nesting-depth", type=int, default=2, help="depth of nested inline markup and page directories")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --output run")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown vs the baseline before failing (default: 0.1 = 10%%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmarks(
+        args.pages,
+        args.seed,
+        args.repeat,
+        blocks_per_page=args.blocks_per_page,
+        inline_density=args.inline_density,
+        nesting_depth=args.nesting_depth,
+    )
+    baseline = None
+    regressions = []
+    mismatch = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # checked before anything is printed: a baseline from another corpus
+        # gives no "vs baseline" figures at all
+        try:
+            regressions = compare_results(baseline, report, args.threshold)
+        except ValueError as e:
+            mismatch = e
+            baseline = None
+    print_results(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if mismatch is not None:
+        print(f"cannot compare: {mismatch}", file=sys.stderr)
+        sys.exit(2)
+    for name, before, after in regressions:
+        print(f"regression: {name} {before * 1000:.2f} ms -> {after * 1000:.2f} ms", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
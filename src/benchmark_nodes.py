@@ -0,0 +1,57 @@
+import gc
+import tracemalloc
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+# usage: python3 src/benchmark_nodes.py
+# compares bytes per node for the slotted node classes against
+# dict-backed copies of the previous implementations
+
+NODE_COUNT = 100_000
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHtmlNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def bytes_per_node(factory, count: int = NODE_COUNT) -> float:
+    # the inputs are built outside the measured window so only the node
+    # objects themselves are counted
+    texts = [f"fragment {i}" for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(text) for text in texts]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the nodes is not part of the per-node cost
+    list_bytes = nodes.__sizeof__()
+    del nodes
+    return (after - before - list_bytes) / count
+
+
+def node_memory_report(count: int = NODE_COUNT) -> list[tuple[str, float, float]]:
+    child = LeafNode(None, "x")
+    cases = [
+        ("TextNode", lambda text: DictTextNode(text, TextType.TEXT), lambda text: TextNode(text, TextType.TEXT)),
+        ("LeafNode", lambda text: DictHtmlNode("b", text), lambda text: LeafNode("b", text)),
+        ("ParentNode", lambda text: DictHtmlNode("p", None, [child]), lambda text: ParentNode("p", [child])),
+    ]
+    return [(name, bytes_per_node(before, count), bytes_per_node(after, count)) for name, before, after in cases]
+
+
+if __name__ == "__main__":
+    print(f"{'node':<12}{'before':>10}{'after':>10}{'saved':>8}")
+    for name, before, after in node_memory_report():
+        print(f"{name:<12}{before:>10.1f}{after:>10.1f}{1 - after / before:>8.0%}")
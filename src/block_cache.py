@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# bump whenever block_to_html_node would render the same block differently,
+# so fragments cached by older builds are never spliced into new pages
+RENDERER_VERSION = 1
+BLOCK_CACHE_VERSION = 1
+
+
+class BlockCache:
+    # LRU of block key -> rendered HTML fragment, bounded by the total size
+    # of the fragments in bytes rather than by entry count
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, path: str | None = None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.sizes: dict[str, int] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.track_new = False
+        self.new_keys: list[str] = []
+
+    @staticmethod
+    def key(block: str, block_type, basepath: str, variant: str = "") -> str:
+        # variant covers render inputs other than the block itself, such as
+        # the image sizes an <img> tag picks up
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{RENDERER_VERSION}\0{block_type.value}\0{basepath}\0{variant}\0".encode())
+        digest.update(block.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return html
+
+    def put(self, key: str, html: str):
+        self.store(key, html)
+        if self.track_new:
+            self.new_keys.append(key)
+
+    def store(self, key: str, html: str):
+        if key in self.entries:
+            self.total_bytes -= self.sizes[key]
+        size = len(html.encode())
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        self.sizes[key] = size
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and self.entries:
+            evicted, _ = self.entries.popitem(last=False)
+            self.total_bytes -= self.sizes.pop(evicted)
+
+    def worker_settings(self) -> tuple[str | None, int]:
+        # what a spawned pool worker needs to load the same cache
+        return self.path, self.max_bytes
+
+    def start_worker(self):
+        self.hits = 0
+        self.misses = 0
+        self.track_new = True
+        self.new_keys = []
+
+    def take_worker_update(self) -> dict:
+        entries = [[key, self.entries[key]] for key in self.new_keys if key in self.entries]
+        update = {"entries": entries, "hits": self.hits, "misses": self.misses}
+        self.new_keys = []
+        self.hits = 0
+        self.misses = 0
+        return update
+
+    def apply_worker_update(self, update: dict):
+        for key, html in update["entries"]:
+            self.store(key, html)
+        self.hits += update["hits"]
+        self.misses += update["misses"]
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "bytes": self.total_bytes, "max_bytes": self.max_bytes}
+
+    def describe(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"block cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), {len(self.entries)} entries, {self.total_bytes}/{self.max_bytes} bytes"
+
+    @classmethod
+    def load(cls, path: str, max_bytes: int = 64 * 1024 * 1024) -> "BlockCache":
+        cache = cls(max_bytes, path)
+        if not os.path.isfile(path):
+            return cache
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"ignoring unreadable block cache ({path})")
+            return cache
+        if data.get("version") != BLOCK_CACHE_VERSION or data.get("renderer_version") != RENDERER_VERSION:
+            return cache
+        for key, html in data.get("entries", []):
+            cache.store(key, html)
+        return cache
+
+    def save(self, path: str | None = None):
+        path = path or self.path
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {
+            "version": BLOCK_CACHE_VERSION,
+            "renderer_version": RENDERER_VERSION,
+            # least recently used first, so loading replays the LRU order
+            "entries": [[key, html] for key, html in self.entries.items()],
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
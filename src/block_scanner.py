@@ -0,0 +1,94 @@
+import io
+from collections.abc import Iterable, Iterator
+from textnode import BlockType
+
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+
+
+def iter_blocks(lines: Iterable[str], fences: bool = True) -> Iterator[tuple[BlockType, str]]:
+    # reads markdown line by line (a file object works) and yields
+    # (block type, block text) as soon as each block ends. Blocks end at an
+    # empty line, except inside a ``` fence, so code with blank lines stays
+    # one block. The text matches what markdown_to_blocks always produced.
+    block_lines: list[str] = []
+    in_fence = False
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if line == "" and not in_fence:
+            if block_lines:
+                block = close_block(block_lines)
+                if block is not None:
+                    yield block
+                block_lines = []
+            continue
+        if fences:
+            in_fence = update_fence(line, in_fence)
+        block_lines.append(line)
+
+    if not block_lines:
+        return
+    if in_fence:
+        # a fence that never closes is not code; split it like plain text
+        yield from iter_blocks(block_lines, fences=False)
+        return
+    block = close_block(block_lines)
+    if block is not None:
+        yield block
+
+
+def iter_markdown_blocks(markdown: str) -> Iterator[tuple[BlockType, str]]:
+    return iter_blocks(io.StringIO(markdown))
+
+
+def update_fence(line: str, in_fence: bool) -> bool:
+    stripped = line.lstrip()
+    if not stripped.startswith("```"):
+        return in_fence
+    if in_fence:
+        return False
+    # ```code``` on a single line opens and closes at once
+    return stripped.find("```", 3) == -1
+
+
+def close_block(lines: list[str]) -> tuple[BlockType, str] | None:
+    # same result as "\n".join(lines).strip(), without building the joined
+    # string twice: drop blank edge lines and strip the outer two
+    first = 0
+    while first < len(lines) and lines[first].strip() == "":
+        first += 1
+    if first == len(lines):
+        return None
+    last = len(lines) - 1
+    while lines[last].strip() == "":
+        last -= 1
+    lines = lines[first:last + 1]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return classify_lines(lines), "\n".join(lines)
+
+
+def classify_lines(lines: list[str]) -> BlockType:
+    first = lines[0]
+    if first.startswith(HEADING_PREFIXES):
+        return BlockType.HEADING
+    if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
+        return BlockType.CODE
+    if first.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH
+        return BlockType.QUOTE
+    if first.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
+        return BlockType.ULIST
+    if first.startswith("1. "):
+        i = 1
+        for line in lines:
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH
+            i += 1
+        return BlockType.OLIST
+    return BlockType.PARAGRAPH
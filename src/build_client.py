@@ -0,0 +1,66 @@
+import json
+import os
+import socket
+import sys
+
+# kept to the standard library's cheapest modules: this runs once per
+# preview build and should cost little more than interpreter startup
+DEFAULT_SOCKET = "./.build_cache/daemon.sock"
+
+
+def send_build(argv: list[str], socket_path: str = DEFAULT_SOCKET, stdout=None, stderr=None) -> int:
+    # sends the build arguments to a running daemon, echoes its output and
+    # returns its exit code; raises OSError when no daemon is listening
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        request = {"argv": argv, "cwd": os.getcwd()} if argv != ["--stop"] else {"command": "stop"}
+        client.sendall(json.dumps(request).encode() + b"\n")
+        buffer = b""
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                return 1
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                message = json.loads(line)
+                if "exit" in message:
+                    return message["exit"]
+                stream = stderr if message["stream"] == "stderr" else stdout
+                stream.write(message["text"])
+    finally:
+        client.close()
+
+
+def split_socket_arg(argv: list[str]) -> tuple[list[str], str]:
+    socket_path = os.environ.get("BUILD_DAEMON_SOCKET", DEFAULT_SOCKET)
+    rest = []
+    i = 0
+    while i < len(argv):
+        if argv[i] == "--socket" and i + 1 < len(argv):
+            socket_path = argv[i + 1]
+            i += 2
+            continue
+        if argv[i].startswith("--socket="):
+            socket_path = argv[i].split("=", 1)[1]
+        else:
+            rest.append(argv[i])
+        i += 1
+    return rest, socket_path
+
+
+if __name__ == "__main__":
+    argv, socket_path = split_socket_arg(sys.argv[1:])
+    try:
+        code = send_build(argv, socket_path)
+    except OSError:
+        if argv == ["--stop"]:
+            sys.exit(0)
+        # no daemon: build in this process instead
+        print(f"no build daemon at {socket_path}, building in-process", file=sys.stderr)
+        from main import run
+        code = run(argv)
+    sys.exit(code)
@@ -0,0 +1,115 @@
+import contextlib
+import json
+import os
+import socket
+import traceback
+
+# settings the daemon cannot honour for a client
+REJECTED_OPTIONS = ("--watch", "--daemon", "--socket")
+
+
+class StreamToClient:
+    # file-like object that forwards print() output to the client as
+    # {"stream": name, "text": ...} lines
+    def __init__(self, conn: socket.socket, stream: str):
+        self.conn = conn
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        if text:
+            message = json.dumps({"stream": self.stream, "text": text}) + "\n"
+            try:
+                self.conn.sendall(message.encode())
+            except OSError:
+                # the client went away; the build still finishes
+                pass
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def read_request(conn: socket.socket) -> dict:
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data.decode() or "{}")
+
+
+def handle_request(conn: socket.socket, run_build) -> bool:
+    # runs one build for a client; returns False when asked to stop
+    request = read_request(conn)
+    if request.get("command") == "stop":
+        conn.sendall(json.dumps({"exit": 0}).encode() + b"\n")
+        return False
+
+    argv = request.get("argv", [])
+    stdout = StreamToClient(conn, "stdout")
+    stderr = StreamToClient(conn, "stderr")
+    if os.path.realpath(request.get("cwd", os.getcwd())) != os.path.realpath(os.getcwd()):
+        stderr.write(f"the daemon builds {os.getcwd()}, not {request.get('cwd')}\n")
+        code = 2
+    elif any(arg.split("=")[0] in REJECTED_OPTIONS for arg in argv):
+        stderr.write(f"{', '.join(REJECTED_OPTIONS)} cannot be sent to the daemon\n")
+        code = 2
+    else:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                code = run_build(argv)
+            except SystemExit as e:
+                # argparse errors and --help
+                code = e.code if isinstance(e.code, int) else 1
+            except Exception:
+                traceback.print_exc()
+                code = 1
+    try:
+        conn.sendall(json.dumps({"exit": code}).encode() + b"\n")
+    except OSError:
+        pass
+    return True
+
+
+def daemon_build_defaults(argv: list[str] | None = None) -> dict:
+    # the build options the daemon was started with, as raw values; every
+    # build it runs starts from them and the client's arguments add to or
+    # override them
+    from main import build_parser
+    defaults = vars(build_parser().parse_args(argv))
+    for option in REJECTED_OPTIONS:
+        defaults.pop(option.lstrip("-").replace("-", "_"), None)
+    return defaults
+
+
+def serve(argv: list[str] | None = None):
+    # keeps the renderer modules, compiled templates and caches loaded and
+    # runs one build per connection, in order
+    from main import parse_args, run
+    args = parse_args(argv)
+    defaults = daemon_build_defaults(argv)
+    # load the renderer once, before the first request
+    import generate_content
+
+    socket_path = args.socket
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(16)
+    print(f"build daemon listening on {socket_path} (ctrl-c to stop)")
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                if not handle_request(conn, lambda build_argv: run(build_argv, defaults)):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("build daemon stopped")
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def discard_manifest(path: str):
+    # for builds that rewrite pages without the manifest: what it recorded no
+    # longer describes the output, so the next incremental build starts over
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class BuildManifest:
+    # records what every generated page was built from, so the next build
+    # can skip pages whose source, template and base path are all unchanged
+    def __init__(self, path: str):
+        self.path = path
+        self.template_hash: str | None = None
+        self.base_path: str | None = None
+        self.minify = False
+        self.pages: dict[str, dict] = {}
+        # image url -> digest of the size/srcset the pages were built with
+        self.images: dict[str, str] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"ignoring unreadable build manifest ({self.path})")
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.template_hash = data.get("template_hash")
+        self.base_path = data.get("base_path")
+        self.minify = data.get("minify", False)
+        self.pages = data.get("pages", {})
+        self.images = data.get("images", {})
+
+    def save(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "template_hash": self.template_hash,
+            "base_path": self.base_path,
+            "minify": self.minify,
+            "pages": self.pages,
+            "images": self.images,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def settings_changed(self, template_hash: str, base_path: str, minify: bool = False) -> bool:
+        return self.template_hash != template_hash or self.base_path != base_path or self.minify != minify
+
+    def update_settings(self, template_hash: str, base_path: str, minify: bool = False):
+        self.template_hash = template_hash
+        self.base_path = base_path
+        self.minify = minify
+
+    def changed_images(self, images: dict[str, str]) -> set[str]:
+        return {url for url in set(images) | set(self.images) if images.get(url) != self.images.get(url)}
+
+    def update_images(self, images: dict[str, str]):
+        self.images = dict(images)
+
+    def is_page_stale(self, from_path: str, source_hash: str, dest_path: str) -> bool:
+        entry = self.pages.get(from_path)
+        if entry is None:
+            return True
+        if entry["hash"] != source_hash or entry["dest"] != str(dest_path):
+            return True
+        return not os.path.isfile(dest_path)
+
+    def record_page(self, from_path: str, source_hash: str, dest_path: str):
+        self.pages[from_path] = {"hash": source_hash, "dest": str(dest_path)}
+
+    def remove_page(self, from_path: str):
+        self.pages.pop(from_path, None)
+
+    def removed_sources(self, current_sources: set[str]) -> list[tuple[str, str]]:
+        return [(from_path, entry["dest"]) for from_path, entry in self.pages.items() if from_path not in current_sources]
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# pipeline stages in the order a page goes through them
+STAGES = ("walk", "read", "template", "blocks", "inline", "serialize", "write")
+
+
+class BuildProfiler:
+    # records (stage, page, start, duration, pid, tid) for every timed span;
+    # times come from perf_counter, which is CLOCK_MONOTONIC on Linux and so
+    # comparable between the worker processes of a parallel build
+    def __init__(self):
+        self.events: list[tuple[str, str | None, float, float, int, int]] = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, page: str | None = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append((name, page, start, time.perf_counter() - start, os.getpid(), threading.get_ident()))
+
+    def record(self, name: str, page: str | None, start: float, duration: float):
+        # a span timed by the caller, e.g. one made of several pieces
+        self.events.append((name, page, start, duration, os.getpid(), threading.get_ident()))
+
+    def merge(self, events: list):
+        self.events.extend(tuple(event) for event in events)
+
+    def drain(self) -> list:
+        events, self.events = self.events, []
+        return events
+
+    def stage_totals(self) -> dict[str, tuple[float, int]]:
+        totals: dict[str, list] = {}
+        for name, _, _, duration, _, _ in self.events:
+            total = totals.setdefault(name, [0.0, 0])
+            total[0] += duration
+            total[1] += 1
+        return {name: (seconds, count) for name, (seconds, count) in totals.items()}
+
+    def page_totals(self) -> dict[str, float]:
+        totals: dict[str, float] = {}
+        for _, page, _, duration, _, _ in self.events:
+            if page is not None:
+                totals[page] = totals.get(page, 0.0) + duration
+        return totals
+
+    def summary(self, top_n: int = 10) -> str:
+        stage_totals = self.stage_totals()
+        measured = sum(seconds for seconds, _ in stage_totals.values()) or 1.0
+        lines = [f"build took {time.perf_counter() - self.started:.3f}s wall, {measured:.3f}s in timed stages"]
+        lines.append(f"  {'stage':<12}{'calls':>8}{'seconds':>10}{'share':>8}")
+        ordered = [name for name in STAGES if name in stage_totals] + sorted(set(stage_totals) - set(STAGES))
+        for name in ordered:
+            seconds, count = stage_totals[name]
+            lines.append(f"  {name:<12}{count:>8}{seconds:>10.3f}{seconds / measured:>8.1%}")
+        slowest = sorted(self.page_totals().items(), key=lambda item: item[1], reverse=True)[:top_n]
+        if slowest:
+            lines.append(f"slowest {len(slowest)} pages:")
+            for page, seconds in slowest:
+                lines.append(f"  {seconds * 1000:>9.2f} ms  {page}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        # "X" (complete) events in microseconds; chrome://tracing and
+        # Perfetto draw one row per (pid, tid)
+        events = []
+        for name, page, start, duration, pid, tid in self.events:
+            event = {"name": name, "cat": "build", "ph": "X", "ts": (start - self.started) * 1e6, "dur": duration * 1e6, "pid": pid, "tid": tid}
+            if page is not None:
+                event["args"] = {"page": page}
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+class NullProfiler:
+    # stands in when profiling is off so call sites need no checks
+    def stage(self, name: str, page: str | None = None):
+        return nullcontext()
+
+    def record(self, name: str, page: str | None, start: float, duration: float):
+        pass
+
+    def merge(self, events: list):
+        pass
+
+    def drain(self) -> list:
+        return []
+
+
+NULL_PROFILER = NullProfiler()
+_profiler = NULL_PROFILER
+
+
+def get_profiler():
+    return _profiler
+
+
+def enable_profiling() -> BuildProfiler:
+    global _profiler
+    if not isinstance(_profiler, BuildProfiler):
+        _profiler = BuildProfiler()
+    return _profiler
+
+
+def disable_profiling():
+    global _profiler
+    _profiler = NULL_PROFILER
+
+
+def is_profiling() -> bool:
+    return _profiler is not NULL_PROFILER
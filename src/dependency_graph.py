@@ -0,0 +1,158 @@
+import json
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+DEPENDENCY_GRAPH_VERSION = 1
+
+
+def url_targets(url: str, page_url: str = "/") -> list[str] | None:
+    # output paths (relative to the output root) an internal url may be
+    # served from, or None for external urls and in-page anchors
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or parts.path == "":
+        return None
+    path = parts.path
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(page_url), path)
+    path = posixpath.normpath(path).lstrip("/")
+    if path in ("", "."):
+        return ["index.html"]
+    if posixpath.splitext(path)[1]:
+        return [path]
+    return [path, path + ".html", posixpath.join(path, "index.html")]
+
+
+class DependencyGraph:
+    # what every output was built from: page source -> template, the links
+    # and images it references and its output, plus static file -> copy
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.pages: dict[str, dict] = {}
+        self.assets: dict[str, str] = {}
+        # outputs of other build stages (image variants, catalog and search
+        # files), recorded after every build rather than saved
+        self.generated: set[str] = set()
+        self.track_new = False
+        self.new_pages: list[str] = []
+
+    def record_page(self, from_path: str, dest_path: str, template_path: str, links: list[str], images: list[str]):
+        from_path = os.path.normpath(from_path)
+        self.pages[from_path] = {"dest": os.path.normpath(dest_path), "template": os.path.normpath(template_path), "links": links, "images": images}
+        if self.track_new:
+            self.new_pages.append(from_path)
+
+    def remove_page(self, from_path: str):
+        self.pages.pop(os.path.normpath(from_path), None)
+
+    def record_asset(self, source_path: str, dest_path: str):
+        self.assets[os.path.normpath(source_path)] = os.path.normpath(dest_path)
+
+    def remove_asset(self, source_path: str):
+        self.assets.pop(os.path.normpath(source_path), None)
+
+    def record_static_tree(self, dir_path_static: str, dest_dir_path: str):
+        self.assets = {}
+        for dir_name, _, filenames in os.walk(dir_path_static):
+            for filename in filenames:
+                source_path = os.path.join(dir_name, filename)
+                self.record_asset(source_path, os.path.join(dest_dir_path, os.path.relpath(source_path, dir_path_static)))
+
+    def record_generated(self, paths):
+        self.generated = {os.path.normpath(path) for path in paths}
+
+    def affected(self, path: str) -> tuple[list[str], list[str]]:
+        # what must be redone if path changes: (pages to render, static
+        # files to copy). Pages only linking to a changed file keep their
+        # HTML, see referrers() for those.
+        path = os.path.normpath(path)
+        if path in self.pages:
+            return [path], []
+        if path in self.assets:
+            return [], [path]
+        return sorted(from_path for from_path, entry in self.pages.items() if entry["template"] == path), []
+
+    def output_index(self, dest_dir_path: str) -> dict[str, str]:
+        # output path relative to the root, as a url path -> source
+        root = os.path.normpath(dest_dir_path)
+        index = {}
+        for source, dest in list(self.assets.items()) + [(from_path, entry["dest"]) for from_path, entry in self.pages.items()] + [(path, path) for path in self.generated]:
+            index[os.path.relpath(dest, root).replace(os.sep, "/")] = source
+        return index
+
+    def page_url(self, entry: dict, dest_dir_path: str) -> str:
+        return "/" + os.path.relpath(entry["dest"], os.path.normpath(dest_dir_path)).replace(os.sep, "/")
+
+    def referrers(self, path: str, dest_dir_path: str) -> list[str]:
+        # pages whose links or images point at the output of path
+        path = os.path.normpath(path)
+        dest = self.assets.get(path) or self.pages.get(path, {}).get("dest")
+        if dest is None:
+            return []
+        target = os.path.relpath(dest, os.path.normpath(dest_dir_path)).replace(os.sep, "/")
+        found = []
+        for from_path, entry in sorted(self.pages.items()):
+            page_url = self.page_url(entry, dest_dir_path)
+            for url in entry["links"] + entry["images"]:
+                if target in (url_targets(url, page_url) or ()):
+                    found.append(from_path)
+                    break
+        return found
+
+    def broken_links(self, dest_dir_path: str) -> list[tuple[str, str]]:
+        # (page source, url) for every internal link or image that no page,
+        # static file or other build stage produces
+        outputs = self.output_index(dest_dir_path)
+        broken = []
+        for from_path, entry in sorted(self.pages.items()):
+            page_url = self.page_url(entry, dest_dir_path)
+            for url in entry["links"] + entry["images"]:
+                targets = url_targets(url, page_url)
+                if targets is not None and not any(target in outputs for target in targets):
+                    broken.append((from_path, url))
+        return broken
+
+    def start_worker(self):
+        self.pages = {}
+        self.track_new = True
+        self.new_pages = []
+
+    def take_worker_update(self) -> dict:
+        update = {"pages": {from_path: self.pages[from_path] for from_path in self.new_pages if from_path in self.pages}}
+        self.new_pages = []
+        return update
+
+    def apply_worker_update(self, update: dict):
+        self.pages.update(update["pages"])
+
+    def describe(self) -> str:
+        edges = sum(1 + len(entry["links"]) + len(entry["images"]) for entry in self.pages.values())
+        return f"dependency graph: {len(self.pages)} pages, {len(self.assets)} static files, {edges} edges"
+
+    @classmethod
+    def load(cls, path: str) -> "DependencyGraph":
+        graph = cls(path)
+        if not os.path.isfile(path):
+            return graph
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"ignoring unreadable dependency graph ({path})")
+            return graph
+        if data.get("version") != DEPENDENCY_GRAPH_VERSION:
+            return graph
+        graph.pages = data.get("pages", {})
+        graph.assets = data.get("assets", {})
+        return graph
+
+    def save(self, path: str | None = None):
+        path = path or self.path
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {"version": DEPENDENCY_GRAPH_VERSION, "pages": self.pages, "assets": self.assets}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
@@ -1,5 +1,9 @@
 import os
 import shutil
+from build_manifest import hash_file
+
+# Linux ioctl that shares a file's extents with another file (btrfs, xfs)
+FICLONE = 0x40049409
 
 def empty_directory_recursively(dir_path: str):
     contents: list[str] = os.listdir(dir_path)
@@ -22,6 +26,89 @@ def copy_folder_structure(origin_path: str, destination_path: str):
     print(f"copying folder structure from ({origin_path}) to ({destination_path}) ...")
     shutil.copytree(src=origin_path, dst=destination_path, dirs_exist_ok=True)
 
+def sync_folder_structure(origin_path: str, destination_path: str, use_hash: bool = False, link_mode: str = "copy", preserve=None) -> dict[str, int]:
+    # copies only new or changed files and removes destination files that no
+    # longer exist in origin, unless preserve(dest_path) says to keep them
+    # (e.g. pages the generator is about to rewrite)
+    counts = {"copied": 0, "unchanged": 0, "removed": 0}
+    expected: set[str] = set()
+    for dir_name, _, filenames in os.walk(origin_path):
+        dest_dir = os.path.join(destination_path, os.path.relpath(dir_name, origin_path))
+        os.makedirs(dest_dir, exist_ok=True)
+        for filename in filenames:
+            src = os.path.join(dir_name, filename)
+            dst = os.path.normpath(os.path.join(dest_dir, filename))
+            expected.add(dst)
+            if files_match(src, dst, use_hash):
+                counts["unchanged"] += 1
+                continue
+            print(f"copying {src} -> {dst}")
+            place_file(src, dst, link_mode)
+            counts["copied"] += 1
+
+    for dir_name, _, filenames in os.walk(destination_path, topdown=False):
+        for filename in filenames:
+            dst = os.path.normpath(os.path.join(dir_name, filename))
+            if dst in expected or (preserve is not None and preserve(dst)):
+                continue
+            print(f"removing {dst}")
+            os.remove(dst)
+            counts["removed"] += 1
+        rel_dir = os.path.relpath(dir_name, destination_path)
+        if rel_dir != "." and not os.listdir(dir_name) and not os.path.isdir(os.path.join(origin_path, rel_dir)):
+            os.rmdir(dir_name)
+
+    print(f"synced ({origin_path}) to ({destination_path}): {counts['copied']} copied, {counts['unchanged']} unchanged, {counts['removed']} removed")
+    return counts
+
+
+def files_match(src: str, dst: str, use_hash: bool = False) -> bool:
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src)
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if not use_hash or hash_file(src) != hash_file(dst):
+        return False
+    # same bytes under a new mtime (e.g. a fresh checkout): adopt the
+    # source mtime so the next sync doesn't hash the pair again
+    shutil.copystat(src, dst)
+    return True
+
+
+def place_file(src: str, dst: str, link_mode: str = "copy"):
+    # link_mode is "copy", "hardlink" or "reflink"; links fall back to a
+    # plain copy when the filesystem can't provide them
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if link_mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    elif link_mode == "reflink":
+        try:
+            reflink_file(src, dst)
+            return
+        except (OSError, ImportError):
+            if os.path.lexists(dst):
+                os.remove(dst)
+    shutil.copy2(src, dst)
+
+
+def reflink_file(src: str, dst: str):
+    import fcntl
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src, dst)
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+FENCE = "---"
+CLOSING_FENCES = ("---", "...")
+# only these are booleans; YAML 1.1's yes/no/on/off stay strings, so a
+# title such as "No" is kept as written
+TRUE_VALUES = ("true",)
+FALSE_VALUES = ("false",)
+
+
+def parse_scalar(value: str):
+    # the small part of YAML front matter needs: quoted and bare strings,
+    # booleans, null, numbers and [inline, lists]
+    value = value.strip()
+    if value[:1] in ("'", '"'):
+        quote = value[0]
+        end = value.find(quote, 1)
+        if end == -1:
+            raise ValueError(f"unterminated string in front matter: {value}")
+        return value[1:end]
+    if " #" in value:
+        value = value[:value.index(" #")].rstrip()
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_scalar(item) for item in value[1:-1].split(",") if item.strip()]
+    lowered = value.lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    if lowered in ("", "~", "null"):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def parse_front_matter(lines, skipped: list | None = None) -> dict:
+    # "key: value" lines, where an empty value may be followed by "- item"
+    # lines making it a list; nesting is not supported. Lines it cannot
+    # read are left out, and appended to skipped for the caller to report.
+    meta = {}
+    list_key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        try:
+            if stripped.startswith("- ") or stripped == "-":
+                if list_key is None:
+                    raise ValueError("list item outside a list")
+                item = parse_scalar(stripped[1:])
+                if meta[list_key] is None:
+                    meta[list_key] = []
+                meta[list_key].append(item)
+                continue
+            key, separator, value = stripped.partition(":")
+            if not separator or line[0].isspace():
+                raise ValueError("not a key: value pair")
+            key = key.strip()
+            meta[key] = parse_scalar(value)
+        except ValueError:
+            if skipped is not None:
+                skipped.append(stripped)
+            continue
+        list_key = key if meta[key] is None else None
+    return meta
+
+
+def split_front_matter(markdown: str, skipped: list | None = None) -> tuple[dict, str]:
+    # (front matter, markdown after it); text without a leading "---" line
+    # closed by "---" or "..." has no front matter
+    if not markdown.startswith(FENCE):
+        return {}, markdown
+    lines = markdown.split("\n")
+    if lines[0].rstrip() != FENCE:
+        return {}, markdown
+    for i in range(1, len(lines)):
+        if lines[i].rstrip() in CLOSING_FENCES:
+            return parse_front_matter(lines[1:i], skipped), "\n".join(lines[i + 1:])
+    return {}, markdown
+
+
+def read_front_matter(f, skipped: list | None = None) -> dict | None:
+    # reads an open file only as far as the end of its front matter; None
+    # when there is none, with f rewound to the start
+    if f.readline().rstrip() != FENCE:
+        f.seek(0)
+        return None
+    lines = []
+    # readline() rather than iteration keeps f.tell() usable afterwards
+    for line in iter(f.readline, ""):
+        if line.rstrip() in CLOSING_FENCES:
+            return parse_front_matter(lines, skipped)
+        lines.append(line)
+    f.seek(0)
+    return None
+
+
+def read_page_header(path: str) -> dict:
+    # front matter plus "title", read without touching the page body: the
+    # file is read up to its first "# " heading, or only through the front
+    # matter when that sets the title
+    with open(path, "r") as f:
+        meta = read_front_matter(f) or {}
+        if "title" not in meta:
+            for line in f:
+                if line.startswith("# "):
+                    meta["title"] = line[2:].rstrip("\n")
+                    break
+    return meta
+
+
+def is_draft(meta: dict) -> bool:
+    return meta.get("draft") is True or meta.get("published") is False
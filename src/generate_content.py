@@ -1,10 +1,114 @@
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain
 from pathlib import Path
-from utilities import markdown_to_html_node
+from utilities import StreamedBlocks, annotate_images, blocks_to_html_node, cached_page_tree, get_ast_cache, get_block_cache, get_image_variants, get_inline_cache, node_references, rewrite_base_path, set_ast_cache, set_block_cache, set_image_variants, set_inline_cache
+from inline_cache import InlineCache
+from block_cache import BlockCache
+from ast_cache import AstCache
+from block_scanner import iter_blocks, iter_markdown_blocks
+from front_matter import is_draft, read_front_matter, split_front_matter
+from page_template import load_template
+from build_manifest import BuildManifest, hash_file
+from build_profiler import disable_profiling, enable_profiling, get_profiler, is_profiling
+from output_writer import OutputWriter
+from dependency_graph import DependencyGraph
+from search_index import SearchIndex
+from memory_budget import apply_memory_limit, restore_memory_limit
+from site_catalog import SiteCatalog
+
+_output_writer: OutputWriter | None = None
+_dependency_graph: DependencyGraph | None = None
+_search_index: SearchIndex | None = None
+_site_catalog: SiteCatalog | None = None
+_minify_html = False
+_include_drafts = False
+# low-memory mode and the per-worker address space limit in bytes (0: none)
+_low_memory = False
+_memory_limit = 0
+
+
+def set_output_writer(writer: OutputWriter | None):
+    global _output_writer
+    _output_writer = writer
+
+
+def get_output_writer() -> OutputWriter | None:
+    return _output_writer
+
+
+def set_dependency_graph(graph: DependencyGraph | None):
+    global _dependency_graph
+    _dependency_graph = graph
+
+
+def get_dependency_graph() -> DependencyGraph | None:
+    return _dependency_graph
+
+
+def set_search_index(index: SearchIndex | None):
+    global _search_index
+    _search_index = index
+
+
+def get_search_index() -> SearchIndex | None:
+    return _search_index
+
+
+def set_site_catalog(catalog: SiteCatalog | None):
+    global _site_catalog
+    _site_catalog = catalog
+
+
+def get_site_catalog() -> SiteCatalog | None:
+    return _site_catalog
+
+
+def set_minify_html(minify: bool):
+    global _minify_html
+    _minify_html = minify
+
+
+def get_minify_html() -> bool:
+    return _minify_html
+
+
+def set_include_drafts(include: bool):
+    global _include_drafts
+    _include_drafts = include
+
+
+def get_include_drafts() -> bool:
+    return _include_drafts
+
+
+def set_low_memory(enabled: bool, memory_limit: int = 0):
+    global _low_memory, _memory_limit
+    _low_memory = enabled
+    _memory_limit = memory_limit
+
+
+def get_low_memory() -> tuple[bool, int]:
+    return _low_memory, _memory_limit
+
+
+def page_is_draft(from_path) -> bool:
+    # reads only the front matter; a page that cannot be read is kept so
+    # rendering reports the error against it
+    if _include_drafts:
+        return False
+    try:
+        with open(from_path, "r") as f:
+            return is_draft(read_front_matter(f) or {})
+    except (OSError, ValueError):
+        return False
 
 
 def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
+    with get_profiler().stage("walk"):
+        filenames = os.listdir(dir_path_content)
+    for filename in filenames:
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
         if os.path.isfile(from_path):
@@ -14,30 +118,459 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, bas
             generate_pages_recursive(from_path, template_path, dest_path, basepath)
 
 
+def generate_pages(dir_path_content, template_path, dest_dir_path, basepath, workers: int = 1, pages: list[tuple[str, str]] | None = None) -> list[tuple[str, str]]:
+    # pages, when given, is the collect_pages() list the caller already has
+    if pages is None:
+        with get_profiler().stage("walk"):
+            pages = collect_pages(dir_path_content, dest_dir_path)
+    return render_pages(pages, template_path, basepath, workers)
+
+
+def collect_pages(dir_path_content, dest_dir_path) -> list[tuple[str, str]]:
+    return list(iter_pages(dir_path_content, dest_dir_path))
+
+
+def iter_pages(dir_path_content, dest_dir_path):
+    # yields (from_path, dest_path) in collect_pages() order as pages are
+    # found; walks with a stack of sorted os.scandir listings rather than
+    # recursion, so memory follows depth and directory width, not page count
+    stack = [scan_sorted(dir_path_content, dest_dir_path)]
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+            continue
+        entry, dest_path = item
+        if entry.is_file():
+            if not page_is_draft(entry.path):
+                yield entry.path, str(Path(dest_path).with_suffix(".html"))
+        else:
+            stack.append(scan_sorted(entry.path, dest_path))
+
+
+def scan_sorted(dir_path, dest_dir_path):
+    with os.scandir(dir_path) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    return ((entry, os.path.join(dest_dir_path, entry.name)) for entry in entries)
+
+
+def generate_pages_streaming(dir_path_content, template_path, dest_dir_path, basepath, workers: int = 1, batch_size: int = 16, pages=None) -> list[tuple[str, str]]:
+    # the low-memory full build: pages come from the lazy walk, unless the
+    # caller already collected them, and at most a few batches per worker
+    # are in flight, so no list of every page is built here. Bad pages are
+    # reported at the end, like a parallel build.
+    if pages is None:
+        pages = iter_pages(dir_path_content, dest_dir_path)
+    errors = []
+    if workers <= 1:
+        previous_limit = apply_memory_limit(_memory_limit)
+        try:
+            for from_path, dest_path in pages:
+                from_path, error = render_page_job((from_path, template_path, dest_path, basepath))
+                if error is not None:
+                    errors.append((from_path, error))
+        finally:
+            restore_memory_limit(previous_limit)
+        return errors
+
+    def collect(futures):
+        for future in futures:
+            results, report = future.result()
+            merge_worker_report(report)
+            errors.extend((from_path, error) for from_path, error in results if error is not None)
+
+    pending = set()
+    batch = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker, initargs=render_worker_initargs()) as executor:
+        for from_path, dest_path in pages:
+            batch.append((from_path, template_path, dest_path, basepath))
+            if len(batch) < batch_size:
+                continue
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(render_page_batch_worker_job, batch))
+            batch = []
+        if batch:
+            pending.add(executor.submit(render_page_batch_worker_job, batch))
+        collect(wait(pending).done)
+    return sorted(errors)
+
+
+def render_pages(pages: list[tuple[str, str]], template_path, basepath, workers: int = 1) -> list[tuple[str, str]]:
+    # a serial build stops at the first bad page, a parallel one renders
+    # everything it can and returns the (from_path, error) pairs
+    if workers <= 1 or len(pages) <= 1:
+        for from_path, dest_path in pages:
+            generate_page(from_path, template_path, dest_path, basepath)
+        return flush_output_writer(pages)
+
+    jobs = [(from_path, template_path, dest_path, basepath) for from_path, dest_path in pages]
+    batch_size = max(1, len(jobs) // (workers * 4))
+    batches = [jobs[start:start + batch_size] for start in range(0, len(jobs), batch_size)]
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker, initargs=render_worker_initargs()) as executor:
+        for results, report in executor.map(render_page_batch_worker_job, batches):
+            merge_worker_report(report)
+            errors.extend((from_path, error) for from_path, error in results if error is not None)
+    return errors
+
+
+def render_worker_initargs() -> tuple:
+    writer = get_output_writer()
+    writer_settings = writer.worker_settings() if writer is not None else None
+    search_index = get_search_index()
+    search_settings = search_index.worker_settings() if search_index is not None else None
+    catalog = get_site_catalog()
+    catalog_settings = catalog.worker_settings() if catalog is not None else None
+    return (is_profiling(), worker_cache_settings(), writer_settings, get_dependency_graph() is not None, search_settings, get_image_variants(), get_minify_html(), catalog_settings, get_include_drafts(), get_low_memory())
+
+
+def flush_output_writer(pages: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    # waits for queued page writes and reports failures against the source
+    # page, so an incremental build does not record a page that never landed
+    writer = get_output_writer()
+    if writer is None:
+        return []
+    sources = {str(dest_path): from_path for from_path, dest_path in pages}
+    return [(sources.get(path, path), f"write failed: {error}") for path, error in writer.flush()]
+
+
+# caches shared with pool workers: name -> (class, getter, setter)
+WORKER_CACHES = {
+    "inline_cache": (InlineCache, get_inline_cache, set_inline_cache),
+    "block_cache": (BlockCache, get_block_cache, set_block_cache),
+    "ast_cache": (AstCache, get_ast_cache, set_ast_cache),
+}
+
+
+def worker_cache_settings() -> dict[str, tuple]:
+    settings = {}
+    for name, (_, get_cache, _) in WORKER_CACHES.items():
+        cache = get_cache()
+        if cache is not None:
+            settings[name] = cache.worker_settings()
+    return settings
+
+
+def init_render_worker(profile: bool, cache_settings: dict[str, tuple] | None = None, writer_settings: tuple[int, int] | None = None, track_dependencies: bool = False, search_settings: tuple[str, str, str] | None = None, images=None, minify: bool = False, catalog_settings: tuple | None = None, include_drafts: bool = False, memory_settings: tuple[bool, int] = (False, 0)):
+    # forked workers inherit the parent's profiler and caches; start each
+    # one clean so only what the worker itself did is sent back
+    disable_profiling()
+    if profile:
+        enable_profiling()
+    # threads do not survive a fork, so every worker starts its own writer
+    set_output_writer(OutputWriter(*writer_settings) if writer_settings else None)
+    graph = None
+    if track_dependencies:
+        graph = DependencyGraph()
+        graph.start_worker()
+    set_dependency_graph(graph)
+    set_search_index(SearchIndex(*search_settings) if search_settings else None)
+    set_image_variants(images)
+    set_minify_html(minify)
+    set_include_drafts(include_drafts)
+    set_low_memory(*memory_settings)
+    # the budget holds for the worker's whole life
+    apply_memory_limit(memory_settings[1])
+    catalog = None
+    if catalog_settings:
+        catalog = SiteCatalog(*catalog_settings)
+        catalog.start_worker()
+    set_site_catalog(catalog)
+
+    cache_settings = cache_settings or {}
+    for name, (cache_class, get_cache, set_cache) in WORKER_CACHES.items():
+        if name not in cache_settings:
+            set_cache(None)
+            continue
+        cache = get_cache()
+        if cache is None:
+            # spawned workers start empty and read the persisted cache
+            path, size = cache_settings[name]
+            cache = cache_class.load(path, size) if path else cache_class(size)
+            set_cache(cache)
+        cache.start_worker()
+
+
+def worker_report() -> dict:
+    report = {"events": get_profiler().drain()}
+    for name, (_, get_cache, _) in WORKER_CACHES.items():
+        cache = get_cache()
+        if cache is not None:
+            report[name] = cache.take_worker_update()
+    writer = get_output_writer()
+    if writer is not None:
+        report["output_writer"] = writer.take_worker_update()
+    graph = get_dependency_graph()
+    if graph is not None:
+        report["dependency_graph"] = graph.take_worker_update()
+    catalog = get_site_catalog()
+    if catalog is not None:
+        report["site_catalog"] = catalog.take_worker_update()
+    return report
+
+
+def merge_worker_report(report: dict):
+    get_profiler().merge(report["events"])
+    for name, (_, get_cache, _) in WORKER_CACHES.items():
+        cache = get_cache()
+        if cache is not None and name in report:
+            cache.apply_worker_update(report[name])
+    writer = get_output_writer()
+    if writer is not None and "output_writer" in report:
+        writer.apply_worker_update(report["output_writer"])
+    graph = get_dependency_graph()
+    if graph is not None and "dependency_graph" in report:
+        graph.apply_worker_update(report["dependency_graph"])
+    catalog = get_site_catalog()
+    if catalog is not None and "site_catalog" in report:
+        catalog.apply_worker_update(report["site_catalog"])
+
+
+def render_page_job(job) -> tuple[str, str | None]:
+    from_path, template_path, dest_path, basepath = job
+    try:
+        generate_page(from_path, template_path, dest_path, basepath)
+    except Exception as e:
+        return from_path, f"{type(e).__name__}: {e}"
+    return from_path, None
+
+
+def render_page_batch_worker_job(jobs) -> tuple[list[tuple[str, str | None]], dict]:
+    # runs a batch of pages in one pool round trip; profiling spans and cache
+    # additions ride back with the results. Queued writes are waited for once
+    # per batch, and a page only counts as rendered once its write landed.
+    results = [render_page_job(job) for job in jobs]
+    write_errors = dict(flush_output_writer([(job[0], job[2]) for job in jobs]))
+    results = [(from_path, error if error is not None else write_errors.get(from_path)) for from_path, error in results]
+    return results, worker_report()
+
+
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, basepath, manifest_path, workers: int = 1, pages: list[tuple[str, str]] | None = None) -> list[tuple[str, str]]:
+    manifest = BuildManifest(manifest_path)
+    template_hash = hash_file(template_path)
+    full_rebuild = manifest.settings_changed(template_hash, basepath, get_minify_html())
+    if full_rebuild:
+        print("template, base path or minify setting changed, regenerating every page")
+
+    profiler = get_profiler()
+    if pages is None:
+        with profiler.stage("walk"):
+            pages = collect_pages(dir_path_content, dest_dir_path)
+
+    images = get_image_variants()
+    image_digests = images.digests() if images is not None else {}
+    changed_images = manifest.changed_images(image_digests)
+    graph = get_dependency_graph()
+
+    current_sources = set()
+    stale_pages = []
+    source_hashes = {}
+    for from_path, dest_path in pages:
+        current_sources.add(from_path)
+        with profiler.stage("hash", from_path):
+            source_hash = hash_file(from_path)
+        if full_rebuild or manifest.is_page_stale(from_path, source_hash, dest_path) or uses_changed_images(graph, from_path, changed_images):
+            stale_pages.append((from_path, dest_path))
+            source_hashes[from_path] = source_hash
+
+    errors = render_pages(stale_pages, template_path, basepath, workers)
+    failed = {from_path for from_path, _ in errors}
+    generated = 0
+    for from_path, dest_path in stale_pages:
+        if from_path in failed:
+            # forget the page so the next build retries it
+            manifest.remove_page(from_path)
+        else:
+            manifest.record_page(from_path, source_hashes[from_path], dest_path)
+            generated += 1
+
+    removed = 0
+    for from_path, dest_path in manifest.removed_sources(current_sources):
+        remove_generated_page(dest_path, dest_dir_path)
+        manifest.remove_page(from_path)
+        if graph is not None:
+            graph.remove_page(from_path)
+        removed += 1
+
+    manifest.update_settings(template_hash, basepath, get_minify_html())
+    manifest.update_images(image_digests)
+    manifest.save()
+    print(f"{generated} pages generated, {len(current_sources) - len(stale_pages)} unchanged, {removed} removed")
+    return errors
+
+
+def uses_changed_images(graph: DependencyGraph | None, from_path: str, changed_images: set[str]) -> bool:
+    # a page whose images changed size or variants needs new <img> tags;
+    # without a recorded graph entry assume it does
+    if not changed_images:
+        return False
+    entry = graph.pages.get(os.path.normpath(from_path)) if graph is not None else None
+    if entry is None:
+        return True
+    return any(url in changed_images for url in entry["images"])
+
+
+def remove_generated_page(dest_path, dest_dir_path):
+    print(f" - removing {dest_path}")
+    if os.path.isfile(dest_path):
+        os.remove(dest_path)
+    # prune directories left empty by the removal, but never the output root
+    root = os.path.abspath(dest_dir_path)
+    dir_path = os.path.dirname(os.path.abspath(dest_path))
+    while dir_path != root and dir_path.startswith(root) and os.path.isdir(dir_path) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
+
+
+def report_skipped_front_matter(from_path, skipped: list[str]):
+    # a front matter line the parser cannot read is a warning, not an error
+    for line in skipped:
+        print(f" - ignoring front matter line in {from_path}: {line}")
+
+
 def generate_page(from_path, template_path, dest_path, basepath):
+    if _low_memory:
+        return generate_page_streaming(from_path, template_path, dest_path, basepath)
     print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
+    profiler = get_profiler()
+    page = str(from_path)
+    with profiler.stage("read", page):
+        with open(from_path, "r") as from_file:
+            markdown_content = from_file.read()
+        skipped = []
+        meta, markdown_content = split_front_matter(markdown_content, skipped)
+    report_skipped_front_matter(from_path, skipped)
+    if is_draft(meta) and not _include_drafts:
+        # skipped before any parsing; collect_pages() already leaves drafts
+        # out, only the serial walk gets here
+        print(f" - skipping draft {from_path}")
+        return
+
+    with profiler.stage("template", page):
+        template = load_template(template_path, basepath, get_minify_html())
+
+    with profiler.stage("blocks", page):
+        blocks = list(iter_markdown_blocks(markdown_content))
+    graph = get_dependency_graph()
+    # (links, images) as the page renders, for the graph and --validate
+    references = ([], []) if graph is not None else None
+    with profiler.stage("inline", page):
+        ast_cache = get_ast_cache()
+        if ast_cache is not None:
+            # the cached tree replaces the block cache: it is the page
+            # parsed once, rewritten here for this build's settings
+            node = cached_page_tree(markdown_content, blocks, ast_cache)
+            if references is not None:
+                node_references(node, references)
+            annotate_images(node, get_image_variants(), basepath)
+            rewrite_base_path(node, basepath)
+        else:
+            # only generated links are rewritten, never text inside code blocks
+            node = blocks_to_html_node(blocks, basepath, get_block_cache(), get_image_variants(), template.minify, references)
+        title = page_title(meta, markdown_content)
+
+    if graph is not None:
+        with profiler.stage("deps", page):
+            graph.record_page(page, str(dest_path), str(template_path), *references)
+
+    search_index = get_search_index()
+    if search_index is not None:
+        with profiler.stage("index", page):
+            search_index.index_page(page, str(dest_path), title, blocks)
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
+    catalog = get_site_catalog()
+    if catalog is not None:
+        with profiler.stage("catalog", page):
+            catalog.record_page(page, str(dest_path), title, blocks, meta)
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
+    writer = get_output_writer()
+    if writer is not None:
+        with profiler.stage("serialize", page):
+            data = template.render(title, node.to_html(minify=template.minify)).encode()
+        # only time spent waiting for room in the write queue shows up here
+        with profiler.stage("write", page):
+            writer.submit(dest_path, data)
+        return
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', 'href="' + basepath)
-    template = template.replace('src="/', 'src="' + basepath)
+    write_start = time.perf_counter()
+    to_file = open_output(dest_path)
+    write_seconds = time.perf_counter() - write_start
+    try:
+        with profiler.stage("serialize", page):
+            template.write(to_file, title, node)
+    finally:
+        close_start = time.perf_counter()
+        to_file.close()
+        # opening and closing the file are one "write" span per page
+        profiler.record("write", page, write_start, write_seconds + time.perf_counter() - close_start)
 
+
+def open_output(dest_path):
     dest_dir_path = os.path.dirname(dest_path)
     if dest_dir_path != "":
         os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
+    return open(dest_path, "w")
+
+
+def generate_page_streaming(from_path, template_path, dest_path, basepath):
+    # the low-memory page: a first pass over the file finds the title, a
+    # second parses, renders and writes one block at a time. The markdown,
+    # the page's node tree and its HTML are never held whole.
+    print(f" * {from_path} {template_path} -> {dest_path}")
+    profiler = get_profiler()
+    page = str(from_path)
+    with open(from_path, "r") as from_file:
+        with profiler.stage("read", page):
+            skipped = []
+            meta = read_front_matter(from_file, skipped) or {}
+            body_start = from_file.tell()
+            report_skipped_front_matter(from_path, skipped)
+            if is_draft(meta) and not _include_drafts:
+                print(f" - skipping draft {from_path}")
+                return
+            title = meta.get("title")
+            if title is None:
+                # extract_title() without holding the whole text
+                for line in iter(from_file.readline, ""):
+                    if line.startswith("# "):
+                        title = line[2:].rstrip("\n")
+                        break
+                else:
+                    raise ValueError("no title found")
+            from_file.seek(body_start)
+
+        with profiler.stage("template", page):
+            template = load_template(template_path, basepath, get_minify_html())
+
+        graph = get_dependency_graph()
+        references = ([], []) if graph is not None else None
+        blocks = iter_blocks(from_file)
+        first_block = next(blocks, None)
+        if first_block is None:
+            # checked before the output is opened: a page with no body fails
+            # here just as the whole-page ParentNode("div", []) does
+            raise ValueError("cannot instantiate parent node without children")
+        content = StreamedBlocks(chain((first_block,), blocks), basepath, get_block_cache(), get_image_variants(), references)
+        write_start = time.perf_counter()
+        to_file = open_output(dest_path)
+        write_seconds = time.perf_counter() - write_start
+        try:
+            with profiler.stage("stream", page):
+                template.write(to_file, str(title), content)
+        finally:
+            close_start = time.perf_counter()
+            to_file.close()
+            profiler.record("write", page, write_start, write_seconds + time.perf_counter() - close_start)
+
+    if graph is not None:
+        graph.record_page(page, str(dest_path), str(template_path), *references)
+
+
+def page_title(meta: dict, markdown: str) -> str:
+    title = meta.get("title")
+    return str(title) if title is not None else extract_title(markdown)
 
 
 def extract_title(md):
@@ -0,0 +1,107 @@
+import re
+
+# whitespace inside these is content
+PREFORMATTED_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+# elements without a closing tag
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"))
+# whitespace next to these never renders, so the minifier drops it
+BLOCK_TAGS = frozenset((
+    "html", "head", "body", "title", "meta", "link", "script", "style", "article", "aside", "section",
+    "header", "footer", "main", "nav", "div", "p", "pre", "blockquote", "ul", "ol", "li", "h1", "h2",
+    "h3", "h4", "h5", "h6", "table", "thead", "tbody", "tr", "td", "th", "hr", "br", "figure", "figcaption",
+))
+# (tag, attribute, value) pairs that only restate the default
+REDUNDANT_ATTRIBUTES = frozenset((
+    ("script", "type", "text/javascript"),
+    ("style", "type", "text/css"),
+    ("link", "type", "text/css"),
+    ("form", "method", "get"),
+    ("input", "type", "text"),
+))
+WHITESPACE = re.compile(r"\s+")
+UNQUOTED_VALUE = re.compile(r"[^\s\"'=<>`]+")
+MARKUP_TOKEN = re.compile(r"(<!--.*?-->|<[^>]*>)", re.DOTALL)
+TAG_NAME = re.compile(r"</?([A-Za-z][A-Za-z0-9-]*)")
+ATTRIBUTE = re.compile(r"([^\s=/>]+)(?:\s*=\s*(\"[^\"]*\"|'[^']*'|[^\s>]+))?")
+
+
+def collapse_whitespace(text: str) -> str:
+    return WHITESPACE.sub(" ", text)
+
+
+def minify_attribute(tag: str, name: str, value: str) -> str | None:
+    # the attribute as it should be written, or None to leave it out
+    if (tag, name, value) in REDUNDANT_ATTRIBUTES:
+        return None
+    if UNQUOTED_VALUE.fullmatch(value):
+        return f"{name}={value}"
+    return f'{name}="{value}"'
+
+
+def minify_props(tag: str, props: dict | None) -> str:
+    if not props:
+        return ""
+    attributes = [minify_attribute(tag, key, str(value)) for key, value in props.items()]
+    attributes = [attribute for attribute in attributes if attribute is not None]
+    return " " + " ".join(attributes) if attributes else ""
+
+
+def minify_tag(tag_markup: str) -> str:
+    match = TAG_NAME.match(tag_markup)
+    if match is None or tag_markup.startswith("</"):
+        return tag_markup
+    name = match.group(1).lower()
+    inner = tag_markup[match.end():-1].strip()
+    self_closing = inner.endswith("/")
+    if self_closing:
+        inner = inner[:-1].rstrip()
+    attributes = []
+    for attribute in ATTRIBUTE.finditer(inner):
+        key, value = attribute.group(1), attribute.group(2)
+        if value is None:
+            attributes.append(key)
+            continue
+        if value[0] in "\"'":
+            value = value[1:-1]
+        minified = minify_attribute(name, key, value)
+        if minified is not None:
+            attributes.append(minified)
+    attributes_markup = " " + " ".join(attributes) if attributes else ""
+    # a void element needs no "/>", anything else keeps it
+    closing = "/" if self_closing and name not in VOID_TAGS else ""
+    return f"<{match.group(1)}{attributes_markup}{closing}>"
+
+
+def tag_name(token: str) -> str | None:
+    match = TAG_NAME.match(token)
+    return match.group(1).lower() if match else None
+
+
+def minify_markup(source: str) -> str:
+    # a small tokenizer for hand-written markup such as the page template:
+    # drops comments, collapses whitespace outside pre/code/script/style,
+    # drops whitespace next to block-level tags and minifies attributes
+    tokens = MARKUP_TOKEN.split(source)
+    out = []
+    preformatted = 0
+    for i, token in enumerate(tokens):
+        if i % 2 == 1:
+            if token.startswith("<!--"):
+                continue
+            name = tag_name(token)
+            if name in PREFORMATTED_TAGS:
+                preformatted += -1 if token.startswith("</") else 1
+            out.append(minify_tag(token) if name is not None else token)
+            continue
+        if preformatted > 0 or token == "":
+            out.append(token)
+            continue
+        text = collapse_whitespace(token)
+        previous_tag = tag_name(tokens[i - 1]) if i > 0 else None
+        next_tag = tag_name(tokens[i + 1]) if i + 1 < len(tokens) else None
+        if i == 0 or previous_tag in BLOCK_TAGS or tokens[i - 1].startswith("<!"):
+            text = text.lstrip()
+        if i == len(tokens) - 1 or next_tag in BLOCK_TAGS:
+            text = text.rstrip()
+        out.append(text)
+    return "".join(out)
@@ -1,8 +1,15 @@
+import sys
 from enum import Enum
+from html_minify import PREFORMATTED_TAGS, VOID_TAGS, collapse_whitespace, minify_props
 
 class HtmlNode:
+    # slotted to keep per-node overhead down: pages build one node per
+    # inline fragment. props stays None (a shared singleton) when absent
+    # and tag names are interned so every <p> shares one string
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag: str = None, value: str = None, children: list = None, props: dict = None):
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag else tag
         self.value = value
         self.children = children
         self.props = props
@@ -10,10 +17,37 @@ class HtmlNode:
     # override in children
     def to_html(self):
         raise NotImplementedError()
+
+    def iter_html(self, minify: bool = False):
+        # yields the same markup as to_html() in chunks, keeping one child
+        # iterator per open element, so memory follows tree depth rather
+        # than document size. minify collapses whitespace outside pre/code
+        # and shortens attributes.
+        stack = [(None, iter((self,)), False)]
+        while stack:
+            closing_tag, children, preformatted = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if closing_tag is not None:
+                    yield closing_tag
+            elif isinstance(child, ParentNode):
+                yield f"<{child.tag}{child.props_to_html(minify)}>"
+                stack.append((f"</{child.tag}>", iter(child.children), preformatted or child.tag in PREFORMATTED_TAGS))
+            elif minify:
+                yield child.to_minified_html(preformatted)
+            else:
+                yield str(child.to_html())
+
+    def write_html(self, fp, minify: bool = False):
+        for chunk in self.iter_html(minify):
+            fp.write(chunk)
     
-    def props_to_html(self):
+    def props_to_html(self, minify: bool = False):
         if not self.props:
             return ""
+        if minify:
+            return minify_props(self.tag, self.props)
         return " " + " ".join([f'{key}="{value}"' for key, value in self.props.items()])
     
     def __repr__(self) -> str:
@@ -27,6 +61,8 @@ class HtmlNode:
         
 
 class LeafNode(HtmlNode):
+    __slots__ = ()
+
     def __init__(self, tag: str | None, value: str, props: dict = None):
         super().__init__(tag, value, None, props)
         if self.value is None:
@@ -37,10 +73,32 @@ class LeafNode(HtmlNode):
             return self.value
         else:
             return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+    def to_minified_html(self, preformatted: bool = False):
+        value = self.value if preformatted or self.tag in PREFORMATTED_TAGS else collapse_whitespace(self.value)
+        if not self.tag:
+            return value
+        if self.tag in VOID_TAGS:
+            return f"<{self.tag}{self.props_to_html(True)}>"
+        return f"<{self.tag}{self.props_to_html(True)}>{value}</{self.tag}>"
+
+
+class RawNode(LeafNode):
+    # markup that is already serialized (e.g. a block cache hit) and is
+    # written out unchanged, minified or not
+    __slots__ = ()
+
+    def __init__(self, html: str):
+        super().__init__(None, html)
+
+    def to_minified_html(self, preformatted: bool = False):
+        return self.value
         
 
     
 class ParentNode(HtmlNode):
+    __slots__ = ()
+
     def __init__(self, tag: str | None, children: list, props: dict = None):
         super().__init__(tag=tag, children=children, props=props)
         if not self.children:
@@ -48,14 +106,18 @@ class ParentNode(HtmlNode):
         if not self.tag:
             raise ValueError("cannot instantiate parent node without tag")
         
-    def to_html(self, pretty=False):
+    def to_html(self, pretty=False, minify=False):
         if not self.tag:
             return self.value
         else:
             if pretty:
                 return f"<{self.tag}{self.props_to_html()}>" + "\n  " + "\n  ".join([str(child.to_html()) for child in self.children]) + "\n" +  f"</{self.tag}>"
+            elif minify:
+                return "".join(self.iter_html(True))
             else:
-                return f"<{self.tag}{self.props_to_html()}>" + "".join([str(child.to_html()) for child in self.children]) +  f"</{self.tag}>" 
+                # a recursive join beats driving the iter_html() generator
+                # for trees that are serialized whole anyway
+                return f"<{self.tag}{self.props_to_html()}>" + "".join([str(child.to_html()) for child in self.children]) +  f"</{self.tag}>"
 
 
 
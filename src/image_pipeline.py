@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from build_manifest import hash_file
+from file_utilities import files_match, place_file
+
+try:
+    from PIL import Image
+except ImportError:
+    # without Pillow images keep their size attributes but get no variants
+    Image = None
+
+# bump whenever the same source and options would give different variants
+IMAGE_PIPELINE_VERSION = 1
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+DEFAULT_WIDTHS = (480, 960, 1440)
+
+
+def image_size(path: str) -> tuple[int, int] | None:
+    # PNG and GIF sizes come straight from the header; anything else needs
+    # Pillow
+    with open(path, "rb") as f:
+        header = f.read(26)
+    if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", header[6:10])
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except OSError:
+        return None
+
+
+def variant_name(filename: str, width: int) -> str:
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}-{width}w{ext}"
+
+
+def process_image(job) -> tuple[str, str, dict]:
+    # returns (source path, cache entry dir, meta) with meta = {"width",
+    # "height", "variants": [[width, file in the entry dir], ...]}; the
+    # variants of a source hash + options pair are only ever encoded once
+    source_path, cache_dir, widths, quality = job
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{IMAGE_PIPELINE_VERSION}\0{widths}\0{quality}\0{Image is not None}\0".encode())
+    digest.update(hash_file(source_path).encode())
+    entry_dir = os.path.join(cache_dir, digest.hexdigest())
+    meta_path = os.path.join(entry_dir, "meta.json")
+    try:
+        with open(meta_path, "r") as f:
+            return source_path, entry_dir, json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    os.makedirs(entry_dir, exist_ok=True)
+    meta = {"width": None, "height": None, "variants": []}
+    try:
+        size = image_size(source_path)
+        if size is not None:
+            meta["width"], meta["height"] = size
+        if Image is not None and size is not None:
+            meta["variants"] = encode_variants(source_path, entry_dir, size, widths, quality)
+    except Exception as e:
+        # a corrupt or unsupported image keeps whatever size its header gave
+        # and gets no variants; nothing is cached, so the next build retries
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        meta["variants"] = []
+        meta["error"] = f"{type(e).__name__}: {e}"
+        return source_path, entry_dir, meta
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    return source_path, entry_dir, meta
+
+
+def encode_variants(source_path: str, entry_dir: str, size: tuple[int, int], widths, quality: int) -> list[list]:
+    variants = []
+    filename = os.path.basename(source_path)
+    with Image.open(source_path) as image:
+        for width in widths:
+            if width >= size[0]:
+                continue
+            height = max(1, round(size[1] * width / size[0]))
+            variant = image.resize((width, height), Image.LANCZOS)
+            name = variant_name(filename, width)
+            save_options = {"optimize": True}
+            if image.format in ("JPEG", "WEBP"):
+                save_options["quality"] = quality
+            variant_path = os.path.join(entry_dir, name)
+            variant.save(variant_path, image.format, **save_options)
+            if os.path.getsize(variant_path) >= os.path.getsize(source_path):
+                # a re-encode that is no smaller than the source is no help
+                os.remove(variant_path)
+                continue
+            variants.append([width, name])
+    return variants
+
+
+class ImageVariants:
+    # root-relative image url -> {"width", "height", "srcset": [[url,
+    # width], ...]}, shared with the renderer; the fingerprint goes into
+    # block cache keys so cached <img> tags follow the images
+    def __init__(self, images: dict[str, dict]):
+        self.images = images
+        self.fingerprint = hashlib.blake2b(json.dumps(images, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+    def get(self, url: str) -> dict | None:
+        return self.images.get(url)
+
+    def digests(self) -> dict[str, str]:
+        # url -> digest of what its <img> tags get, for incremental builds
+        return {url: hashlib.blake2b(json.dumps(image, sort_keys=True).encode(), digest_size=8).hexdigest() for url, image in self.images.items()}
+
+
+class ImagePipeline:
+    def __init__(self, dir_path_static: str, dest_dir_path: str, cache_dir: str, widths=DEFAULT_WIDTHS, quality: int = 80, workers: int = 1):
+        self.dir_path_static = dir_path_static
+        self.dest_dir_path = dest_dir_path
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        self.workers = workers
+        # variant output path -> cached file, filled by run()
+        self.outputs: dict[str, str] = {}
+        # (source path, error) of images that could not be processed
+        self.errors: list[tuple[str, str]] = []
+
+    def sources(self) -> list[str]:
+        sources = []
+        for dir_name, _, filenames in os.walk(self.dir_path_static):
+            for filename in sorted(filenames):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    sources.append(os.path.join(dir_name, filename))
+        return sorted(sources)
+
+    def run(self) -> ImageVariants:
+        # encodes whatever the cache is missing; place() copies the
+        # variants once the static files are in the output folder
+        jobs = [(source_path, self.cache_dir, self.widths, self.quality) for source_path in self.sources()]
+        if self.workers > 1 and len(jobs) > 1 and Image is not None:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(process_image, jobs))
+        else:
+            results = [process_image(job) for job in jobs]
+
+        images = {}
+        self.outputs = {}
+        self.errors = []
+        for source_path, entry_dir, meta in results:
+            if "error" in meta:
+                print(f"image pipeline: no variants for {source_path}: {meta['error']}", file=sys.stderr)
+                self.errors.append((source_path, meta["error"]))
+            rel_path = os.path.relpath(source_path, self.dir_path_static)
+            url = "/" + rel_path.replace(os.sep, "/")
+            url_dir = url.rsplit("/", 1)[0]
+            srcset = []
+            for width, name in meta["variants"]:
+                srcset.append([f"{url_dir}/{name}", width])
+                dest_path = os.path.normpath(os.path.join(self.dest_dir_path, os.path.dirname(rel_path), name))
+                self.outputs[dest_path] = os.path.join(entry_dir, name)
+            if meta["width"] is not None:
+                # the original is the widest candidate
+                srcset.append([url, meta["width"]])
+                images[url] = {"width": meta["width"], "height": meta["height"], "srcset": srcset if len(srcset) > 1 else []}
+        print(f"image pipeline: {len(images)} images, {len(self.outputs)} variants, {len(self.errors)} failed")
+        return ImageVariants(images)
+
+    def place(self, link_mode: str = "copy") -> int:
+        placed = 0
+        for dest_path, cached_path in self.outputs.items():
+            if files_match(cached_path, dest_path):
+                continue
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            place_file(cached_path, dest_path, link_mode)
+            placed += 1
+        return placed
@@ -0,0 +1,123 @@
+import json
+import os
+from collections import OrderedDict
+from textnode import TextNode, TextType
+
+# bump whenever tokenize_inline would produce different nodes for the same
+# text, so caches written by older builds are thrown away
+INLINE_CACHE_VERSION = 1
+
+
+class InlineCache:
+    # bounded LRU of raw inline text -> the TextNodes it tokenizes to. The
+    # cached nodes are shared between callers and must not be mutated.
+    def __init__(self, maxsize: int = 4096, path: str | None = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.entries: OrderedDict[str, tuple[TextNode, ...]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # in pool workers, texts added since the last drain_new() so they
+        # can be sent back to the parent process
+        self.track_new = False
+        self.new_texts: list[str] = []
+
+    def get(self, text: str) -> tuple[TextNode, ...] | None:
+        nodes = self.entries.get(text)
+        if nodes is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(text)
+        self.hits += 1
+        return nodes
+
+    def put(self, text: str, nodes: list[TextNode]):
+        self.entries[text] = tuple(nodes)
+        self.entries.move_to_end(text)
+        if self.track_new:
+            self.new_texts.append(text)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def drain_new(self) -> list:
+        new_entries = [encode_entry(text, self.entries[text]) for text in self.new_texts if text in self.entries]
+        self.new_texts = []
+        return new_entries
+
+    def merge(self, encoded_entries: list):
+        for entry in encoded_entries:
+            text, nodes = decode_entry(entry)
+            self.entries[text] = nodes
+            self.entries.move_to_end(text)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def worker_settings(self) -> tuple[str | None, int]:
+        # what a spawned pool worker needs to load the same cache
+        return self.path, self.maxsize
+
+    def start_worker(self):
+        self.hits = 0
+        self.misses = 0
+        self.track_new = True
+        self.new_texts = []
+
+    def take_worker_update(self) -> dict:
+        # what a pool worker learned since its last update
+        update = {"entries": self.drain_new(), "hits": self.hits, "misses": self.misses}
+        self.hits = 0
+        self.misses = 0
+        return update
+
+    def apply_worker_update(self, update: dict):
+        self.merge(update["entries"])
+        self.hits += update["hits"]
+        self.misses += update["misses"]
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "maxsize": self.maxsize}
+
+    def describe(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"inline cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), {len(self.entries)}/{self.maxsize} entries"
+
+    @classmethod
+    def load(cls, path: str, maxsize: int = 4096) -> "InlineCache":
+        cache = cls(maxsize, path)
+        if not os.path.isfile(path):
+            return cache
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"ignoring unreadable inline cache ({path})")
+            return cache
+        if data.get("version") != INLINE_CACHE_VERSION:
+            return cache
+        cache.merge(data.get("entries", []))
+        return cache
+
+    def save(self, path: str | None = None):
+        path = path or self.path
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {
+            "version": INLINE_CACHE_VERSION,
+            # least recently used first, so loading replays the LRU order
+            "entries": [encode_entry(text, nodes) for text, nodes in self.entries.items()],
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def encode_entry(text: str, nodes) -> list:
+    return [text, [[node.text, node.text_type.value, node.url] for node in nodes]]
+
+
+def decode_entry(entry: list) -> tuple[str, tuple[TextNode, ...]]:
+    text, nodes = entry
+    return text, tuple(TextNode(node_text, TextType(text_type), url) for node_text, text_type, url in nodes)
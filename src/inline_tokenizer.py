@@ -0,0 +1,50 @@
+import re
+from textnode import TextNode, TextType
+
+# (marker, pattern, text type) in the order the chained split_nodes_* passes
+# ran. Text claimed by an earlier rule is never scanned by a later one, which
+# is what keeps e.g. the text of a link or the body of a bold run literal.
+# The marker is a substring every match must contain, so a rule whose marker
+# is absent from a span is skipped without running its regex at all.
+INLINE_RULES = (
+    ("![", re.compile(r"!\[(.*?)\]\((.*?)\)"), TextType.IMAGE),
+    ("](", re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"), TextType.LINK),
+    ("**", re.compile(r"\*\*(.*?)\*\*"), TextType.BOLD),
+    ("_", re.compile(r"\_(.*?)\_"), TextType.ITALIC),
+    ("`", re.compile(r"\`(.*?)\`"), TextType.CODE),
+)
+
+
+def tokenize_inline(text: str) -> list[TextNode]:
+    # emits exactly the nodes the chained splitters produced, but works on
+    # (start, end) spans of the original string: no intermediate node lists,
+    # no substring copies until a node is emitted
+    if not text:
+        return [TextNode(text, TextType.TEXT)]
+    nodes: list[TextNode] = []
+    _scan(text, 0, len(text), 0, nodes)
+    return nodes
+
+
+def _scan(text: str, start: int, end: int, rule_index: int, nodes: list[TextNode]):
+    while rule_index < len(INLINE_RULES):
+        marker, pattern, text_type = INLINE_RULES[rule_index]
+        if text.find(marker, start, end) != -1:
+            break
+        rule_index += 1
+    else:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+        return
+
+    cur_loc = start
+    for match in pattern.finditer(text, start, end):
+        if match.start() > cur_loc:
+            _scan(text, cur_loc, match.start(), rule_index + 1, nodes)
+        if pattern.groups > 1:
+            nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        else:
+            nodes.append(TextNode(match.group(1), text_type, None))
+        cur_loc = match.end()
+
+    if cur_loc < end:
+        _scan(text, cur_loc, end, rule_index + 1, nodes)
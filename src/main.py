@@ -1,26 +1,312 @@
 import os
 import sys
-from textnode import TextNode, TextType
-from htmlnode import HtmlNode, LeafNode, ParentNode
-from file_utilities import copy_folder_structure
-from generate_content import generate_pages_recursive
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+manifest_path = "./.build_cache/manifest.json"
+inline_cache_path = "./.build_cache/inline_cache.json"
+block_cache_path = "./.build_cache/block_cache.json"
+ast_cache_path = "./.build_cache/ast"
+dependency_graph_path = "./.build_cache/dependencies.json"
+search_cache_path = "./.build_cache/search"
+image_cache_path = "./.build_cache/images"
+precompress_manifest_path = "./.build_cache/precompress.json"
+site_catalog_path = "./.build_cache/catalog.json"
+blog_section = "blog"
+daemon_socket_path = "./.build_cache/daemon.sock"
+validation_report_path = "./.build_cache/validation.json"
+
+def main(base_path: str = "/", incremental: bool = False, workers: int = 1, sync: bool = False, sync_hash: bool = False, link_mode: str = "copy", image_widths: tuple[int, ...] | None = None, precompress: tuple[str, ...] | None = None, pages: list[tuple[str, str]] | None = None) -> list[tuple[str, str]]:
+    # pages is the collect_site_pages() list shared by every stage, or None
+    # for a build whose render walks content/ itself; imported here rather
+    # than at the top so the CLI and the daemon client start without
+    # loading the renderer
+    from build_manifest import discard_manifest
+    from file_utilities import copy_folder_structure, sync_folder_structure
+    from generate_content import generate_pages, generate_pages_recursive, generate_pages_incremental, get_dependency_graph, get_low_memory, get_minify_html, get_output_writer, get_search_index, get_site_catalog, generate_pages_streaming
+    image_pipeline = None
+    if image_widths:
+        from image_pipeline import ImagePipeline
+        from utilities import set_image_variants
+        image_pipeline = ImagePipeline(dir_path_static, dir_path_public, image_cache_path, image_widths, workers=workers)
+        set_image_variants(image_pipeline.run())
+
+    precompressor = None
+    if precompress:
+        from precompress import Precompressor
+        precompressor = Precompressor(precompress_manifest_path, precompress, workers=workers)
+
+    if incremental or sync:
+        # only copy static files that changed, leaving generated pages, image
+        # variants, catalog and search outputs and compressed siblings alone
+        generated = {os.path.normpath(dest_path) for _, dest_path in pages}
+        generated.update(generated_outputs(image_pipeline))
+        preserve = generated.__contains__
+        if precompressor is not None:
+            preserve = lambda path: path in generated or precompressor.is_sibling(path)
+        sync_folder_structure(dir_path_static, dir_path_public, sync_hash, link_mode, preserve=preserve)
+    else:
+        # replace public folder with contents of static folder
+        copy_folder_structure(dir_path_static, dir_path_public)
+    if image_pipeline is not None:
+        image_pipeline.place(link_mode)
+    graph = get_dependency_graph()
+    if graph is not None:
+        graph.record_static_tree(dir_path_static, dir_path_public)
 
-def main(base_path: str = "/"):
-    # replace public folder with contents of static folder
-    copy_folder_structure(dir_path_static, dir_path_public)
-    
     print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, base_path)
+    if not incremental:
+        discard_manifest(manifest_path)
+    if incremental:
+        errors = generate_pages_incremental(dir_path_content, template_path, dir_path_public, base_path, manifest_path, workers, pages)
+    elif get_low_memory()[0]:
+        errors = generate_pages_streaming(dir_path_content, template_path, dir_path_public, base_path, workers, pages=pages)
+    elif pages is not None or workers > 1 or get_output_writer() is not None:
+        errors = generate_pages(dir_path_content, template_path, dir_path_public, base_path, workers, pages)
+    else:
+        generate_pages_recursive(dir_path_content, template_path, dir_path_public, base_path)
+        errors = []
+    search_index = get_search_index()
+    if search_index is not None:
+        search_index.finish(pages)
+    catalog = get_site_catalog()
+    if catalog is not None:
+        catalog.finish(pages, template_path, get_minify_html())
+        catalog.save()
+    if graph is not None:
+        # links to the sitemap, feed, search files or image variants are
+        # not broken
+        graph.record_generated(generated_outputs(image_pipeline))
+    if precompressor is not None:
+        # only what this build produced is looked at, not the whole of docs/
+        outputs = [dest_path for _, dest_path in pages] + static_outputs() + sorted(generated_outputs(image_pipeline))
+        precompressor.run(dir_path_public, outputs)
+    return errors
 
-if __name__ == "__main__":
-    system_args: list[str] = sys.argv
-    base_path: str = "/"
-    if len(system_args) > 1:
-        base_path = system_args[1]
+def needs_page_list(args) -> bool:
+    # whether any stage of this build works from the whole page list; a
+    # plain serial or low-memory render walks content/ lazily instead
+    renders_list = args.incremental or (not args.low_memory and (args.workers > 1 or args.write_threads > 0))
+    return bool(renders_list or args.sync or args.search or args.catalog or args.validate or args.precompress)
+
+def collect_site_pages() -> list[tuple[str, str]]:
+    # walked once per build: each page's front matter is read here for the
+    # draft check, not again by every stage that needs the list
+    from build_profiler import get_profiler
+    from generate_content import collect_pages
+    with get_profiler().stage("walk"):
+        return collect_pages(dir_path_content, dir_path_public)
+
+def static_outputs() -> list[str]:
+    # where the static copy or sync put each file of static/
+    outputs = []
+    for dir_name, _, filenames in os.walk(dir_path_static):
+        dest_dir = os.path.join(dir_path_public, os.path.relpath(dir_name, dir_path_static))
+        outputs.extend(os.path.join(dest_dir, filename) for filename in filenames)
+    return outputs
+
+def generated_outputs(image_pipeline=None) -> set[str]:
+    # files written by build stages other than page rendering and the
+    # static copy
+    from generate_content import get_search_index, get_site_catalog
+    outputs = set()
+    if image_pipeline is not None:
+        outputs.update(image_pipeline.outputs)
+    if get_site_catalog() is not None:
+        outputs.update(get_site_catalog().outputs)
+    if get_search_index() is not None:
+        outputs.update(get_search_index().outputs())
+    return outputs
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the static site from ./content into ./docs.")
+    parser.add_argument("base_path", nargs="?", default="/", help="path the site is served from (default: /)")
+    parser.add_argument("--incremental", action="store_true", help="only re-render pages whose source, template or base path changed since the last build")
+    parser.add_argument("--sync", action="store_true", help="copy only new or changed static files and remove orphans instead of wiping the output folder (implied by --incremental)")
+    parser.add_argument("--sync-hash", action="store_true", help="when syncing, compare file contents of same-size files whose mtimes differ")
+    parser.add_argument("--link", dest="link_mode", choices=["copy", "hardlink", "reflink"], default="copy", help="how synced static files are placed (default: copy)")
+    parser.add_argument("--inline-cache", type=int, default=0, metavar="SIZE", help="cache tokenized inline text in an LRU of SIZE entries, persisted between builds (default: off)")
+    parser.add_argument("--block-cache", type=float, default=0, metavar="MB", help="reuse rendered blocks from a cache of up to MB megabytes, persisted between builds (default: off)")
+    parser.add_argument("--ast-cache", type=float, default=0, metavar="MB", help="reuse parsed page trees from a memory-mapped on-disk cache of up to MB megabytes, keyed by the markdown's hash; takes the place of --block-cache (default: off)")
+    parser.add_argument("--write-threads", type=int, default=0, metavar="N", help="hand finished pages to N background writer threads that write atomically and skip unchanged files (default: off)")
+    parser.add_argument("--check-links", action="store_true", help="record what every page links to and fail the build on internal links or images nothing generates (always recorded with --incremental and --watch)")
+    parser.add_argument("--validate", nargs="?", const=validation_report_path, metavar="REPORT", help=f"after the build, check every internal link and image against the output tree and write a JSON report; fails the build on broken targets (default report: {validation_report_path})")
+    parser.add_argument("--search", action="store_true", help="write a sharded client-side search index to docs/search/")
+    parser.add_argument("--images", nargs="?", const="480,960,1440", metavar="WIDTHS", help="add width, height and srcset to images, with resized variants at these comma-separated widths when Pillow is installed (default: 480,960,1440)")
+    parser.add_argument("--precompress", nargs="?", const="gzip,br", metavar="FORMATS", help="write .gz/.br siblings of changed HTML, CSS and other text outputs (default: gzip,br; br needs the brotli package)")
+    parser.add_argument("--catalog", metavar="SITE_URL", help=f"write sitemap.xml, an Atom feed of {blog_section}/ and paginated {blog_section} index pages, with absolute urls on SITE_URL (e.g. https://example.github.io)")
+    parser.add_argument("--blog-page-size", type=int, default=10, metavar="N", help="posts per blog index page with --catalog (default: 10)")
+    parser.add_argument("--drafts", action="store_true", help="also render pages whose front matter has draft: true or published: false")
+    parser.add_argument("--minify", action="store_true", help="write minified HTML: collapsed whitespace outside pre/code, shorter attributes and a minified template")
+    parser.add_argument("--low-memory", action="store_true", help="stream every page block by block and walk content/ lazily, so memory does not grow with page or site size; prints peak RSS")
+    parser.add_argument("--memory-budget", type=float, default=0, metavar="MB", help="hard address space limit for each render process, in megabytes; a page that needs more fails with MemoryError (implies --low-memory)")
+    parser.add_argument("--profile", action="store_true", help="time each pipeline stage and page and print a summary after the build")
+    parser.add_argument("--profile-top", type=int, default=10, help="how many of the slowest pages the profile summary lists (default: 10)")
+    parser.add_argument("--trace", help="write the profile as Chrome trace / Perfetto JSON to this file (implies --profile)")
+    parser.add_argument("--watch", action="store_true", help="after building, poll content/, static/ and the template and rebuild what changes")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between --watch polls (default: 0.5)")
+    parser.add_argument("--daemon", action="store_true", help="serve builds over a Unix socket with the renderer, template and caches kept warm; see build_client.py")
+    parser.add_argument("--socket", default=daemon_socket_path, help=f"socket path for --daemon (default: {daemon_socket_path})")
+    parser.add_argument("--workers", type=int, default=1, help="render pages across this many processes (0 = one per CPU)")
+    return parser
 
-    print(main(base_path))
\ No newline at end of file
+def parse_args(argv: list[str] | None = None, defaults: dict | None = None):
+    # defaults replaces the parser's own, as raw option values (e.g. the
+    # options a daemon was started with)
+    parser = build_parser()
+    if defaults:
+        parser.set_defaults(**defaults)
+    args = parser.parse_args(argv)
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    if args.precompress is not None:
+        args.precompress = tuple(fmt.strip() for fmt in args.precompress.split(",") if fmt.strip())
+        unknown = [fmt for fmt in args.precompress if fmt not in ("gzip", "br")]
+        if unknown:
+            parser.error(f"unknown --precompress format: {', '.join(unknown)}")
+    if args.memory_budget > 0:
+        args.low_memory = True
+    if args.low_memory:
+        # these need a page's whole block list or node tree at once
+        conflicting = [option for option, value in (("--search", args.search), ("--catalog", args.catalog), ("--ast-cache", args.ast_cache), ("--write-threads", args.write_threads)) if value]
+        if conflicting:
+            parser.error(f"--low-memory cannot be combined with {', '.join(conflicting)}")
+    if args.blog_page_size < 1:
+        parser.error("--blog-page-size must be at least 1")
+    if args.images is not None:
+        args.images = tuple(int(width) for width in args.images.split(",") if width.strip())
+    return args
+
+def watch(base_path: str = "/", workers: int = 1, interval: float = 0.5, link_mode: str = "copy", precompress: tuple[str, ...] | None = None):
+    from watch import SiteWatcher
+    precompressor = None
+    if precompress:
+        from precompress import Precompressor
+        precompressor = Precompressor(precompress_manifest_path, precompress, workers=workers)
+    watcher = SiteWatcher(dir_path_content, dir_path_static, template_path, dir_path_public, base_path, workers, link_mode, precompressor)
+    watcher.run(interval)
+
+# caches loaded by earlier builds in this process, (path, size) -> cache;
+# a daemon keeps them warm instead of reading them from disk per build
+_loaded_caches: dict[tuple[str, float], object] = {}
+
+def load_cache(cache_class, path: str, size):
+    key = (path, size)
+    cache = _loaded_caches.get(key)
+    if cache is None:
+        cache = _loaded_caches[key] = cache_class.load(path, size)
+    return cache
+
+def run(argv: list[str] | None = None, defaults: dict | None = None) -> int:
+    # one build as the command line describes it; every build setting is
+    # reset here, so a long-lived process (the daemon) can call it again
+    args = parse_args(argv, defaults)
+    from build_profiler import disable_profiling, enable_profiling
+    from utilities import set_ast_cache, set_block_cache, set_image_variants, set_inline_cache
+    from generate_content import set_dependency_graph, set_include_drafts, set_low_memory, set_minify_html, set_output_writer, set_search_index, set_site_catalog
+
+    disable_profiling()
+    profiler = enable_profiling() if args.profile or args.trace else None
+    inline_cache = None
+    if args.inline_cache > 0:
+        from inline_cache import InlineCache
+        inline_cache = load_cache(InlineCache, inline_cache_path, args.inline_cache)
+    set_inline_cache(inline_cache)
+    block_cache = None
+    if args.block_cache > 0:
+        from block_cache import BlockCache
+        block_cache = load_cache(BlockCache, block_cache_path, int(args.block_cache * 1024 * 1024))
+    set_block_cache(block_cache)
+    ast_cache = None
+    if args.ast_cache > 0:
+        from ast_cache import AstCache
+        ast_cache = AstCache(ast_cache_path, int(args.ast_cache * 1024 * 1024))
+    set_ast_cache(ast_cache)
+    output_writer = None
+    if args.write_threads > 0:
+        from output_writer import OutputWriter
+        output_writer = OutputWriter(args.write_threads)
+    set_output_writer(output_writer)
+    graph = None
+    if args.incremental or args.watch or args.check_links or args.validate:
+        from dependency_graph import DependencyGraph
+        # an incremental build only re-renders some pages, the rest keep
+        # the edges recorded by earlier builds
+        graph = DependencyGraph.load(dependency_graph_path) if args.incremental else DependencyGraph(dependency_graph_path)
+    set_dependency_graph(graph)
+    search_index = None
+    if args.search:
+        from search_index import SearchIndex
+        search_index = SearchIndex(search_cache_path, dir_path_public, args.base_path)
+    set_search_index(search_index)
+    catalog = None
+    if args.catalog:
+        from site_catalog import SiteCatalog
+        catalog = SiteCatalog.load(site_catalog_path, dir_path_public, args.base_path, args.catalog, blog_section, args.blog_page_size)
+    set_site_catalog(catalog)
+    set_minify_html(args.minify)
+    set_include_drafts(args.drafts)
+    set_low_memory(args.low_memory, int(args.memory_budget * 1024 * 1024))
+    set_image_variants(None)
+
+    pages = collect_site_pages() if needs_page_list(args) else None
+    errors = main(args.base_path, incremental=args.incremental, workers=args.workers, sync=args.sync, sync_hash=args.sync_hash, link_mode=args.link_mode, image_widths=args.images, precompress=args.precompress, pages=pages)
+    for from_path, error in errors:
+        print(f"error rendering {from_path}: {error}", file=sys.stderr)
+    if inline_cache is not None:
+        print(inline_cache.describe())
+        inline_cache.save()
+    if block_cache is not None:
+        print(block_cache.describe())
+        block_cache.save()
+    if ast_cache is not None:
+        print(ast_cache.describe())
+        ast_cache.save()
+    if output_writer is not None:
+        print(output_writer.describe())
+    if graph is not None:
+        print(graph.describe())
+        graph.save()
+        # --validate checks the same references against the output tree
+        # itself, and reports them below
+        broken = graph.broken_links(dir_path_public) if not args.validate else []
+        for from_path, url in broken:
+            print(f"broken link in {from_path}: {url}", file=sys.stderr)
+        if args.check_links and broken:
+            errors.append(("links", f"{len(broken)} broken links"))
+    if args.validate:
+        from site_validator import validate_site
+        report = validate_site(pages, dir_path_public, args.base_path, graph, args.workers, args.validate)
+        for item in report["broken"]:
+            print(f"{item['reason']} {item['kind']} in {item['page']}: {item['url']} (served as {item['served']})", file=sys.stderr)
+        if report["broken"]:
+            errors.append(("validate", f"{len(report['broken'])} broken links or images"))
+    if args.low_memory:
+        from memory_budget import describe_peak_rss
+        print(describe_peak_rss())
+    if profiler is not None:
+        print(profiler.summary(args.profile_top))
+        if args.trace:
+            profiler.export_chrome_trace(args.trace)
+            print(f"trace written to {args.trace}")
+    if args.watch:
+        # keeps serving edits even after a failed build; the exit status is
+        # still the first build's
+        watch(args.base_path, args.workers, args.interval, args.link_mode, args.precompress)
+    if output_writer is not None:
+        # writes still queued (e.g. by --watch) can fail late too
+        late_errors = output_writer.close()
+        for path, error in late_errors:
+            print(f"error writing {path}: {error}", file=sys.stderr)
+        errors.extend(late_errors)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    if "--daemon" in sys.argv[1:]:
+        from build_daemon import serve
+        serve(sys.argv[1:])
+    else:
+        sys.exit(run())
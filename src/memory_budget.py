@@ -0,0 +1,47 @@
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+RSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+
+def apply_memory_limit(limit_bytes: int) -> tuple[int, int] | None:
+    # caps this process's address space, so a page that needs more fails
+    # with MemoryError instead of pushing the runner into swap; returns the
+    # previous limits for restore_memory_limit()
+    if not limit_bytes or resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit_bytes = min(limit_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, hard))
+    return soft, hard
+
+
+def restore_memory_limit(previous: tuple[int, int] | None):
+    # only the soft limit was lowered, so it can be raised back
+    if previous is not None:
+        resource.setrlimit(resource.RLIMIT_AS, previous)
+
+
+def peak_rss() -> tuple[int, int] | None:
+    # (this process, the largest finished child process) in bytes
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_SCALE
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * RSS_SCALE
+    return own, children
+
+
+def describe_peak_rss() -> str:
+    peak = peak_rss()
+    if peak is None:
+        return "peak RSS: not available on this platform"
+    own, children = peak
+    if children == 0:
+        return f"peak RSS: {own / (1024 * 1024):.1f} MB"
+    return f"peak RSS: {own / (1024 * 1024):.1f} MB main process, {children / (1024 * 1024):.1f} MB largest child process"
@@ -0,0 +1,128 @@
+import os
+import queue
+import stat
+import tempfile
+import threading
+
+# os.umask() can only be read by setting it, so it is read once, before any
+# writer thread starts
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def write_atomic(path: str, data: bytes) -> bool:
+    # writes through a temp file in the same directory and renames it over
+    # the destination, so readers never see a half-written page. Returns
+    # False, leaving the file and its mtime alone, when the bytes on disk
+    # already match.
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+
+    # mkstemp makes the file 0600: give it the mode the file it replaces
+    # had, or the one a plain open() would under the user's umask
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask
+    dir_path = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+class OutputWriter:
+    # write-behind stage: rendering submits (path, bytes) to a bounded
+    # queue that a pool of threads drains, so a slow filesystem stalls the
+    # renderer only once max_pending writes are queued
+    def __init__(self, threads: int = 4, max_pending: int = 64):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.created_dirs: set[str] = set()
+        self.lock = threading.Lock()
+        self.errors: list[tuple[str, str]] = []
+        self.written = 0
+        self.skipped = 0
+        self.workers = [threading.Thread(target=self.drain, daemon=True) for _ in range(threads)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, path: str, data: bytes):
+        self.queue.put((str(path), data))
+
+    def ensure_dir(self, dir_path: str):
+        # one makedirs per directory for the whole build
+        if dir_path == "" or dir_path in self.created_dirs:
+            return
+        os.makedirs(dir_path, exist_ok=True)
+        with self.lock:
+            self.created_dirs.add(dir_path)
+
+    def drain(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                path, data = item
+                try:
+                    self.ensure_dir(os.path.dirname(path))
+                    written = write_atomic(path, data)
+                except OSError as e:
+                    with self.lock:
+                        self.errors.append((path, f"{type(e).__name__}: {e}"))
+                    continue
+                with self.lock:
+                    if written:
+                        self.written += 1
+                    else:
+                        self.skipped += 1
+            finally:
+                self.queue.task_done()
+
+    def flush(self) -> list[tuple[str, str]]:
+        # waits for every submitted write and returns (and clears) the
+        # (path, error) pairs of those that failed
+        self.queue.join()
+        with self.lock:
+            errors, self.errors = self.errors, []
+        return errors
+
+    def close(self) -> list[tuple[str, str]]:
+        errors = self.flush()
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        return errors
+
+    def worker_settings(self) -> tuple[int, int]:
+        return self.threads, self.max_pending
+
+    def take_worker_update(self) -> dict:
+        with self.lock:
+            update = {"written": self.written, "skipped": self.skipped}
+            self.written = 0
+            self.skipped = 0
+        return update
+
+    def apply_worker_update(self, update: dict):
+        with self.lock:
+            self.written += update["written"]
+            self.skipped += update["skipped"]
+
+    def describe(self) -> str:
+        return f"output writer: {self.written} files written, {self.skipped} unchanged"
@@ -0,0 +1,70 @@
+import os
+import re
+from html_minify import collapse_whitespace, minify_markup
+
+SLOT_PATTERN = re.compile(r"\{\{ (Title|Content) \}\}")
+
+# (template_path, basepath, minify) -> (mtime_ns, size, compiled template)
+_template_cache: dict[tuple[str, str, bool], tuple[int, int, "CompiledTemplate"]] = {}
+
+
+class CompiledTemplate:
+    # the template split around its {{ Title }} / {{ Content }} slots, with
+    # the base path already applied to its own href/src attributes; with
+    # minify the surroundings are minified once here, not per page
+    def __init__(self, source: str, basepath: str = "/", minify: bool = False):
+        self.minify = minify
+        source = rewrite_template_links(source, basepath)
+        if minify:
+            source = minify_markup(source)
+        self.segments: list[str] = []
+        self.slots: list[str] = []
+        cur_loc = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.segments.append(source[cur_loc:match.start()])
+            self.slots.append(match.group(1))
+            cur_loc = match.end()
+        self.segments.append(source[cur_loc:])
+
+    def render(self, title: str, content: str) -> str:
+        if self.minify:
+            title = collapse_whitespace(title)
+        values = {"Title": title, "Content": content}
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+    def write(self, fp, title: str, content):
+        # streams the page; content is an HtmlNode tree serialized chunk by chunk
+        if self.minify:
+            title = collapse_whitespace(title)
+        fp.write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            if slot == "Content":
+                content.write_html(fp, self.minify)
+            else:
+                fp.write(title)
+            fp.write(segment)
+
+
+def rewrite_template_links(source: str, basepath: str) -> str:
+    if basepath == "/":
+        return source
+    source = source.replace('href="/', 'href="' + basepath)
+    return source.replace('src="/', 'src="' + basepath)
+
+
+def load_template(template_path: str, basepath: str = "/", minify: bool = False) -> CompiledTemplate:
+    # recompiles only when the file's mtime or size changes
+    stat = os.stat(template_path)
+    key = (os.path.abspath(template_path), basepath, minify)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(template_path, "r") as f:
+        template = CompiledTemplate(f.read(), basepath, minify)
+    _template_cache[key] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
@@ -0,0 +1,148 @@
+import gzip
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from build_manifest import hash_file
+from output_writer import write_atomic
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PRECOMPRESS_VERSION = 1
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map")
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def compress(data: bytes, fmt: str) -> bytes:
+    if fmt == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps the .gz bytes stable, so unchanged pages give unchanged
+    # siblings
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_file(job) -> tuple[str, dict]:
+    # returns (path, manifest entry); only writes siblings when the file's
+    # bytes differ from what they were last compressed from
+    path, entry, formats, min_size, max_ratio = job
+    stat = os.stat(path)
+    file_hash = hash_file(path)
+    previous = entry or {}
+    siblings_present = all(os.path.isfile(path + SUFFIXES[fmt]) for fmt in previous.get("produced", []))
+    if previous.get("hash") == file_hash and previous.get("formats") == list(formats) and siblings_present:
+        return path, dict(previous, stat=[stat.st_mtime_ns, stat.st_size], compressed=False)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    produced = []
+    for fmt in formats:
+        sibling = path + SUFFIXES[fmt]
+        compressed = compress(data, fmt) if len(data) >= min_size else None
+        if compressed is None or len(compressed) > len(data) * max_ratio:
+            # too small or too poorly compressed to be worth a sibling
+            if os.path.isfile(sibling):
+                os.remove(sibling)
+            continue
+        write_atomic(sibling, compressed)
+        produced.append(fmt)
+    return path, {"stat": [stat.st_mtime_ns, stat.st_size], "hash": file_hash, "formats": list(formats), "produced": produced, "compressed": True}
+
+
+class Precompressor:
+    # writes .gz / .br siblings next to text outputs. A manifest of (mtime,
+    # size, hash) per file means unchanged files are not even read, and
+    # touched-but-identical files are hashed but not recompressed.
+    def __init__(self, manifest_path: str, formats=("gzip", "br"), min_size: int = 1024, max_ratio: float = 0.9, workers: int = 1):
+        if "br" in formats and brotli is None:
+            print("brotli is not installed, writing gzip siblings only")
+            formats = tuple(fmt for fmt in formats if fmt != "br")
+        self.manifest_path = manifest_path
+        self.formats = tuple(formats)
+        self.min_size = min_size
+        self.max_ratio = max_ratio
+        self.workers = workers
+        self.files: dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"ignoring unreadable precompress manifest ({self.manifest_path})")
+            return
+        if data.get("version") == PRECOMPRESS_VERSION:
+            self.files = data.get("files", {})
+
+    def save(self):
+        dir_path = os.path.dirname(self.manifest_path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": PRECOMPRESS_VERSION, "files": self.files}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_sibling(self, path: str) -> bool:
+        # whether path is a .gz/.br this stage wrote for a file still in
+        # the manifest; syncs must leave those alone
+        for fmt, suffix in SUFFIXES.items():
+            if path.endswith(suffix):
+                entry = self.files.get(path[:-len(suffix)])
+                return entry is not None and fmt in entry["produced"]
+        return False
+
+    def run(self, dest_dir_path: str, outputs) -> dict[str, int]:
+        # a whole build: outputs is every file it produced under
+        # dest_dir_path, so a manifest entry there that is not among them
+        # was removed. The tree itself is never walked.
+        outputs = {os.path.normpath(path) for path in outputs}
+        root = os.path.normpath(dest_dir_path) + os.sep
+        return self.update(outputs, [path for path in self.files if path.startswith(root) and path not in outputs])
+
+    def update(self, paths, removed=()) -> dict[str, int]:
+        # compresses the text files among paths whose size or mtime moved
+        # since they were last compressed, and drops the siblings of removed
+        # files; anything else in the output tree is left alone
+        counts = {"compressed": 0, "unchanged": 0, "removed": 0}
+        removed = {os.path.normpath(path) for path in removed}
+        jobs = []
+        for path in sorted({os.path.normpath(path) for path in paths}):
+            if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                removed.add(path)
+                continue
+            entry = self.files.get(path)
+            if entry is not None and entry["stat"] == [stat.st_mtime_ns, stat.st_size] and entry["formats"] == list(self.formats) and all(os.path.isfile(path + SUFFIXES[fmt]) for fmt in entry["produced"]):
+                counts["unchanged"] += 1
+                continue
+            jobs.append((path, entry, self.formats, self.min_size, self.max_ratio))
+
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(compress_file, jobs, chunksize=max(1, len(jobs) // (self.workers * 4))))
+        else:
+            results = [compress_file(job) for job in jobs]
+        for path, entry in results:
+            counts["compressed" if entry.pop("compressed") else "unchanged"] += 1
+            self.files[path] = entry
+
+        for path in sorted(removed):
+            if path not in self.files:
+                continue
+            # the file is gone, so are its siblings
+            for fmt in self.files.pop(path)["produced"]:
+                sibling = path + SUFFIXES[fmt]
+                if os.path.isfile(sibling):
+                    os.remove(sibling)
+            counts["removed"] += 1
+        self.save()
+        print(f"precompressed {'/'.join(self.formats)}: {counts['compressed']} compressed, {counts['unchanged']} unchanged, {counts['removed']} removed")
+        return counts
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from block_scanner import iter_markdown_blocks
+from front_matter import split_front_matter
+from textnode import BlockType
+from utilities import text_to_textnodes
+
+SEARCH_INDEX_VERSION = 1
+SNIPPET_LENGTH = 160
+SNIPPET_MIN_LENGTH = 40
+TERM_PATTERN = re.compile(r"\w+")
+SHARD_NAME = re.compile(r"terms-(.+)\.json")
+LINE_MARKERS = {
+    BlockType.HEADING: re.compile(r"^#{1,6} "),
+    BlockType.QUOTE: re.compile(r"^> ?"),
+    BlockType.ULIST: re.compile(r"^- "),
+    BlockType.OLIST: re.compile(r"^\d+\. "),
+}
+
+
+def block_text(block_type: BlockType, block: str) -> str:
+    # the words a reader sees in a block, without markdown syntax
+    if block_type == BlockType.CODE:
+        return "\n".join(block.split("\n")[1:-1])
+    marker = LINE_MARKERS.get(block_type)
+    if marker is not None:
+        block = "\n".join(marker.sub("", line) for line in block.split("\n"))
+    return "".join(node.text for node in text_to_textnodes(block))
+
+
+def shard_key(term: str) -> str:
+    # the browser fetches the one shard holding the first letter of a term
+    first = term[0]
+    return first if first.isascii() and first.isalnum() else "_"
+
+
+def make_snippet(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= SNIPPET_LENGTH:
+        return text
+    cut = text.rfind(" ", 0, SNIPPET_LENGTH)
+    return text[:cut if cut > 0 else SNIPPET_LENGTH] + "…"
+
+
+def page_summary(typed_blocks) -> str:
+    # the first paragraph or quote long enough to describe the page; short
+    # lines such as a "< Back Home" link are only used if nothing else is
+    fallback = None
+    for block_type, block in typed_blocks:
+        if block_type not in (BlockType.PARAGRAPH, BlockType.QUOTE):
+            continue
+        text = block_text(block_type, block).strip()
+        if len(text) >= SNIPPET_MIN_LENGTH:
+            return make_snippet(text)
+        if fallback is None and text:
+            fallback = make_snippet(text)
+    return fallback or ""
+
+
+def page_document(typed_blocks, title: str) -> dict:
+    # term -> word positions for one page, plus the snippet shown in results
+    typed_blocks = list(typed_blocks)
+    terms: dict[str, list[int]] = {}
+    position = 0
+    for block_type, block in typed_blocks:
+        text = block_text(block_type, block)
+        for match in TERM_PATTERN.finditer(text.lower()):
+            terms.setdefault(match.group(), []).append(position)
+            position += 1
+    return {"title": title, "snippet": page_summary(typed_blocks), "terms": terms}
+
+
+def source_state(path: str) -> list[int]:
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def encode_postings(postings: list[tuple[int, list[int]]]) -> list[int]:
+    # [page id delta, position count, first position, position deltas...]
+    # for every page, in page id order
+    encoded = []
+    last_page = 0
+    for page_id, positions in postings:
+        encoded.append(page_id - last_page)
+        encoded.append(len(positions))
+        last_position = 0
+        for position in positions:
+            encoded.append(position - last_position)
+            last_position = position
+        last_page = page_id
+    return encoded
+
+
+def decode_postings(encoded: list[int]) -> list[tuple[int, list[int]]]:
+    postings = []
+    page_id = 0
+    i = 0
+    while i < len(encoded):
+        page_id += encoded[i]
+        count = encoded[i + 1]
+        positions = []
+        position = 0
+        for delta in encoded[i + 2:i + 2 + count]:
+            position += delta
+            positions.append(position)
+        postings.append((page_id, positions))
+        i += 2 + count
+    return postings
+
+
+class SearchIndex:
+    # each rendered page drops its term positions into a document under
+    # cache_dir; finish() streams those documents into per-shard spool
+    # files and merges one shard at a time, so memory is bounded by one
+    # page and one shard rather than the whole corpus
+    def __init__(self, cache_dir: str, dest_dir_path: str, basepath: str = "/"):
+        self.cache_dir = cache_dir
+        self.dest_dir_path = dest_dir_path
+        self.basepath = basepath
+        self.documents_dir = os.path.join(cache_dir, "pages")
+
+    def document_path(self, from_path: str) -> str:
+        name = hashlib.blake2b(os.path.normpath(from_path).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.documents_dir, name + ".json")
+
+    def page_url(self, dest_path: str) -> str:
+        rel_path = os.path.relpath(dest_path, self.dest_dir_path).replace(os.sep, "/")
+        return self.basepath + rel_path
+
+    def index_page(self, from_path: str, dest_path: str, title: str, typed_blocks):
+        document = page_document(typed_blocks, title)
+        document["url"] = self.page_url(dest_path)
+        document["source"] = source_state(from_path)
+        os.makedirs(self.documents_dir, exist_ok=True)
+        path = self.document_path(from_path)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(document, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def read_document(self, from_path: str, dest_path: str) -> dict | None:
+        # pages skipped by an incremental build keep their last document;
+        # one indexed for the first time is read from its markdown
+        path = self.document_path(from_path)
+        try:
+            with open(path, "r") as f:
+                document = json.load(f)
+            # a page edited while search was off has an outdated document
+            if document.get("url") == self.page_url(dest_path) and document.get("source") == source_state(from_path):
+                return document
+        except (OSError, ValueError):
+            pass
+        from generate_content import page_title
+        try:
+            with open(from_path, "r") as f:
+                meta, markdown = split_front_matter(f.read())
+            self.index_page(from_path, dest_path, page_title(meta, markdown), iter_markdown_blocks(markdown))
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def output_dir(self) -> str:
+        return os.path.join(self.dest_dir_path, "search")
+
+    def outputs(self) -> list[str]:
+        # files finish() left in the output directory, which a static sync
+        # must keep
+        out_dir = self.output_dir()
+        if not os.path.isdir(out_dir):
+            return []
+        return [os.path.normpath(os.path.join(out_dir, name)) for name in os.listdir(out_dir)]
+
+    def worker_settings(self) -> tuple[str, str, str]:
+        return self.cache_dir, self.dest_dir_path, self.basepath
+
+    def finish(self, pages: list[tuple[str, str]], out_dir: str | None = None) -> dict:
+        # writes pages.json, one terms-<key>.json per shard and manifest.json
+        # into out_dir (default <output>/search) and returns the manifest
+        out_dir = out_dir or self.output_dir()
+        spool_dir = os.path.join(self.cache_dir, "spool")
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        os.makedirs(spool_dir)
+        os.makedirs(out_dir, exist_ok=True)
+
+        spools = {}
+        kept_documents = set()
+        page_count = 0
+        try:
+            with open(os.path.join(out_dir, "pages.json.tmp"), "w", encoding="utf-8") as pages_file:
+                pages_file.write("[")
+                for from_path, dest_path in pages:
+                    document = self.read_document(from_path, dest_path)
+                    if document is None:
+                        continue
+                    kept_documents.add(os.path.basename(self.document_path(from_path)))
+                    if page_count:
+                        pages_file.write(",")
+                    json.dump([document["url"], document["title"], document["snippet"]], pages_file, separators=(",", ":"), ensure_ascii=False)
+                    for term, positions in document["terms"].items():
+                        key = shard_key(term)
+                        spool = spools.get(key)
+                        if spool is None:
+                            spool = spools[key] = open(os.path.join(spool_dir, key + ".jsonl"), "w", encoding="utf-8")
+                        spool.write(json.dumps([term, page_count, positions], ensure_ascii=False))
+                        spool.write("\n")
+                    page_count += 1
+                pages_file.write("]")
+        finally:
+            for spool in spools.values():
+                spool.close()
+        os.replace(os.path.join(out_dir, "pages.json.tmp"), os.path.join(out_dir, "pages.json"))
+
+        shards = {}
+        for key in sorted(spools):
+            shards[key] = self.merge_shard(os.path.join(spool_dir, key + ".jsonl"), os.path.join(out_dir, f"terms-{key}.json"))
+        for name in os.listdir(out_dir):
+            # shards of letters no page uses any more; their .gz/.br
+            # siblings belong to the precompress stage
+            match = SHARD_NAME.fullmatch(name)
+            if match is not None and match.group(1) not in shards:
+                os.remove(os.path.join(out_dir, name))
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        for name in os.listdir(self.documents_dir) if os.path.isdir(self.documents_dir) else []:
+            if name not in kept_documents:
+                os.remove(os.path.join(self.documents_dir, name))
+
+        manifest = {
+            "version": SEARCH_INDEX_VERSION,
+            "pages": page_count,
+            "shards": shards,
+            "postings": "page id delta, position count, first position, position deltas",
+        }
+        with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        print(f"search index: {page_count} pages, {sum(shards.values())} terms in {len(shards)} shards")
+        return manifest
+
+    def merge_shard(self, spool_path: str, out_path: str) -> int:
+        # spool lines arrive in page id order, so each term's postings are
+        # already sorted
+        postings: dict[str, list] = {}
+        with open(spool_path, "r", encoding="utf-8") as f:
+            for line in f:
+                term, page_id, positions = json.loads(line)
+                postings.setdefault(term, []).append((page_id, positions))
+        terms = {term: encode_postings(postings[term]) for term in sorted(postings)}
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(terms, f, separators=(",", ":"), ensure_ascii=False)
+        return len(terms)
@@ -0,0 +1,282 @@
+import hashlib
+import html
+import json
+import os
+import time
+from datetime import datetime, timezone
+from block_scanner import iter_markdown_blocks
+from build_manifest import hash_file
+from front_matter import read_page_header, split_front_matter
+from htmlnode import LeafNode, ParentNode
+from output_writer import write_atomic
+from page_template import load_template
+from search_index import page_summary, source_state
+
+SITE_CATALOG_VERSION = 1
+FEED_ENTRIES = 20
+
+
+def iso_date(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def entry_date(value, mtime_ns: int) -> str:
+    # a front matter date as RFC 3339 in UTC, with a bare date taken as
+    # midnight and a time without an offset as UTC, or else the source's
+    # modification time; raises ValueError for anything else
+    if value is None:
+        return iso_date(mtime_ns / 1e9)
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def output_digest(*parts) -> str:
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def sitemap_xml(urls: list[tuple[str, str | None]]) -> str:
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for url, date in urls:
+        lastmod = f"<lastmod>{date}</lastmod>" if date else ""
+        lines.append(f"<url><loc>{html.escape(url)}</loc>{lastmod}</url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def atom_feed(title: str, feed_url: str, site_url: str, entries: list[dict]) -> str:
+    # entries carry absolute urls; the feed is as recent as its newest entry
+    updated = max((entry["date"] for entry in entries), default=iso_date(0))
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{html.escape(title)}</title>",
+        f"<id>{html.escape(feed_url)}</id>",
+        f'<link rel="self" href="{html.escape(feed_url)}"/>',
+        f'<link href="{html.escape(site_url)}"/>',
+        f"<updated>{updated}</updated>",
+        f"<author><name>{html.escape(title)}</name></author>",
+    ]
+    for entry in entries:
+        lines.append("<entry>")
+        lines.append(f"<title>{html.escape(entry['title'])}</title>")
+        lines.append(f"<id>{html.escape(entry['url'])}</id>")
+        lines.append(f'<link href="{html.escape(entry["url"])}"/>')
+        lines.append(f"<updated>{entry['date']}</updated>")
+        if entry["summary"]:
+            lines.append(f"<summary>{html.escape(entry['summary'])}</summary>")
+        lines.append("</entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def index_page_node(title: str, posts: list[dict], newer_url: str | None, older_url: str | None) -> ParentNode:
+    items = []
+    for post in posts:
+        children = [ParentNode("h2", [LeafNode("a", post["title"], {"href": post["url"]})])]
+        if post["summary"]:
+            children.append(LeafNode("p", post["summary"]))
+        items.append(ParentNode("li", children))
+    children = [LeafNode("h1", title)]
+    if items:
+        children.append(ParentNode("ul", items))
+    links = []
+    if newer_url is not None:
+        links.append(LeafNode("a", "Newer posts", {"href": newer_url}))
+    if older_url is not None:
+        links.append(LeafNode("a", "Older posts", {"href": older_url}))
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children)
+
+
+class SiteCatalog:
+    # title, url, date and summary of every page, recorded while pages
+    # render. The sitemap, the Atom feed and the paginated blog index are
+    # written from it in one pass after the build, each only when the
+    # entries it is made from changed.
+    def __init__(self, path: str | None = None, dest_dir_path: str = "./docs", basepath: str = "/", site_url: str = "", section: str = "blog", page_size: int = 10):
+        self.path = path
+        self.dest_dir_path = dest_dir_path
+        self.basepath = basepath
+        self.site_url = site_url.rstrip("/")
+        self.section = section
+        self.page_size = page_size
+        # page source -> entry
+        self.entries: dict[str, dict] = {}
+        # output path -> digest of what it was last written from
+        self.outputs: dict[str, str] = {}
+        self.track_new = False
+        self.new_pages: list[str] = []
+
+    def page_url(self, dest_path: str) -> str:
+        rel_path = os.path.relpath(dest_path, self.dest_dir_path).replace(os.sep, "/")
+        if rel_path == "index.html":
+            return self.basepath
+        if rel_path.endswith("/index.html"):
+            rel_path = rel_path[:-len("index.html")]
+        return self.basepath + rel_path
+
+    def record_page(self, from_path: str, dest_path: str, title: str, typed_blocks, meta: dict | None = None):
+        meta = meta or {}
+        from_path = os.path.normpath(from_path)
+        state = source_state(from_path)
+        try:
+            date = entry_date(meta.get("date"), state[0])
+        except ValueError:
+            print(f"site catalog: unreadable date {meta['date']!r} in {from_path}, using its modification time")
+            date = entry_date(None, state[0])
+        self.entries[from_path] = {
+            "url": self.page_url(dest_path),
+            "dest": os.path.normpath(dest_path),
+            "title": title,
+            "date": date,
+            "summary": str(meta["summary"]) if meta.get("summary") else page_summary(typed_blocks),
+            "source": state,
+        }
+        if self.track_new:
+            self.new_pages.append(from_path)
+
+    def read_entry(self, from_path: str, dest_path: str) -> dict | None:
+        # pages skipped by an incremental build keep their entry; one the
+        # catalog has not seen, or that changed while it was off, is read
+        # from its front matter alone when that has a title and summary,
+        # otherwise from its markdown
+        key = os.path.normpath(from_path)
+        entry = self.entries.get(key)
+        try:
+            if entry is not None and entry["dest"] == os.path.normpath(dest_path) and entry["url"] == self.page_url(dest_path) and entry["source"] == source_state(from_path):
+                return entry
+            header = read_page_header(from_path)
+            if "title" in header and header.get("summary"):
+                self.record_page(from_path, dest_path, str(header["title"]), (), header)
+                return self.entries[key]
+            from generate_content import page_title
+            with open(from_path, "r") as f:
+                meta, markdown = split_front_matter(f.read())
+            self.record_page(from_path, dest_path, page_title(meta, markdown), iter_markdown_blocks(markdown), meta)
+        except (OSError, ValueError):
+            self.entries.pop(key, None)
+            return None
+        return self.entries[key]
+
+    def index_pages(self, post_count: int, taken: set[str]) -> list[tuple[str, str]]:
+        # (output path, url) of every blog index page. The first page is the
+        # section's index.html unless a markdown page already produces it.
+        section_dir = os.path.normpath(os.path.join(self.dest_dir_path, self.section))
+        count = max(1, -(-post_count // self.page_size))
+        pages = []
+        for number in range(1, count + 1):
+            dest_path = os.path.join(section_dir, "index.html")
+            if number > 1 or dest_path in taken:
+                dest_path = os.path.join(section_dir, "page", str(number), "index.html")
+            pages.append((dest_path, self.page_url(dest_path)))
+        return pages
+
+    def finish(self, pages: list[tuple[str, str]], template_path: str, minify: bool = False) -> dict[str, int]:
+        entries = []
+        for from_path, dest_path in pages:
+            entry = self.read_entry(from_path, dest_path)
+            if entry is not None:
+                entries.append(entry)
+        current = {os.path.normpath(from_path) for from_path, _ in pages}
+        for from_path in [from_path for from_path in self.entries if from_path not in current]:
+            del self.entries[from_path]
+
+        section_dir = os.path.normpath(os.path.join(self.dest_dir_path, self.section))
+        taken = {entry["dest"] for entry in entries}
+        posts = sorted(
+            (entry for entry in entries if entry["dest"].startswith(section_dir + os.sep) and entry["dest"] != os.path.join(section_dir, "index.html")),
+            key=lambda entry: (entry["date"], entry["url"]),
+            reverse=True,
+        )
+        index_pages = self.index_pages(len(posts), taken)
+        template_hash = hash_file(template_path)
+        home = next((entry for entry in entries if entry["url"] == self.basepath), None)
+        site_title = home["title"] if home is not None else self.site_url
+
+        # output path -> (digest, renders the output's text)
+        outputs = {}
+        sitemap_urls = sorted([(self.site_url + entry["url"], entry["date"][:10]) for entry in entries])
+        for number, (dest_path, url) in enumerate(index_pages):
+            page_posts = posts[number * self.page_size:(number + 1) * self.page_size]
+            sitemap_urls.append((self.site_url + url, page_posts[0]["date"][:10] if page_posts else None))
+            newer_url = index_pages[number - 1][1] if number > 0 else None
+            older_url = index_pages[number + 1][1] if number + 1 < len(index_pages) else None
+            title = self.section.capitalize() if number == 0 else f"{self.section.capitalize()} (page {number + 1})"
+            summaries = [[post["url"], post["title"], post["summary"]] for post in page_posts]
+            outputs[dest_path] = (
+                output_digest(template_hash, minify, title, summaries, newer_url, older_url),
+                lambda title=title, page_posts=page_posts, newer_url=newer_url, older_url=older_url: load_template(template_path, self.basepath, minify).render(title, index_page_node(title, page_posts, newer_url, older_url).to_html(minify=minify)),
+            )
+        sitemap_path = os.path.normpath(os.path.join(self.dest_dir_path, "sitemap.xml"))
+        outputs[sitemap_path] = (output_digest(sitemap_urls), lambda: sitemap_xml(sitemap_urls))
+        feed_path = os.path.join(section_dir, "feed.xml")
+        feed_url = self.site_url + self.page_url(feed_path)
+        feed_entries = [dict(post, url=self.site_url + post["url"]) for post in posts[:FEED_ENTRIES]]
+        feed = [[entry["url"], entry["title"], entry["date"], entry["summary"]] for entry in feed_entries]
+        outputs[feed_path] = (output_digest(site_title, feed_url, feed), lambda: atom_feed(site_title, feed_url, self.site_url + self.basepath, feed_entries))
+
+        counts = {"written": 0, "unchanged": 0, "removed": 0}
+        for path, (digest, render) in outputs.items():
+            if self.outputs.get(path) == digest and os.path.isfile(path):
+                counts["unchanged"] += 1
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, render().encode())
+            counts["written"] += 1
+        for path in [path for path in self.outputs if path not in outputs]:
+            if os.path.isfile(path) and path not in taken:
+                os.remove(path)
+            counts["removed"] += 1
+        self.outputs = {path: digest for path, (digest, _) in outputs.items()}
+        print(f"site catalog: {len(entries)} pages, {len(posts)} posts; {counts['written']} outputs written, {counts['unchanged']} unchanged, {counts['removed']} removed")
+        return counts
+
+    def worker_settings(self) -> tuple:
+        return None, self.dest_dir_path, self.basepath, self.site_url, self.section, self.page_size
+
+    def start_worker(self):
+        self.entries = {}
+        self.track_new = True
+        self.new_pages = []
+
+    def take_worker_update(self) -> dict:
+        update = {"entries": {from_path: self.entries[from_path] for from_path in self.new_pages if from_path in self.entries}}
+        self.new_pages = []
+        return update
+
+    def apply_worker_update(self, update: dict):
+        self.entries.update(update["entries"])
+
+    def describe(self) -> str:
+        return f"site catalog: {len(self.entries)} pages, {len(self.outputs)} outputs"
+
+    @classmethod
+    def load(cls, path: str, *args, **kwargs) -> "SiteCatalog":
+        catalog = cls(path, *args, **kwargs)
+        if not os.path.isfile(path):
+            return catalog
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"ignoring unreadable site catalog ({path})")
+            return catalog
+        if data.get("version") != SITE_CATALOG_VERSION:
+            return catalog
+        catalog.entries = data.get("entries", {})
+        catalog.outputs = data.get("outputs", {})
+        return catalog
+
+    def save(self, path: str | None = None):
+        path = path or self.path
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {"version": SITE_CATALOG_VERSION, "entries": self.entries, "outputs": self.outputs}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
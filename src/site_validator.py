@@ -0,0 +1,118 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+from dependency_graph import url_targets
+
+VALIDATION_REPORT_VERSION = 1
+
+# output paths of the site being validated, shared with pool workers
+_path_index: frozenset[str] = frozenset()
+
+
+def output_path_index(dest_dir_path: str) -> frozenset[str]:
+    # every file under the output root as a url path without the leading
+    # "/"; walked with an explicit stack of os.scandir iterators
+    paths = []
+    stack = [("", dest_dir_path)]
+    while stack:
+        prefix, dir_path = stack.pop()
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((prefix + entry.name + "/", entry.path))
+                else:
+                    paths.append(prefix + entry.name)
+    return frozenset(paths)
+
+
+def served_url(url: str, basepath: str) -> str:
+    # the url as generate_page writes it: root-relative targets get the
+    # base path prepended, relative ones are left alone
+    if url.startswith("/") and basepath != "/":
+        return basepath + url[1:]
+    return url
+
+
+def check_url(url: str, basepath: str, page_url: str, path_index) -> tuple[str, str | None] | None:
+    # (url as served, why it is broken or None); None for external urls
+    # and in-page anchors
+    served = served_url(url, basepath)
+    parts = urlsplit(served)
+    if parts.scheme or parts.netloc or parts.path == "":
+        return None
+    path = parts.path
+    if path.startswith("/"):
+        if not path.startswith(basepath) and path + "/" != basepath:
+            return served, "outside base path"
+        path = "/" + path[len(basepath):]
+    targets = url_targets(path, page_url)
+    if not any(target in path_index for target in targets):
+        return served, "missing"
+    return served, None
+
+
+def init_validate_worker(path_index: frozenset[str]):
+    global _path_index
+    _path_index = path_index
+
+
+def validate_page(job) -> tuple[int, int, list[dict]]:
+    # (internal urls checked, external urls skipped, broken urls) of one
+    # page, from the references the build recorded as it rendered
+    from_path, page_url, basepath, references = job
+    checked = 0
+    external = 0
+    broken = []
+    for kind, urls in (("link", references[0]), ("image", references[1])):
+        for url in urls:
+            result = check_url(url, basepath, page_url, _path_index)
+            if result is None:
+                external += 1
+                continue
+            checked += 1
+            served, reason = result
+            if reason is not None:
+                broken.append({"page": from_path, "url": url, "kind": kind, "served": served, "reason": reason})
+    return checked, external, broken
+
+
+def validate_site(pages: list[tuple[str, str]], dest_dir_path: str, basepath: str, graph, workers: int = 1, report_path: str | None = None) -> dict:
+    # checks every internal link and image target of every page against the
+    # files actually in the output tree, without reading any HTML or
+    # markdown; a page missing from graph failed to render and was already
+    # reported by the build
+    path_index = output_path_index(dest_dir_path)
+    root = os.path.normpath(dest_dir_path)
+    jobs = []
+    for from_path, dest_path in pages:
+        entry = graph.pages.get(os.path.normpath(from_path))
+        if entry is None:
+            continue
+        page_url = "/" + os.path.relpath(dest_path, root).replace(os.sep, "/")
+        jobs.append((from_path, page_url, basepath, (entry["links"], entry["images"])))
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_validate_worker, initargs=(path_index,)) as executor:
+            results = list(executor.map(validate_page, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        init_validate_worker(path_index)
+        results = [validate_page(job) for job in jobs]
+
+    report = {
+        "version": VALIDATION_REPORT_VERSION,
+        "basepath": basepath,
+        "pages": len(jobs),
+        "outputs": len(path_index),
+        "checked": sum(checked for checked, _, _ in results),
+        "external": sum(external for _, external, _ in results),
+        "broken": [item for _, _, broken in results for item in broken],
+    }
+    if report_path is not None:
+        dir_path = os.path.dirname(report_path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=1)
+    print(f"validated {report['checked']} internal links and images on {report['pages']} pages against {report['outputs']} outputs: {len(report['broken'])} broken, {report['external']} external skipped")
+    return report
@@ -0,0 +1,96 @@
+import os
+import random
+from textnode import BlockType
+
+WORDS = (
+    "the of and to in is was that for on as with his they at be this from have or by one had not but "
+    "what all were when we there can an your which their said if do will each about how up out them "
+    "ring elves hobbit shire wizard mountain river forest song journey fellowship shadow tower road"
+).split()
+
+DEFAULT_BLOCK_MIX = {
+    BlockType.PARAGRAPH: 6,
+    BlockType.HEADING: 2,
+    BlockType.ULIST: 1,
+    BlockType.OLIST: 1,
+    BlockType.QUOTE: 1,
+    BlockType.CODE: 1,
+}
+
+
+class CorpusGenerator:
+    # builds deterministic markdown for benchmarks; inline_density is the
+    # chance that a word carries inline markup, nesting_depth both nests
+    # markup inside links/bold and sets how deep the page directories go
+    def __init__(self, seed: int = 0, blocks_per_page: int = 40, block_mix: dict | None = None, inline_density: float = 0.2, nesting_depth: int = 2):
+        self.rng = random.Random(seed)
+        self.blocks_per_page = blocks_per_page
+        self.block_mix = block_mix or DEFAULT_BLOCK_MIX
+        self.inline_density = inline_density
+        self.nesting_depth = nesting_depth
+
+    def word(self) -> str:
+        return self.rng.choice(WORDS)
+
+    def inline_text(self, word_count: int, depth: int = 0) -> str:
+        words = []
+        for _ in range(word_count):
+            if self.rng.random() >= self.inline_density:
+                words.append(self.word())
+                continue
+            kind = self.rng.randrange(5)
+            # nested markup only where the inline rules keep it intact
+            inner = self.inline_text(2, depth + 1) if depth < self.nesting_depth else self.word()
+            if kind == 0:
+                words.append(f"**{inner}**")
+            elif kind == 1:
+                words.append(f"_{self.word()}_")
+            elif kind == 2:
+                words.append(f"`{self.word()}`")
+            elif kind == 3:
+                words.append(f"[{inner}](/{self.word()}/{self.word()})")
+            else:
+                words.append(f"![{self.word()}](/images/{self.word()}.png)")
+        return " ".join(words)
+
+    def block(self, block_type: BlockType) -> str:
+        rng = self.rng
+        match block_type:
+            case BlockType.HEADING:
+                return "#" * rng.randint(2, 6) + " " + self.inline_text(rng.randint(2, 6))
+            case BlockType.CODE:
+                lines = [f"{self.word()}({self.word()!r})" for _ in range(rng.randint(1, 8))]
+                return "```\n" + "\n".join(lines) + "\n```"
+            case BlockType.QUOTE:
+                return "\n".join("> " + self.inline_text(rng.randint(4, 12)) for _ in range(rng.randint(1, 4)))
+            case BlockType.ULIST:
+                return "\n".join("- " + self.inline_text(rng.randint(3, 10)) for _ in range(rng.randint(2, 6)))
+            case BlockType.OLIST:
+                return "\n".join(f"{i}. " + self.inline_text(rng.randint(3, 10)) for i in range(1, rng.randint(2, 6) + 1))
+            case _:
+                return "\n".join(self.inline_text(rng.randint(8, 20)) for _ in range(rng.randint(1, 5)))
+
+    def page(self, title: str) -> str:
+        block_types = list(self.block_mix)
+        weights = [self.block_mix[block_type] for block_type in block_types]
+        blocks = [f"# {title}"]
+        for block_type in self.rng.choices(block_types, weights, k=self.blocks_per_page):
+            blocks.append(self.block(block_type))
+        return "\n\n".join(blocks) + "\n"
+
+    def page_path(self, index: int) -> str:
+        depth = self.rng.randint(0, self.nesting_depth)
+        parts = [f"section{self.rng.randrange(4)}" for _ in range(depth)]
+        return os.path.join(*parts, f"page{index}", "index.md")
+
+
+def generate_corpus(dest_dir: str, pages: int = 100, seed: int = 0, **options) -> list[str]:
+    generator = CorpusGenerator(seed, **options)
+    paths = []
+    for i in range(pages):
+        path = os.path.join(dest_dir, generator.page_path(i))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(generator.page(f"Page {i}"))
+        paths.append(path)
+    return paths
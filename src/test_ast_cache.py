@@ -0,0 +1,64 @@
+import os
+import unittest
+
+from ast_cache import AstCache, decode_tree, encode_tree
+from block_scanner import iter_markdown_blocks
+from htmlnode import LeafNode, ParentNode, RawNode
+from utilities import blocks_to_html_node, cached_page_tree, node_references
+from tempdir_test_case import TempDirTestCase
+
+MARKDOWN = """# Title with **bold**
+
+A [link](/blog/tom) and ![alt](/images/tom.png) in _one_ paragraph.
+
+```
+code [not a link](/x)
+```
+
+- one
+- two `code`
+
+> quoted"""
+
+
+class TestAstCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = AstCache(os.path.join(self.root, "ast"))
+
+    def test_round_trip(self):
+        tree = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "plain é"), LeafNode("a", "x", {"href": "/a", "title": "t"})]),
+            LeafNode("img", "", {"src": "/i.png", "alt": ""}),
+            RawNode("<hr>"),
+        ])
+        decoded = decode_tree(encode_tree(tree))
+        self.assertEqual(decoded.to_html(), tree.to_html())
+        self.assertIsInstance(decoded.children[2], RawNode)
+        with self.assertRaises(ValueError):
+            decode_tree(encode_tree(tree)[:-3])
+
+    def test_cached_tree_matches_parse(self):
+        blocks = list(iter_markdown_blocks(MARKDOWN))
+        expected = blocks_to_html_node(blocks).to_html()
+        first = cached_page_tree(MARKDOWN, blocks, self.cache)
+        second = cached_page_tree(MARKDOWN, blocks, self.cache)
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "written": 1})
+        self.assertEqual(first.to_html(), expected)
+        self.assertEqual(second.to_html(), expected)
+        # the cached tree gives the references a fresh render records
+        references = ([], [])
+        blocks_to_html_node(blocks, references=references)
+        cached_references = ([], [])
+        node_references(second, cached_references)
+        self.assertEqual(cached_references, references)
+
+    def test_corrupt_entry_is_a_miss_and_eviction(self):
+        key = self.cache.key(MARKDOWN)
+        cached_page_tree(MARKDOWN, list(iter_markdown_blocks(MARKDOWN)), self.cache)
+        with open(self.cache.entry_path(key), "wb") as f:
+            f.write(b"junk")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.max_bytes = 0
+        self.cache.save()
+        self.assertFalse(os.path.exists(self.cache.entry_path(key)))
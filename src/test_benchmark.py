@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from benchmark import compare_results, run_benchmarks
+from generate_content import extract_title
+from synthetic_corpus import CorpusGenerator, generate_corpus
+from textnode import BlockType
+from utilities import block_to_block_type, markdown_to_blocks
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_generator_is_deterministic(self):
+        self.assertEqual(CorpusGenerator(seed=7).page("A"), CorpusGenerator(seed=7).page("A"))
+        self.assertNotEqual(CorpusGenerator(seed=7).page("A"), CorpusGenerator(seed=8).page("A"))
+
+    def test_block_mix_and_title(self):
+        generator = CorpusGenerator(seed=1, blocks_per_page=20, block_mix={BlockType.ULIST: 1})
+        page = generator.page("Lists")
+        self.assertEqual(extract_title(page), "Lists")
+        blocks = markdown_to_blocks(page)
+        self.assertEqual(len(blocks), 21)
+        self.assertTrue(all(block_to_block_type(block) == BlockType.ULIST for block in blocks[1:]))
+
+    def test_generate_corpus_writes_pages(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = generate_corpus(root, pages=5, seed=3, nesting_depth=3)
+            self.assertEqual(len(paths), 5)
+            self.assertTrue(all(os.path.isfile(path) for path in paths))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmarks_report(self):
+        report = run_benchmarks(pages=2, repeat=1, blocks_per_page=5)
+        self.assertEqual(report["meta"]["pages"], 2)
+        self.assertEqual(
+            set(report["results"]),
+            {"markdown_to_blocks", "text_to_textnodes", "markdown_to_html_node", "to_html", "generate_pages_recursive"},
+        )
+
+    def test_compare_results(self):
+        meta = {"pages": 2, "seed": 0, "corpus_options": {}, "corpus_bytes": 100, "blocks": 10}
+        baseline = {"meta": meta, "results": {"a": {"min_s": 1.0}, "b": {"min_s": 1.0}}}
+        current = {"meta": dict(meta, python="other"), "results": {"a": {"min_s": 1.05}, "b": {"min_s": 1.5}, "c": {"min_s": 9.0}}}
+        self.assertEqual(compare_results(baseline, current, threshold=0.1), [("b", 1.0, 1.5)])
+
+    def test_compare_rejects_different_corpus(self):
+        meta = {"pages": 2, "seed": 0, "corpus_options": {}, "corpus_bytes": 100, "blocks": 10}
+        results = {"a": {"min_s": 1.0}}
+        with self.assertRaisesRegex(ValueError, "seed: 0 vs 1"):
+            compare_results({"meta": meta, "results": results}, {"meta": dict(meta, seed=1), "results": results})
+        with self.assertRaises(ValueError):
+            compare_results({"results": results}, {"meta": meta, "results": results})
+
+
+if __name__ == "__main__":
+    unittest.main()
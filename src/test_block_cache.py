@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from textnode import BlockType
+from utilities import markdown_to_html_node
+
+MD = """# Reference
+
+Intro with a [link](/docs) and **bold** text.
+
+- item one
+- item ![img](/images/a.png)
+
+```
+code with [link](/not-rewritten)
+```
+"""
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_cached_render_matches_uncached(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MD, "/site/").to_html()
+        self.assertEqual(markdown_to_html_node(MD, "/site/", cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(MD, "/site/", cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (4, 4))
+        # the base path is part of the key
+        self.assertEqual(markdown_to_html_node(MD, "/", cache).to_html(), markdown_to_html_node(MD).to_html())
+        self.assertEqual(cache.misses, 8)
+
+    def test_editing_one_block_renders_one_block(self):
+        paragraphs = [f"paragraph {i} with _some_ text" for i in range(500)]
+        cache = BlockCache()
+        markdown_to_html_node("\n\n".join(paragraphs), "/", cache)
+        paragraphs[250] = "an edited paragraph"
+        cache.hits = cache.misses = 0
+        html = markdown_to_html_node("\n\n".join(paragraphs), "/", cache).to_html()
+        self.assertEqual((cache.hits, cache.misses), (499, 1))
+        self.assertIn("<p>an edited paragraph</p>", html)
+
+    def test_eviction_by_total_size(self):
+        cache = BlockCache(max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        self.assertEqual(cache.total_bytes, 10)
+        cache.get("a")
+        cache.put("c", "123")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "12345")
+        self.assertEqual(cache.total_bytes, 8)
+
+    def test_key(self):
+        key = BlockCache.key("text", BlockType.PARAGRAPH, "/")
+        self.assertEqual(key, BlockCache.key("text", BlockType.PARAGRAPH, "/"))
+        self.assertNotEqual(key, BlockCache.key("text", BlockType.HEADING, "/"))
+        self.assertNotEqual(key, BlockCache.key("text", BlockType.PARAGRAPH, "/site/"))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "block_cache.json")
+            cache = BlockCache(path=path)
+            markdown_to_html_node(MD, "/", cache)
+            cache.save()
+            loaded = BlockCache.load(path)
+            self.assertEqual(loaded.entries, cache.entries)
+            self.assertEqual(loaded.total_bytes, cache.total_bytes)
+            markdown_to_html_node(MD, "/", loaded)
+            self.assertEqual(loaded.misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import io
+import os
+import tempfile
+import unittest
+
+from block_scanner import iter_blocks, iter_markdown_blocks
+from textnode import BlockType
+from utilities import block_to_block_type
+
+
+def split_blocks(markdown: str) -> list[str]:
+    # the old markdown_to_blocks: correct whenever no fence holds a blank line
+    return [block.strip() for block in markdown.split("\n\n") if block.strip()]
+
+
+class TestBlockScanner(unittest.TestCase):
+    def test_typed_blocks(self):
+        md = "# Title\n\n  para one\nline two  \n\n- a\n- b\n\n1. x\n2. y\n\n> q\n> r\n\n```\ncode\n```\n"
+        self.assertEqual(
+            list(iter_markdown_blocks(md)),
+            [
+                (BlockType.HEADING, "# Title"),
+                (BlockType.PARAGRAPH, "para one\nline two"),
+                (BlockType.ULIST, "- a\n- b"),
+                (BlockType.OLIST, "1. x\n2. y"),
+                (BlockType.QUOTE, "> q\n> r"),
+                (BlockType.CODE, "```\ncode\n```"),
+            ],
+        )
+
+    def test_matches_split_and_block_to_block_type(self):
+        docs = [
+            "",
+            "\n\n\n",
+            "a\n\n\nb",
+            "a\n  \nb",
+            " \n\t\n# heading\n \n",
+            "- a\n-b\n\n1. a\n3. b\n\n> a\nb",
+            "- \n\n1. \n\n# ",
+        ]
+        for md in docs:
+            blocks = list(iter_markdown_blocks(md))
+            self.assertEqual([block for _, block in blocks], split_blocks(md), msg=repr(md))
+            for block_type, block in blocks:
+                self.assertEqual(block_type, block_to_block_type(block), msg=repr(block))
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "intro\n\n```\nfirst\n\n\nsecond\n```\n\noutro"
+        self.assertEqual(
+            list(iter_markdown_blocks(md)),
+            [
+                (BlockType.PARAGRAPH, "intro"),
+                (BlockType.CODE, "```\nfirst\n\n\nsecond\n```"),
+                (BlockType.PARAGRAPH, "outro"),
+            ],
+        )
+
+    def test_unclosed_and_single_line_fences(self):
+        md = "```\nnever closed\n\nnext"
+        self.assertEqual([block for _, block in iter_markdown_blocks(md)], split_blocks(md))
+        md = "```inline``` text\n\nnext"
+        self.assertEqual([block for _, block in iter_markdown_blocks(md)], ["```inline``` text", "next"])
+
+    def test_streams_from_a_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.md")
+            with open(path, "w") as f:
+                f.write("# Title\n\nbody\n")
+            with open(path) as f:
+                self.assertEqual(list(iter_blocks(f)), [(BlockType.HEADING, "# Title"), (BlockType.PARAGRAPH, "body")])
+
+    def test_is_lazy(self):
+        lines = iter(["first\n", "\n", "second\n"])
+        blocks = iter_blocks(lines)
+        self.assertEqual(next(blocks), (BlockType.PARAGRAPH, "first"))
+        # the second block has not been read yet
+        self.assertEqual(list(lines), ["second\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import io
+import os
+import socket
+import sys
+import threading
+import unittest
+
+from build_client import send_build, split_socket_arg
+from build_daemon import daemon_build_defaults, handle_request
+from main import parse_args
+from tempdir_test_case import TempDirTestCase
+
+
+def fake_build(argv):
+    print("building", " ".join(argv))
+    print("a warning", file=sys.stderr)
+    if "--bad" in argv:
+        raise RuntimeError("boom")
+    return 3 if "--fail" in argv else 0
+
+
+class TestBuildDaemon(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.socket_path = os.path.join(self.root, "daemon.sock")
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen(4)
+        self.keep_serving = []
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.close()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            with conn:
+                self.keep_serving.append(handle_request(conn, fake_build))
+
+    def build(self, argv):
+        # the fake daemon redirects this process's stdout while it builds, so
+        # the client writes to its own streams rather than sys.stdout
+        out, err = io.StringIO(), io.StringIO()
+        code = send_build(argv, self.socket_path, out, err)
+        return code, out.getvalue(), err.getvalue()
+
+    def test_output_and_exit_code_reach_the_client(self):
+        self.assertEqual(self.build(["/site/", "--fail"]), (3, "building /site/ --fail\n", "a warning\n"))
+        code, out, err = self.build(["--bad"])
+        self.assertEqual(code, 1)
+        self.assertIn("RuntimeError: boom", err)
+
+    def test_rejects_watch_and_stop_ends_serving(self):
+        code, _, err = self.build(["--watch"])
+        self.assertEqual(code, 2)
+        self.assertIn("--watch", err)
+        self.assertEqual(self.build(["--stop"])[0], 0)
+        self.thread.join(1)
+        self.assertEqual(self.keep_serving[-1], False)
+
+    def test_no_daemon_raises(self):
+        with self.assertRaises(OSError):
+            send_build([], os.path.join(self.root, "missing.sock"))
+
+    def test_builds_start_from_the_daemon_options(self):
+        defaults = daemon_build_defaults(["/site/", "--daemon", "--socket", "x.sock", "--minify", "--workers", "3", "--images", "100,200"])
+        self.assertNotIn("daemon", defaults)
+        self.assertNotIn("socket", defaults)
+        args = parse_args(["--search"], defaults)
+        self.assertEqual((args.base_path, args.minify, args.workers, args.images, args.search), ("/site/", True, 3, (100, 200), True))
+        args = parse_args(["/other/", "--workers", "1"], defaults)
+        self.assertEqual((args.base_path, args.minify, args.workers, args.search), ("/other/", True, 1, False))
+
+    def test_split_socket_arg(self):
+        self.assertEqual(split_socket_arg(["/x/", "--socket", "a.sock", "--minify"]), (["/x/", "--minify"], "a.sock"))
+        self.assertEqual(split_socket_arg(["--socket=b.sock"]), ([], "b.sock"))
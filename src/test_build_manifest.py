@@ -0,0 +1,101 @@
+import os
+import unittest
+
+from build_manifest import BuildManifest, discard_manifest, hash_file
+from generate_content import generate_pages_incremental, generate_pages_recursive
+from tempdir_test_case import TempDirTestCase
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestBuildManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, ".build_cache", "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nfirst")
+
+    def build(self, basepath="/"):
+        generate_pages_incremental(self.content, self.template, self.public, basepath, self.manifest)
+
+    def mtimes(self):
+        paths = [os.path.join(self.public, "index.html"), os.path.join(self.public, "blog", "post.html")]
+        return [os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in paths]
+
+    def test_page_staleness(self):
+        manifest = BuildManifest(self.manifest)
+        dest = os.path.join(self.public, "index.html")
+        self.assertTrue(manifest.is_page_stale("index.md", "abc", dest))
+        manifest.record_page("index.md", "abc", dest)
+        # the destination file does not exist yet
+        self.assertTrue(manifest.is_page_stale("index.md", "abc", dest))
+        os.makedirs(self.public)
+        self.write(dest, "")
+        self.assertFalse(manifest.is_page_stale("index.md", "abc", dest))
+        self.assertTrue(manifest.is_page_stale("index.md", "def", dest))
+
+    def test_manifest_round_trip(self):
+        manifest = BuildManifest(self.manifest)
+        manifest.update_settings(hash_file(self.template), "/site/")
+        manifest.record_page("a.md", "123", "public/a.html")
+        manifest.save()
+
+        loaded = BuildManifest(self.manifest)
+        self.assertFalse(loaded.settings_changed(hash_file(self.template), "/site/"))
+        self.assertTrue(loaded.settings_changed(hash_file(self.template), "/"))
+        self.assertEqual(loaded.pages, {"a.md": {"hash": "123", "dest": "public/a.html"}})
+
+    def test_only_changed_pages_are_rendered(self):
+        self.build()
+        first = self.mtimes()
+        os.utime(os.path.join(self.public, "index.html"), ns=(0, 0))
+        os.utime(os.path.join(self.public, "blog", "post.html"), ns=(0, 0))
+
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nsecond")
+        self.build()
+        index_mtime, post_mtime = self.mtimes()
+        self.assertEqual(index_mtime, 0)
+        self.assertNotEqual(post_mtime, 0)
+        self.assertIsNotNone(first[0])
+        with open(os.path.join(self.public, "blog", "post.html")) as f:
+            self.assertIn("second", f.read())
+
+    def test_settings_change_rebuilds_everything(self):
+        self.build()
+        os.utime(os.path.join(self.public, "index.html"), ns=(0, 0))
+        self.build(basepath="/site/")
+        self.assertNotEqual(self.mtimes()[0], 0)
+
+        os.utime(os.path.join(self.public, "index.html"), ns=(0, 0))
+        self.write(self.template, TEMPLATE + "<!-- footer -->")
+        self.build(basepath="/site/")
+        self.assertNotEqual(self.mtimes()[0], 0)
+
+    def test_full_build_discards_the_manifest(self):
+        self.build(basepath="/site/")
+        # a full build with other settings, as main() runs it
+        generate_pages_recursive(self.content, self.template, self.public, "/")
+        discard_manifest(self.manifest)
+        self.assertFalse(os.path.exists(self.manifest))
+        os.utime(os.path.join(self.public, "index.html"), ns=(0, 0))
+        self.build(basepath="/site/")
+        self.assertNotEqual(self.mtimes()[0], 0)
+        discard_manifest(self.manifest)
+        discard_manifest(self.manifest)
+
+    def test_removed_sources_are_deleted(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+        self.assertNotIn(os.path.join(self.content, "blog", "post.md"), BuildManifest(self.manifest).pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from build_profiler import BuildProfiler, disable_profiling, enable_profiling, get_profiler, is_profiling, NULL_PROFILER
+from generate_content import generate_pages
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def tearDown(self):
+        disable_profiling()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(is_profiling())
+        with get_profiler().stage("read", "page.md"):
+            pass
+        self.assertEqual(NULL_PROFILER.drain(), [])
+
+    def test_stage_totals_and_summary(self):
+        profiler = BuildProfiler()
+        with profiler.stage("read", "a.md"):
+            pass
+        with profiler.stage("read", "b.md"):
+            pass
+        with profiler.stage("walk"):
+            pass
+        totals = profiler.stage_totals()
+        self.assertEqual(totals["read"][1], 2)
+        self.assertEqual(totals["walk"][1], 1)
+        self.assertEqual(set(profiler.page_totals()), {"a.md", "b.md"})
+        summary = profiler.summary(top_n=1)
+        self.assertIn("slowest 1 pages:", summary)
+        self.assertIn("walk", summary)
+
+    def test_chrome_trace(self):
+        profiler = BuildProfiler()
+        with profiler.stage("inline", "a.md"):
+            pass
+        trace = profiler.chrome_trace()
+        event = trace["traceEvents"][0]
+        self.assertEqual((event["name"], event["ph"], event["pid"]), ("inline", "X", os.getpid()))
+        self.assertEqual(event["args"], {"page": "a.md"})
+
+    def test_parallel_build_sends_worker_spans_back(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            template = os.path.join(root, "template.html")
+            os.makedirs(content)
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            for i in range(4):
+                with open(os.path.join(content, f"page{i}.md"), "w") as f:
+                    f.write(f"# Page {i}\n\ntext")
+            profiler = enable_profiling()
+            self.assertEqual(generate_pages(content, template, os.path.join(root, "public"), "/", workers=2), [])
+        totals = profiler.stage_totals()
+        for stage in ("walk", "read", "template", "blocks", "inline", "serialize"):
+            self.assertIn(stage, totals)
+        self.assertEqual(totals["read"][1], 4)
+        # one write span per page, covering its open and its close
+        self.assertEqual(totals["write"][1], 4)
+        self.assertEqual(len(profiler.page_totals()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
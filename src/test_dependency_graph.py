@@ -0,0 +1,77 @@
+import os
+import unittest
+
+from dependency_graph import DependencyGraph, url_targets
+from generate_content import generate_pages, set_dependency_graph
+from tempdir_test_case import TempDirTestCase
+
+
+class TestDependencyGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(self.template, "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![a](/images/a.png) [post](/blog/post) [gone](/blog/gone)")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n[home](/) [up](../index.html) [ext](https://example.com)\n\n```\n[not](/a/link)\n```")
+
+    def tearDown(self):
+        set_dependency_graph(None)
+
+    def build(self, workers=1):
+        graph = DependencyGraph(os.path.join(self.root, "deps.json"))
+        set_dependency_graph(graph)
+        graph.record_static_tree(self.static, self.public)
+        self.assertEqual(generate_pages(self.content, self.template, self.public, "/", workers), [])
+        return graph
+
+    def test_url_targets(self):
+        self.assertEqual(url_targets("/"), ["index.html"])
+        self.assertEqual(url_targets("/images/a.png#top"), ["images/a.png"])
+        self.assertEqual(url_targets("/blog/post"), ["blog/post", "blog/post.html", "blog/post/index.html"])
+        self.assertEqual(url_targets("../a.png", "/blog/post.html"), ["a.png"])
+        self.assertIsNone(url_targets("https://example.com/"))
+        self.assertIsNone(url_targets("#section"))
+
+    def test_records_pages_and_finds_broken_links(self):
+        for workers in (1, 2):
+            graph = self.build(workers)
+            index = os.path.normpath(os.path.join(self.content, "index.md"))
+            post = os.path.normpath(os.path.join(self.content, "blog", "post.md"))
+            self.assertEqual(sorted(graph.pages), sorted([index, post]))
+            self.assertEqual(graph.pages[index]["images"], ["/images/a.png"])
+            self.assertEqual(graph.broken_links(self.public), [(index, "/blog/gone")])
+
+    def test_generated_outputs_are_link_targets(self):
+        graph = self.build()
+        index = os.path.normpath(os.path.join(self.content, "index.md"))
+        graph.pages[index]["links"] += ["/sitemap.xml", "/blog/feed.xml", "/search/pages.json", "/images/a-480.png"]
+        self.assertEqual(len(graph.broken_links(self.public)), 5)
+        graph.record_generated(os.path.join(self.public, *path) for path in (("sitemap.xml",), ("blog", "feed.xml"), ("search", "pages.json"), ("images", "a-480.png")))
+        self.assertEqual(graph.broken_links(self.public), [(index, "/blog/gone")])
+
+    def test_queries(self):
+        graph = self.build()
+        index = os.path.normpath(os.path.join(self.content, "index.md"))
+        post = os.path.normpath(os.path.join(self.content, "blog", "post.md"))
+        image = os.path.join(self.static, "images", "a.png")
+        self.assertEqual(graph.affected(self.template), (sorted([index, post]), []))
+        self.assertEqual(graph.affected(post), ([post], []))
+        self.assertEqual(graph.affected(image), ([], [os.path.normpath(image)]))
+        self.assertEqual(graph.referrers(image, self.public), [index])
+        self.assertEqual(graph.referrers(index, self.public), [post])
+
+        graph.remove_asset(image)
+        self.assertIn((index, "/images/a.png"), graph.broken_links(self.public))
+
+    def test_save_and_load(self):
+        graph = self.build()
+        graph.save()
+        loaded = DependencyGraph.load(graph.path)
+        self.assertEqual(loaded.pages, graph.pages)
+        self.assertEqual(loaded.assets, graph.assets)
@@ -0,0 +1,59 @@
+import os
+import unittest
+
+from file_utilities import files_match, sync_folder_structure
+from tempdir_test_case import TempDirTestCase
+
+
+class TestSyncFolderStructure(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png bytes")
+
+    def test_copies_only_changed_files(self):
+        self.assertEqual(sync_folder_structure(self.static, self.public), {"copied": 2, "unchanged": 0, "removed": 0})
+        self.assertEqual(sync_folder_structure(self.static, self.public), {"copied": 0, "unchanged": 2, "removed": 0})
+
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        self.assertEqual(sync_folder_structure(self.static, self.public), {"copied": 1, "unchanged": 1, "removed": 0})
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "body { color: red }")
+
+    def test_removes_orphans_but_preserves_generated_pages(self):
+        sync_folder_structure(self.static, self.public)
+        page = os.path.join(self.public, "blog", "post.html")
+        orphan = os.path.join(self.public, "old", "stale.png")
+        self.write(page, "<p>generated</p>")
+        self.write(orphan, "stale")
+
+        counts = sync_folder_structure(self.static, self.public, preserve=lambda path: path.endswith(".html"))
+        self.assertEqual(counts["removed"], 1)
+        self.assertTrue(os.path.exists(page))
+        self.assertFalse(os.path.exists(os.path.dirname(orphan)))
+
+    def test_hash_comparison_ignores_touched_files(self):
+        sync_folder_structure(self.static, self.public)
+        src = os.path.join(self.static, "index.css")
+        dst = os.path.join(self.public, "index.css")
+        os.utime(src, ns=(10**18, 10**18))
+        self.assertFalse(files_match(src, dst))
+        self.assertTrue(files_match(src, dst, use_hash=True))
+        # the matched copy adopts the source mtime
+        self.assertEqual(os.stat(dst).st_mtime_ns, 10**18)
+
+    def test_link_modes(self):
+        sync_folder_structure(self.static, self.public, link_mode="hardlink")
+        src = os.path.join(self.static, "images", "a.png")
+        dst = os.path.join(self.public, "images", "a.png")
+        self.assertTrue(os.path.samefile(src, dst))
+
+        other = os.path.join(self.root, "other")
+        sync_folder_structure(self.static, other, link_mode="reflink")
+        self.assertEqual(self.read(os.path.join(other, "images", "a.png")), "png bytes")
+
+
+if __name__ == "__main__":
+    unittest.main()
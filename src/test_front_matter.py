@@ -0,0 +1,86 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from front_matter import is_draft, parse_front_matter, read_page_header, split_front_matter
+from generate_content import collect_pages, generate_pages_recursive, set_include_drafts
+from tempdir_test_case import TempDirTestCase
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse(self):
+        meta = parse_front_matter([
+            "title: 'Tom: a mistake'",
+            "date: 2024-05-01",
+            "draft: false",
+            "weight: 3  # sort order",
+            "tags: [tolkien, essays]",
+            "authors:",
+            "  - Frodo",
+            "  - Sam",
+            "# a comment",
+            "summary:",
+        ])
+        self.assertEqual(meta, {
+            "title": "Tom: a mistake",
+            "date": "2024-05-01",
+            "draft": False,
+            "weight": 3,
+            "tags": ["tolkien", "essays"],
+            "authors": ["Frodo", "Sam"],
+            "summary": None,
+        })
+        skipped = []
+        meta = parse_front_matter(["title: No", "not a pair", "  - stray", "quote: 'open", "published: off"], skipped)
+        self.assertEqual(meta, {"title": "No", "published": "off"})
+        self.assertEqual(skipped, ["not a pair", "- stray", "quote: 'open"])
+
+    def test_split(self):
+        self.assertEqual(split_front_matter("---\ndraft: True\n---\n# Title\n"), ({"draft": True}, "# Title\n"))
+        self.assertEqual(split_front_matter("---\ndraft: yes\n---\n# Title\n"), ({"draft": "yes"}, "# Title\n"))
+        self.assertEqual(split_front_matter("# Title\n---\n"), ({}, "# Title\n---\n"))
+        # an unclosed fence is a horizontal rule, not front matter
+        self.assertEqual(split_front_matter("---\n# Title\n"), ({}, "---\n# Title\n"))
+
+    def test_is_draft(self):
+        self.assertTrue(is_draft({"draft": True}))
+        self.assertTrue(is_draft({"published": False}))
+        self.assertFalse(is_draft({"draft": "maybe"}))
+
+
+class TestPageHeader(TempDirTestCase):
+    def tearDown(self):
+        set_include_drafts(False)
+
+    def test_reads_only_the_header(self):
+        # the body is not valid UTF-8, so reading it would fail
+        body = b"text\n" * 20000 + b"\xff\xfe"
+        path = self.write(os.path.join(self.root, "a.md"), b"---\ntitle: From Front Matter\ndate: 2024-05-01\n---\n" + body)
+        self.assertEqual(read_page_header(path), {"title": "From Front Matter", "date": "2024-05-01"})
+        path = self.write(os.path.join(self.root, "b.md"), b"# From Heading\n\n" + body)
+        self.assertEqual(read_page_header(path), {"title": "From Heading"})
+
+    def test_drafts_are_skipped(self):
+        content = os.path.join(self.root, "content")
+        public = os.path.join(self.root, "public")
+        template = self.write(os.path.join(self.root, "template.html"), b"<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.root, "content", "post.md"), b"---\ntitle: Shown Title\n---\n# Post\n\nbody")
+        self.write(os.path.join(self.root, "content", "draft.md"), b"---\ndraft: true\n---\n# Draft\n\nbody")
+        self.assertEqual([os.path.basename(from_path) for from_path, _ in collect_pages(content, public)], ["post.md"])
+        generate_pages_recursive(content, template, public, "/")
+        self.assertEqual(os.listdir(public), ["post.html"])
+        with open(os.path.join(public, "post.html")) as f:
+            self.assertEqual(f.read(), "<title>Shown Title</title><div><h1>Post</h1><p>body</p></div>")
+
+        set_include_drafts(True)
+        self.assertEqual(len(collect_pages(content, public)), 2)
+
+    def test_unreadable_lines_are_reported_not_fatal(self):
+        template = self.write(os.path.join(self.root, "template.html"), "<title>{{ Title }}</title>{{ Content }}")
+        source = self.write(os.path.join(self.root, "content", "post.md"), "---\ntitle: Kept\nthis is not front matter\n---\nbody")
+        out = io.StringIO()
+        with redirect_stdout(out):
+            generate_pages_recursive(os.path.dirname(source), template, os.path.join(self.root, "public"), "/")
+        self.assertIn(f"ignoring front matter line in {source}: this is not front matter", out.getvalue())
+        self.assertEqual(self.read(os.path.join(self.root, "public", "post.html")), "<title>Kept</title><div><p>body</p></div>")
@@ -0,0 +1,91 @@
+import os
+import unittest
+from unittest import mock
+
+from generate_content import collect_pages, generate_pages, generate_pages_recursive, generate_pages_streaming, set_low_memory
+from tempdir_test_case import TempDirTestCase
+
+TEMPLATE = '<title>{{ Title }}</title><link href="/index.css"><body>{{ Content }}</body>'
+
+
+class TestGenerateContent(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post)")
+        for i in range(6):
+            self.write(os.path.join(self.content, "blog", f"post{i}.md"), f"# Post {i}\n\n![img](/images/{i}.png)\n\n- **item** {i}")
+
+    def tearDown(self):
+        set_low_memory(False)
+
+    def read_tree(self, dir_path):
+        files = {}
+        for dir_name, _, filenames in os.walk(dir_path):
+            for filename in filenames:
+                path = os.path.join(dir_name, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, dir_path)] = f.read()
+        return files
+
+    def test_collect_pages(self):
+        dest = os.path.join(self.root, "public")
+        pages = collect_pages(self.content, dest)
+        self.assertEqual(len(pages), 7)
+        self.assertIn((os.path.join(self.content, "index.md"), os.path.join(dest, "index.html")), pages)
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/site/")
+        errors = generate_pages(self.content, self.template, parallel, "/site/", workers=3)
+        self.assertEqual(errors, [])
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_given_page_list_is_not_walked_again(self):
+        dest = os.path.join(self.root, "public")
+        pages = collect_pages(self.content, dest)[:2]
+        with mock.patch("generate_content.collect_pages", side_effect=AssertionError("walked again")):
+            for workers in (1, 2):
+                self.assertEqual(generate_pages(self.content, self.template, dest, "/", workers, pages), [])
+        self.assertEqual(len(self.read_tree(dest)), 2)
+
+    def test_parallel_collects_errors(self):
+        bad_path = os.path.join(self.content, "blog", "untitled.md")
+        self.write(bad_path, "no title here")
+        dest = os.path.join(self.root, "public")
+        errors = generate_pages(self.content, self.template, dest, "/", workers=2)
+        self.assertEqual(errors, [(bad_path, "ValueError: no title found")])
+        # every other page was still rendered
+        self.assertEqual(len(self.read_tree(dest)), 7)
+
+    def test_streaming_output_matches_serial(self):
+        os.makedirs(os.path.join(self.content, "blog", "deep", "deeper"))
+        self.write(os.path.join(self.content, "blog", "deep", "deeper", "page.md"), "---\ndate: 2024-01-01\n---\nintro\n\n# Deep\n\n```\ncode\n\nblock\n```")
+        serial = os.path.join(self.root, "serial")
+        generate_pages_recursive(self.content, self.template, serial, "/site/")
+        # a streaming build reports a bad page and renders the rest
+        self.write(os.path.join(self.content, "blog", "untitled.md"), "no title here")
+
+        set_low_memory(True)
+        for workers in (1, 2):
+            streamed = os.path.join(self.root, f"streamed{workers}")
+            errors = generate_pages_streaming(self.content, self.template, streamed, "/site/", workers, batch_size=2)
+            self.assertEqual(errors, [(os.path.join(self.content, "blog", "untitled.md"), "ValueError: no title found")])
+            self.assertEqual(self.read_tree(streamed), self.read_tree(serial))
+
+    def test_empty_page_fails_the_same_in_both_modes(self):
+        self.write(os.path.join(self.content, "blog", "empty.md"), "---\ntitle: Empty\n---\n\n")
+        for low_memory in (False, True):
+            set_low_memory(low_memory)
+            dest = os.path.join(self.root, f"public{low_memory}")
+            errors = generate_pages(self.content, self.template, dest, "/", workers=2)
+            self.assertEqual(errors, [(os.path.join(self.content, "blog", "empty.md"), "ValueError: cannot instantiate parent node without children")])
+            self.assertFalse(os.path.exists(os.path.join(dest, "blog", "empty.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
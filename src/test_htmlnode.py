@@ -1,5 +1,6 @@
+import io
 import unittest
-from htmlnode import HtmlNode, LeafNode, ParentNode
+from htmlnode import HtmlNode, LeafNode, ParentNode, RawNode
 
 
 class HtmlNodeTest(unittest.TestCase):
@@ -61,6 +62,58 @@ class HtmlNodeTest(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text "), LeafNode("a", "link", {"href": "/x"})]),
+                ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")]), ParentNode("li", [LeafNode("i", "two")])]),
+                LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+            ],
+            {"class": "page"},
+        )
+        chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), node.to_html())
+        self.assertEqual(list(LeafNode("b", "x").iter_html()), ["<b>x</b>"])
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("span", [LeafNode("b", "grandchild")])])
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), "<div><span><b>grandchild</b></span></div>")
+
+    def test_deep_tree_streams_without_recursion(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        self.assertEqual("".join(node.iter_html()), "<span>" * 5000 + "leaf" + "</span>" * 5000)
+
+    def test_nodes_are_slotted_with_interned_tags(self):
+        leaf = LeafNode("".join(["s", "pan"]), "text")
+        parent = ParentNode("div", [leaf])
+        self.assertFalse(hasattr(leaf, "__dict__"))
+        self.assertFalse(hasattr(parent, "__dict__"))
+        self.assertIs(leaf.tag, LeafNode("span", "other").tag)
+        self.assertIsNone(leaf.props)
+
+    def test_minified_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "some   spaced\n text "), LeafNode("a", "a  link", {"href": "/x/y", "title": "two words"})]),
+            LeafNode("img", "", {"src": "/a.png", "alt": ""}),
+            ParentNode("pre", [ParentNode("code", [LeafNode(None, "keep\n    this")])]),
+            RawNode("<pre>cached\n  fragment</pre>"),
+        ], {"class": "page"})
+        self.assertEqual(
+            node.to_html(minify=True),
+            '<div class=page><p>some spaced text <a href=/x/y title="two words">a link</a></p><img src=/a.png alt="">'
+            '<pre><code>keep\n    this</code></pre><pre>cached\n  fragment</pre></div>',
+        )
+        out = io.StringIO()
+        node.write_html(out, minify=True)
+        self.assertEqual(out.getvalue(), node.to_html(minify=True))
+        self.assertIn("some   spaced", node.to_html())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+import io
+import os
+import random
+import struct
+import unittest
+import zlib
+from contextlib import redirect_stderr
+from unittest import mock
+
+import image_pipeline
+from block_scanner import iter_markdown_blocks
+from image_pipeline import ImagePipeline, ImageVariants, image_size
+from utilities import blocks_to_html_node
+from tempdir_test_case import TempDirTestCase
+
+
+def png_bytes(width, height):
+    # a valid grey PNG of noise, which resized copies shrink
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    noise = random.Random(0)
+    rows = b"".join(b"\x00" + noise.randbytes(width) for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+class TestImagePipeline(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "big.png"), "wb") as f:
+            f.write(png_bytes(400, 100))
+        with open(os.path.join(self.static, "index.css"), "w") as f:
+            f.write("body {}")
+
+    def pipeline(self):
+        return ImagePipeline(self.static, self.public, os.path.join(self.root, "cache"), (100, 200, 800))
+
+    def test_image_size_from_header(self):
+        self.assertEqual(image_size(os.path.join(self.static, "images", "big.png")), (400, 100))
+        self.assertIsNone(image_size(os.path.join(self.static, "index.css")))
+
+    def test_run_and_place(self):
+        images = self.pipeline().run()
+        image = images.get("/images/big.png")
+        self.assertEqual((image["width"], image["height"]), (400, 100))
+        if image_pipeline.Image is None:
+            self.assertEqual(image["srcset"], [])
+            return
+        self.assertEqual(image["srcset"], [["/images/big-100w.png", 100], ["/images/big-200w.png", 200], ["/images/big.png", 400]])
+        pipeline = self.pipeline()
+        pipeline.run()
+        self.assertEqual(pipeline.place(), 2)
+        self.assertEqual(image_size(os.path.join(self.public, "images", "big-200w.png")), (200, 50))
+        self.assertEqual(pipeline.place(), 0)
+
+    def test_cached_by_source_and_options(self):
+        cache = os.path.join(self.root, "cache")
+        self.pipeline().run()
+        entries = set(os.listdir(cache))
+        self.pipeline().run()
+        self.assertEqual(set(os.listdir(cache)), entries)
+        ImagePipeline(self.static, self.public, cache, (100,)).run()
+        self.assertEqual(len(os.listdir(cache)), len(entries) + 1)
+
+    def test_bad_images_are_reported_and_skipped(self):
+        # a PNG cut off inside its header, and one Pillow cannot decode
+        self.write(os.path.join(self.static, "images", "cut.png"), b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR\x00\x00")
+        self.write(os.path.join(self.static, "images", "corrupt.png"), png_bytes(300, 10)[:40])
+
+        class BrokenImage:
+            LANCZOS = None
+
+            @staticmethod
+            def open(path):
+                raise OSError(f"cannot identify image file {path!r}")
+
+        with mock.patch.object(image_pipeline, "Image", BrokenImage):
+            pipeline = self.pipeline()
+            with redirect_stderr(io.StringIO()) as err:
+                images = pipeline.run()
+        self.assertEqual(sorted(os.path.basename(path) for path, _ in pipeline.errors), ["big.png", "corrupt.png", "cut.png"])
+        self.assertIn("cut.png", err.getvalue())
+        # the header still gives the size of a file Pillow cannot read
+        self.assertEqual(images.get("/images/corrupt.png"), {"width": 300, "height": 10, "srcset": []})
+        self.assertIsNone(images.get("/images/cut.png"))
+        self.assertEqual(pipeline.outputs, {})
+        # failures are not cached
+        self.assertEqual(os.listdir(os.path.join(self.root, "cache")), [])
+
+    def test_img_tags_get_size_and_srcset(self):
+        images = ImageVariants({"/images/a.png": {"width": 800, "height": 600, "srcset": [["/images/a-400w.png", 400], ["/images/a.png", 800]]}})
+        blocks = list(iter_markdown_blocks("![a](/images/a.png) ![b](/images/b.png)"))
+        html = blocks_to_html_node(blocks, "/site/", None, images).to_html()
+        self.assertEqual(html, '<div><p><img src="/site/images/a.png" alt="a" width="800" height="600" srcset="/site/images/a-400w.png 400w, /site/images/a.png 800w"></img> <img src="/site/images/b.png" alt="b"></img></p></div>')
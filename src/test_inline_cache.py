@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from inline_cache import InlineCache
+from textnode import TextNode, TextType
+from utilities import set_inline_cache, text_to_children, text_to_textnodes
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        set_inline_cache(None)
+
+    def test_lru_eviction_and_stats(self):
+        cache = InlineCache(maxsize=2)
+        cache.put("a", [TextNode("a", TextType.TEXT)])
+        cache.put("b", [TextNode("b", TextType.TEXT)])
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", [TextNode("c", TextType.TEXT)])
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "entries": 2, "maxsize": 2})
+
+    def test_text_to_textnodes_uses_cache(self):
+        cache = InlineCache(maxsize=10)
+        set_inline_cache(cache)
+        text = "a **bold** [link](/x)"
+        first = text_to_textnodes(text)
+        second = text_to_textnodes(text)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        # html nodes are rebuilt per call, so base path rewrites can't leak
+        self.assertIsNot(text_to_children(text)[3], text_to_children(text)[3])
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "inline_cache.json")
+            cache = InlineCache(maxsize=10, path=path)
+            set_inline_cache(cache)
+            text_to_textnodes("![img](/a.png) and _it_")
+            cache.save()
+
+            loaded = InlineCache.load(path, maxsize=10)
+            self.assertEqual(
+                list(loaded.get("![img](/a.png) and _it_")),
+                [TextNode("img", TextType.IMAGE, "/a.png"), TextNode(" and ", TextType.TEXT), TextNode("it", TextType.ITALIC)],
+            )
+
+            with open(path, "w") as f:
+                f.write('{"version": -1, "entries": [["x", []]]}')
+            self.assertEqual(len(InlineCache.load(path).entries), 0)
+
+    def test_worker_updates(self):
+        worker = InlineCache(maxsize=10)
+        worker.start_worker()
+        worker.put("x", [TextNode("x", TextType.TEXT)])
+        worker.get("x")
+        parent = InlineCache(maxsize=10)
+        parent.apply_worker_update(worker.take_worker_update())
+        self.assertEqual(list(parent.get("x")), [TextNode("x", TextType.TEXT)])
+        self.assertEqual(worker.take_worker_update(), {"entries": [], "hits": 0, "misses": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
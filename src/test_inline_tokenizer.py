@@ -0,0 +1,70 @@
+import random
+import unittest
+
+from inline_tokenizer import tokenize_inline
+from textnode import TextNode, TextType
+from utilities import split_nodes_bold, split_nodes_code, split_nodes_image, split_nodes_italics, split_nodes_link
+
+
+def chained_splitters(text: str) -> list[TextNode]:
+    # the reference behaviour: every splitter applied in turn to the whole list
+    nodes = [TextNode(text, TextType.TEXT)]
+    for split in (split_nodes_image, split_nodes_link, split_nodes_bold, split_nodes_italics, split_nodes_code):
+        nodes = split(nodes)
+    return nodes
+
+
+FRAGMENTS = [
+    "word", " ", "  ", "**", "_", "`", "[", "]", "(", ")", "!", "![", "](",
+    "**bold**", "_italic_", "`code`", "[link](https://boot.dev)", "![alt](/images/a.png)",
+    "[a **b** c](/x)", "**a _b_ c**", "`a_b_c`", "![x](y)[l](u)", "_a [l](u) b_", "é",
+]
+
+
+class TestInlineTokenizer(unittest.TestCase):
+    def assertMatchesChained(self, text):
+        self.assertListEqual(tokenize_inline(text), chained_splitters(text), msg=repr(text))
+
+    def test_plain_and_empty_text(self):
+        self.assertListEqual(tokenize_inline(""), [TextNode("", TextType.TEXT)])
+        self.assertListEqual(tokenize_inline("just words"), [TextNode("just words", TextType.TEXT)])
+
+    def test_each_kind(self):
+        for text in ["a **b** c", "a _b_ c", "a `b` c", "a [b](c) d", "a ![b](c) d", "****", "[]()", "![]()"]:
+            self.assertMatchesChained(text)
+
+    def test_nesting_keeps_inner_markup_literal(self):
+        self.assertListEqual(
+            tokenize_inline("[a **b** c](/x) and **d _e_ f**"),
+            [
+                TextNode("a **b** c", TextType.LINK, "/x"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("d _e_ f", TextType.BOLD),
+            ],
+        )
+        # earlier rules split the text before later ones see it
+        self.assertListEqual(
+            tokenize_inline("**a [b](c) d** e**"),
+            [
+                TextNode("**a ", TextType.TEXT),
+                TextNode("b", TextType.LINK, "c"),
+                TextNode(" d", TextType.TEXT),
+                TextNode(" e", TextType.BOLD),
+            ],
+        )
+        self.assertMatchesChained("`a_b_c`")
+        self.assertMatchesChained("![x](y)[l](u)")
+
+    def test_unbalanced_markers(self):
+        for text in ["**open", "a_b", "`tick", "[text](url", "![alt(x.png)", "!alt](x.png)", "[a] (b)"]:
+            self.assertMatchesChained(text)
+
+    def test_matches_chained_splitters_on_random_text(self):
+        rng = random.Random(1234)
+        for _ in range(3000):
+            text = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 12)))
+            self.assertMatchesChained(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+import unittest
+
+from memory_budget import describe_peak_rss, peak_rss, resource
+
+
+@unittest.skipIf(resource is None, "needs the resource module")
+class TestMemoryBudget(unittest.TestCase):
+    def test_limit_turns_into_memory_error(self):
+        # run in a child so the limit never touches the test process
+        code = (
+            "from memory_budget import apply_memory_limit, restore_memory_limit\n"
+            "previous = apply_memory_limit(512 * 1024 * 1024)\n"
+            "try:\n"
+            "    bytearray(1024 * 1024 * 1024)\n"
+            "except MemoryError:\n"
+            "    print('limited')\n"
+            "restore_memory_limit(previous)\n"
+            "bytearray(1024 * 1024 * 1024)\n"
+            "print('restored')\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=sys.path[0] if sys.path[0] else None)
+        self.assertEqual(result.stdout.split(), ["limited", "restored"])
+
+    def test_peak_rss(self):
+        own, _ = peak_rss()
+        self.assertGreater(own, 1024 * 1024)
+        self.assertTrue(describe_peak_rss().startswith("peak RSS: "))
@@ -0,0 +1,92 @@
+import os
+import stat
+import unittest
+
+from generate_content import generate_pages, set_output_writer
+import output_writer
+from output_writer import OutputWriter, write_atomic
+from tempdir_test_case import TempDirTestCase
+
+
+class TestOutputWriter(TempDirTestCase):
+    def tearDown(self):
+        set_output_writer(None)
+
+    def read_bytes(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_write_atomic_replaces_and_skips_identical(self):
+        path = os.path.join(self.root, "page.html")
+        self.assertTrue(write_atomic(path, b"one"))
+        os.utime(path, (1000, 1000))
+        self.assertFalse(write_atomic(path, b"one"))
+        self.assertEqual(os.path.getmtime(path), 1000)
+        self.assertTrue(write_atomic(path, b"two"))
+        self.assertEqual(self.read_bytes(path), b"two")
+        self.assertEqual(os.listdir(self.root), ["page.html"])
+
+    def test_write_atomic_mode_follows_umask_and_existing_file(self):
+        path = os.path.join(self.root, "page.html")
+        write_atomic(path, b"one")
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o666 & ~output_writer._umask)
+        os.chmod(path, 0o600)
+        write_atomic(path, b"two")
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_writer_creates_directories_and_counts(self):
+        writer = OutputWriter(threads=2, max_pending=2)
+        for i in range(10):
+            writer.submit(os.path.join(self.root, f"dir{i % 3}", f"{i}.html"), f"page {i}".encode())
+        self.assertEqual(writer.flush(), [])
+        writer.submit(os.path.join(self.root, "dir0", "0.html"), b"page 0")
+        self.assertEqual(writer.close(), [])
+        self.assertEqual(self.read_bytes(os.path.join(self.root, "dir1", "4.html")), b"page 4")
+        self.assertEqual((writer.written, writer.skipped), (10, 1))
+
+    def test_flush_reports_failed_writes(self):
+        blocker = os.path.join(self.root, "blocker")
+        with open(blocker, "w") as f:
+            f.write("not a directory")
+        writer = OutputWriter(threads=1)
+        writer.submit(os.path.join(blocker, "page.html"), b"x")
+        errors = writer.close()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0][0], os.path.join(blocker, "page.html"))
+
+    def test_generate_pages_through_writer(self):
+        content = os.path.join(self.root, "content")
+        public = os.path.join(self.root, "public")
+        template = self.write(os.path.join(self.root, "template.html"), "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.write(os.path.join(content, "index.md"), "# Home\n\n[post](/blog/post)")
+        self.write(os.path.join(content, "blog", "post.md"), "# Post\n\nfirst")
+
+        generate_pages(content, template, public, "/site/")
+        expected = {
+            "index.html": self.read_bytes(os.path.join(public, "index.html")),
+            "blog/post.html": self.read_bytes(os.path.join(public, "blog", "post.html")),
+        }
+        set_output_writer(OutputWriter(threads=2))
+        for workers in (1, 2):
+            errors = generate_pages(content, template, os.path.join(self.root, f"out{workers}"), "/site/", workers)
+            self.assertEqual(errors, [])
+            for name, data in expected.items():
+                self.assertEqual(self.read_bytes(os.path.join(self.root, f"out{workers}", name)), data)
+
+    def test_worker_write_errors_name_the_page(self):
+        content = os.path.join(self.root, "content")
+        public = os.path.join(self.root, "public")
+        template = self.write(os.path.join(self.root, "template.html"), "<body>{{ Content }}</body>")
+        for name in ("a", "b", "c", "d"):
+            self.write(os.path.join(content, f"{name}.md"), f"# {name}\n\ntext")
+        # a directory where c.html belongs makes its write fail
+        os.makedirs(os.path.join(public, "c.html"))
+        set_output_writer(OutputWriter(threads=2))
+        errors = generate_pages(content, template, public, "/", 2)
+        self.assertEqual([from_path for from_path, _ in errors], [os.path.join(content, "c.md")])
+        self.assertTrue(errors[0][1].startswith("write failed: "))
+        self.assertTrue(os.path.isfile(os.path.join(public, "d.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import unittest
+
+from page_template import CompiledTemplate, load_template
+from tempdir_test_case import TempDirTestCase
+from utilities import markdown_to_html_node, rewrite_base_path
+
+TEMPLATE = '<head><title> {{ Title }} </title><link href="/index.css"></head><body>{{ Content }}<img src="/logo.png"></body>'
+
+
+class TestPageTemplate(TempDirTestCase):
+    def test_compiled_segments(self):
+        template = CompiledTemplate(TEMPLATE, "/site/")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(len(template.segments), 3)
+        self.assertEqual(template.segments[0], "<head><title> ")
+        self.assertIn('href="/site/index.css"', template.segments[1])
+        self.assertIn('src="/site/logo.png"', template.segments[2])
+
+    def test_render_matches_str_replace(self):
+        title, content = "My Page", "<p>hello</p>"
+        expected = TEMPLATE.replace("{{ Title }}", title).replace("{{ Content }}", content)
+        expected = expected.replace('href="/', 'href="/site/').replace('src="/', 'src="/site/')
+        self.assertEqual(CompiledTemplate(TEMPLATE, "/site/").render(title, content), expected)
+
+    def test_minified_template(self):
+        source = """<!DOCTYPE html>
+<html>
+<!-- layout -->
+<head>
+    <title> {{ Title }} </title>
+    <link href="/index.css" rel="stylesheet" type="text/css" />
+    <script type="text/javascript">
+      let  x = 1;
+    </script>
+</head>
+<body>
+    <article>
+        {{ Content }}
+    </article>
+    <p>Made   with <b>care</b> </p>
+</body>
+</html>
+"""
+        template = CompiledTemplate(source, "/site/", minify=True)
+        self.assertEqual(
+            template.render("My  Page", "<p>x</p>"),
+            "<!DOCTYPE html><html><head><title>My Page</title><link href=/site/index.css rel=stylesheet>"
+            "<script>\n      let  x = 1;\n    </script></head><body><article><p>x</p></article>"
+            "<p>Made with <b>care</b></p></body></html>",
+        )
+
+    def test_repeated_and_missing_slots(self):
+        template = CompiledTemplate("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render("t", "c"), "t|t")
+        self.assertEqual(CompiledTemplate("static").render("t", "c"), "static")
+
+    def test_load_template_is_cached_by_mtime(self):
+        path = self.write(os.path.join(self.root, "template.html"), TEMPLATE)
+        first = load_template(path, "/")
+        self.assertIs(load_template(path, "/"), first)
+        self.assertIsNot(load_template(path, "/site/"), first)
+
+        self.write(path, "<main>{{ Content }}</main>", mtime_ns=1)
+        self.assertEqual(load_template(path, "/").render("t", "c"), "<main>c</main>")
+
+    def test_base_path_skips_code_blocks(self):
+        md = '[home](/) ![logo](/logo.png) [ext](https://boot.dev)\n\n```\n<a href="/raw">\n```'
+        node = markdown_to_html_node(md)
+        rewrite_base_path(node, "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><a href="/site/">home</a> <img src="/site/logo.png" alt="logo"></img> <a href="https://boot.dev">ext</a></p>'
+            '<pre><code><a href="/raw">\n</code></pre></div>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
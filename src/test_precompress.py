@@ -0,0 +1,74 @@
+import gzip
+import os
+import unittest
+
+from precompress import Precompressor
+from tempdir_test_case import TempDirTestCase
+
+
+class TestPrecompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.root, "public")
+        os.makedirs(os.path.join(self.public, "blog"))
+        self.page = os.path.join(self.public, "blog", "index.html")
+        self.write(self.page, "<p>hello</p>" * 500)
+        self.write(os.path.join(self.public, "small.css"), "body {}")
+        self.write(os.path.join(self.public, "image.png"), "x" * 5000)
+
+    def outputs(self):
+        # what a build reports it produced
+        paths = []
+        for dir_name, _, filenames in os.walk(self.public):
+            paths.extend(os.path.join(dir_name, filename) for filename in filenames if not filename.endswith(".gz"))
+        return paths
+
+    def precompressor(self, **options):
+        return Precompressor(os.path.join(self.root, "precompress.json"), ("gzip",), **options)
+
+    def test_compresses_text_outputs_over_threshold(self):
+        counts = self.precompressor().run(self.public, self.outputs())
+        self.assertEqual(counts, {"compressed": 2, "unchanged": 0, "removed": 0})
+        with gzip.open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), b"<p>hello</p>" * 500)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "small.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "image.png.gz")))
+
+    def test_only_changed_files_are_recompressed(self):
+        self.precompressor().run(self.public, self.outputs())
+        mtime = os.stat(self.page + ".gz").st_mtime_ns
+        self.assertEqual(self.precompressor().run(self.public, self.outputs())["compressed"], 0)
+        # same bytes under a new mtime are hashed, not recompressed
+        os.utime(self.page, (1000, 1000))
+        self.assertEqual(self.precompressor().run(self.public, self.outputs())["compressed"], 0)
+        self.assertEqual(os.stat(self.page + ".gz").st_mtime_ns, mtime)
+        self.write(self.page, "<p>changed</p>" * 500)
+        self.assertEqual(self.precompressor().run(self.public, self.outputs())["compressed"], 1)
+        with gzip.open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), b"<p>changed</p>" * 500)
+
+    def test_poor_ratio_and_removed_files(self):
+        incompressible = os.path.join(self.public, "data.json")
+        with open(incompressible, "wb") as f:
+            f.write(os.urandom(4096))
+        precompressor = self.precompressor()
+        precompressor.run(self.public, self.outputs())
+        self.assertFalse(os.path.exists(incompressible + ".gz"))
+        self.assertTrue(precompressor.is_sibling(os.path.normpath(self.page + ".gz")))
+
+        os.remove(self.page)
+        counts = self.precompressor().run(self.public, self.outputs())
+        self.assertEqual(counts["removed"], 1)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_only_given_paths_are_looked_at(self):
+        precompressor = self.precompressor()
+        self.assertEqual(precompressor.update([self.page])["compressed"], 1)
+        # files the build did not produce are neither compressed nor dropped
+        other = self.write(os.path.join(self.public, "other.html"), "<p>other</p>" * 500)
+        counts = precompressor.update([self.page], removed=[os.path.join(self.public, "gone.html")])
+        self.assertEqual(counts, {"compressed": 0, "unchanged": 1, "removed": 0})
+        self.assertFalse(os.path.exists(other + ".gz"))
+        os.remove(self.page)
+        self.assertEqual(precompressor.update([], removed=[self.page])["removed"], 1)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
@@ -0,0 +1,85 @@
+import json
+import os
+import unittest
+
+from block_scanner import iter_markdown_blocks
+from file_utilities import sync_folder_structure
+from generate_content import collect_pages, generate_pages, set_search_index
+from search_index import SearchIndex, decode_postings, encode_postings, page_document
+from tempdir_test_case import TempDirTestCase
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[< Back](/)\n\nWelcome to the **Shire**, home of hobbits and second breakfast.")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n- shire\n- Zebra\n\n```\ncode words\n```")
+
+    def tearDown(self):
+        set_search_index(None)
+
+    def read_json(self, name):
+        with open(os.path.join(self.public, "search", name)) as f:
+            return json.load(f)
+
+    def test_postings_round_trip(self):
+        postings = [(0, [3, 7, 20]), (4, [0]), (9, [1, 2])]
+        encoded = encode_postings(postings)
+        self.assertEqual(encoded, [0, 3, 3, 4, 13, 4, 1, 0, 5, 2, 1, 1])
+        self.assertEqual(decode_postings(encoded), postings)
+
+    def test_page_document(self):
+        blocks = iter_markdown_blocks("# Big Title\n\n[< Back](/)\n\nA paragraph that is long enough to become the snippet.\n\n- one *two*")
+        document = page_document(blocks, "Big Title")
+        self.assertEqual(document["snippet"], "A paragraph that is long enough to become the snippet.")
+        self.assertEqual(document["terms"]["big"], [0])
+        self.assertEqual(document["terms"]["back"], [2])
+        self.assertEqual(document["terms"]["two"], [14])
+        self.assertNotIn("#", document["terms"])
+
+    def test_build_writes_shards(self):
+        for workers in (1, 2):
+            index = SearchIndex(os.path.join(self.root, "cache"), self.public, "/site/")
+            set_search_index(index)
+            self.assertEqual(generate_pages(self.content, self.template, self.public, "/site/", workers), [])
+            manifest = index.finish(sorted([
+                (os.path.join(self.content, "blog", "post.md"), os.path.join(self.public, "blog", "post.html")),
+                (os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html")),
+            ]))
+            self.assertEqual(manifest["pages"], 2)
+            pages = self.read_json("pages.json")
+            self.assertEqual(pages[0][:2], ["/site/blog/post.html", "Post"])
+            self.assertEqual(pages[1][2], "Welcome to the Shire, home of hobbits and second breakfast.")
+            shire = decode_postings(self.read_json("terms-s.json")["shire"])
+            self.assertEqual([page_id for page_id, _ in shire], [0, 1])
+            self.assertIn("code", self.read_json("terms-c.json"))
+            self.assertFalse(os.path.exists(os.path.join(self.root, "cache", "spool")))
+
+    def test_outputs_survive_a_static_sync(self):
+        index = SearchIndex(os.path.join(self.root, "cache"), self.public, "/")
+        self.assertEqual(index.outputs(), [])
+        index.finish(collect_pages(self.content, self.public))
+        outputs = index.outputs()
+        self.assertIn(os.path.normpath(os.path.join(self.public, "search", "pages.json")), outputs)
+        static = os.path.join(self.root, "static")
+        self.write(os.path.join(static, "index.css"), "body {}")
+        counts = sync_folder_structure(static, self.public, preserve=set(outputs).__contains__)
+        self.assertEqual(counts["removed"], 0)
+        self.assertEqual(sorted(index.outputs()), sorted(outputs))
+
+    def test_finish_indexes_unrendered_pages_and_drops_stale_shards(self):
+        index = SearchIndex(os.path.join(self.root, "cache"), self.public, "/")
+        index.finish([(os.path.join(self.content, "blog", "post.md"), os.path.join(self.public, "blog", "post.html"))])
+        self.assertIn("zebra", self.read_json("terms-z.json"))
+        # compressed siblings are left to the precompress stage
+        self.write(os.path.join(self.public, "search", "terms-p.json.gz"), b"gz")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nonly apples")
+        manifest = index.finish([(os.path.join(self.content, "blog", "post.md"), os.path.join(self.public, "blog", "post.html"))])
+        self.assertNotIn("z", manifest["shards"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search", "terms-z.json")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "search", "terms-p.json.gz")))
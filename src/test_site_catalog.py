@@ -0,0 +1,87 @@
+import os
+import unittest
+
+from generate_content import collect_pages, generate_pages, set_site_catalog
+from site_catalog import SiteCatalog, entry_date
+from tempdir_test_case import TempDirTestCase
+
+
+class TestSiteCatalog(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        self.catalog_path = os.path.join(self.root, "cache", "catalog.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.write(os.path.join(self.content, "index.md"), "# Home & Hearth\n\nWelcome to the Shire, home of hobbits and second breakfast.")
+        for number, day in ((1, 1), (2, 2), (3, 3)):
+            path = os.path.join(self.content, "blog", f"post{number}.md")
+            self.write(path, f"# Post {number}\n\n[< Back](/)\n\nThe story of post number {number}, told at some length for the summary.")
+            os.utime(path, (86400 * day, 86400 * day))
+
+    def tearDown(self):
+        set_site_catalog(None)
+
+    def read_output(self, *parts):
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def build(self, workers=1):
+        catalog = SiteCatalog.load(self.catalog_path, self.public, "/site/", "https://example.org/", "blog", 2)
+        set_site_catalog(catalog)
+        self.assertEqual(generate_pages(self.content, self.template, self.public, "/site/", workers), [])
+        counts = catalog.finish(collect_pages(self.content, self.public), self.template)
+        catalog.save()
+        return catalog, counts
+
+    def test_outputs_from_one_pass(self):
+        for workers in (1, 2):
+            catalog, counts = self.build(workers)
+            self.assertEqual(len(catalog.entries), 4)
+        sitemap = self.read_output("sitemap.xml")
+        self.assertIn("<loc>https://example.org/site/blog/post1.html</loc><lastmod>1970-01-02</lastmod>", sitemap)
+        self.assertIn("<loc>https://example.org/site/blog/page/2/</loc>", sitemap)
+        feed = self.read_output("blog", "feed.xml")
+        self.assertIn("<title>Home &amp; Hearth</title>", feed)
+        self.assertLess(feed.index("post3.html"), feed.index("post1.html"))
+        self.assertIn("<summary>The story of post number 2, told at some length for the summary.</summary>", feed)
+        first = self.read_output("blog", "index.html")
+        self.assertIn('<a href="/site/blog/post3.html">Post 3</a>', first)
+        self.assertIn('<a href="/site/blog/page/2/">Older posts</a>', first)
+        self.assertNotIn("post1.html", first)
+        self.assertIn('<a href="/site/blog/">Newer posts</a>', self.read_output("blog", "page", "2", "index.html"))
+
+    def test_entry_dates_are_utc(self):
+        self.assertEqual(entry_date("2024-03-05", 0), "2024-03-05T00:00:00Z")
+        self.assertEqual(entry_date("2024-03-05 14:30", 0), "2024-03-05T14:30:00Z")
+        self.assertEqual(entry_date("2024-03-05T14:30:15+02:00", 0), "2024-03-05T12:30:15Z")
+        self.assertEqual(entry_date("2024-03-05T14:30:15Z", 0), "2024-03-05T14:30:15Z")
+        self.assertEqual(entry_date(None, 86400 * 10**9), "1970-01-02T00:00:00Z")
+        with self.assertRaises(ValueError):
+            entry_date("March 5th", 0)
+
+    def test_unreadable_date_falls_back_to_mtime(self):
+        path = os.path.join(self.content, "blog", "post2.md")
+        self.write(path, "---\ndate: last tuesday\n---\n# Post 2\n\nThe story of post number 2.", mtime_ns=86400 * 2 * 10**9)
+        catalog, _ = self.build()
+        self.assertEqual(catalog.entries[os.path.normpath(path)]["date"], "1970-01-03T00:00:00Z")
+
+    def test_only_changed_outputs_are_rewritten(self):
+        self.build()
+        _, counts = self.build()
+        self.assertEqual(counts, {"written": 0, "unchanged": 4, "removed": 0})
+
+        # a new post shifts every index page and the feed
+        path = os.path.join(self.content, "blog", "post4.md")
+        self.write(path, "# Post 4\n\nA fourth post with enough words to be its own summary.")
+        os.utime(path, (86400 * 4, 86400 * 4))
+        _, counts = self.build()
+        self.assertEqual(counts, {"written": 4, "unchanged": 0, "removed": 0})
+
+        os.remove(path)
+        os.remove(os.path.join(self.content, "blog", "post3.md"))
+        _, counts = self.build()
+        self.assertEqual(counts["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "page", "2", "index.html")))
@@ -0,0 +1,76 @@
+import json
+import os
+import unittest
+
+from block_cache import BlockCache
+from dependency_graph import DependencyGraph
+from generate_content import generate_page, set_dependency_graph
+from site_validator import check_url, output_path_index, validate_site
+from tempdir_test_case import TempDirTestCase
+from utilities import set_block_cache
+
+
+class TestSiteValidator(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.root, "public")
+        for path in ("index.html", "blog/tom/index.html", "images/tom.png", "index.css"):
+            self.write(os.path.join(self.public, path), "")
+        self.page = self.write(os.path.join(self.root, "content", "index.md"), "---\ntitle: Home\n---\n# Home\n\n[tom](/blog/tom) [gone](/blog/gone) [out](https://example.org) [anchor](#top)\n\n![tom](/images/tom.png) ![nope](images/nope.png)\n\n```\n[in code](/ignored)\n```")
+
+    def test_path_index(self):
+        self.assertEqual(output_path_index(self.public), {"index.html", "blog/tom/index.html", "images/tom.png", "index.css"})
+
+    def test_check_url_applies_the_base_path(self):
+        index = output_path_index(self.public)
+        self.assertEqual(check_url("/blog/tom", "/site/", "/index.html", index), ("/site/blog/tom", None))
+        # already carrying the base path, so the rewrite doubles it
+        self.assertEqual(check_url("/site/blog/tom", "/site/", "/index.html", index), ("/site/site/blog/tom", "missing"))
+        self.assertEqual(check_url("../index.css", "/site/", "/blog/tom/index.html", index), ("../index.css", "missing"))
+        self.assertEqual(check_url("../../index.css", "/site/", "/blog/tom/index.html", index), ("../../index.css", None))
+        self.assertIsNone(check_url("mailto:a@b.c", "/site/", "/index.html", index))
+
+    def tearDown(self):
+        set_dependency_graph(None)
+        set_block_cache(None)
+
+    def render(self, graph, block_cache=None):
+        # records the page's references the way a build does
+        set_dependency_graph(graph)
+        set_block_cache(block_cache)
+        template = self.write(os.path.join(self.root, "template.html"), "<title>{{ Title }}</title>{{ Content }}")
+        generate_page(self.page, template, os.path.join(self.public, "index.html"), "/site/")
+
+    def test_report(self):
+        report_path = os.path.join(self.root, "report.json")
+        pages = [(self.page, os.path.join(self.public, "index.html"))]
+        graph = DependencyGraph()
+        self.render(graph)
+        for workers in (1, 2):
+            report = validate_site(pages, self.public, "/site/", graph, workers, report_path)
+            with open(report_path) as f:
+                self.assertEqual(json.load(f), report)
+            self.assertEqual((report["checked"], report["external"]), (4, 2))
+            self.assertEqual([(item["kind"], item["url"], item["served"]) for item in report["broken"]], [
+                ("link", "/blog/gone", "/site/blog/gone"),
+                ("image", "images/nope.png", "images/nope.png"),
+            ])
+
+        # a page that did not render was reported by the build already
+        report = validate_site(pages, self.public, "/site/", DependencyGraph(), 1)
+        self.assertEqual((report["pages"], report["broken"]), (0, []))
+
+    def test_block_cache_hits_record_the_same_references(self):
+        block_cache = BlockCache()
+        recorded = []
+        for _ in range(2):
+            graph = DependencyGraph()
+            self.render(graph, block_cache)
+            recorded.append(graph.pages[os.path.normpath(self.page)])
+        self.assertGreater(block_cache.hits, 0)
+        self.assertEqual(recorded[0], recorded[1])
+        self.assertEqual((recorded[0]["links"], recorded[0]["images"]), (["/blog/tom", "/blog/gone", "https://example.org", "#top"], ["/images/tom.png", "images/nope.png"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
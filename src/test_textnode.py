@@ -14,6 +14,11 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.ITALIC)
         self.assertNotEqual(node, node2)
 
+    def test_repr_and_slots(self):
+        node = TextNode("text", TextType.LINK, "/x")
+        self.assertEqual(repr(node), "TextNode('text', <TextType.LINK: 'link'>, '/x')")
+        self.assertFalse(hasattr(node, "__dict__"))
+
     def test_valid_default_url(self):
         node = TextNode("This is a text node", TextType.LINK)
         self.assertEqual(node.url, None)
@@ -3,6 +3,8 @@ import json
 from utilities import *
 from htmlnode import HtmlNode, ParentNode, LeafNode
 from textnode import TextNode, TextType
+from block_cache import BlockCache
+from block_scanner import iter_markdown_blocks
 
 class TestUtilities(unittest.TestCase):
     def test_text(self):
@@ -375,6 +377,24 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_code_with_blank_lines(self):
+        md = """
+```
+first line
+
+second line
+```
+
+after
+"""
+
+        self.assertEqual(markdown_to_blocks(md), ["```\nfirst line\n\nsecond line\n```", "after"])
+        node = markdown_to_html_node(md)
+        self.assertEqual(
+            node.to_html(),
+            "<div><pre><code>first line\n\nsecond line\n</code></pre><p>after</p></div>",
+        )
+
         
 
 
@@ -383,4 +403,19 @@ the **same** even with inline stuff
 
         
 
-        
\ No newline at end of file
+        
+
+    def test_references_are_recorded_while_rendering(self):
+        blocks = list(iter_markdown_blocks("[a](/x) ![i](/i.png)\n\n```\n[b](/y)\n```\n\n- [c](/z)"))
+        expected = (["/x", "/z"], ["/i.png"])
+        references = ([], [])
+        blocks_to_html_node(blocks, "/site/", references=references)
+        # recorded as written, before the base path rewrite
+        self.assertEqual(references, expected)
+        # a block cache hit gives back HTML, and the same references
+        block_cache = BlockCache()
+        for _ in range(2):
+            references = ([], [])
+            blocks_to_html_node(blocks, "/site/", block_cache, references=references)
+            self.assertEqual(references, expected)
+        self.assertEqual(block_cache.hits, 3)
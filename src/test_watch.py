@@ -0,0 +1,115 @@
+import gzip
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from generate_content import set_output_writer
+from output_writer import OutputWriter
+from precompress import Precompressor
+from watch import SiteWatcher
+from tempdir_test_case import TempDirTestCase
+
+
+class TestSiteWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, "<body>{{ Content }}</body>")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nhome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\npost")
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.public, "/")
+        self.watcher.regenerate(sorted(self.watcher.pages.items()))
+        self.reset_outputs()
+
+    def reset_outputs(self):
+        for dir_name, _, filenames in os.walk(self.public):
+            for filename in filenames:
+                os.utime(os.path.join(dir_name, filename), ns=(0, 0))
+
+    def output_mtime(self, *parts):
+        return os.stat(os.path.join(self.public, *parts)).st_mtime_ns
+
+    def test_no_changes(self):
+        self.assertFalse(self.watcher.poll_once())
+
+    def test_markdown_change_regenerates_only_that_page(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nedited", mtime_ns=10**18)
+        self.assertTrue(self.watcher.poll_once())
+        self.assertNotEqual(self.output_mtime("blog", "post.html"), 0)
+        self.assertEqual(self.output_mtime("index.html"), 0)
+
+    def test_template_change_regenerates_everything(self):
+        self.write(self.template, "<main>{{ Content }}</main>", mtime_ns=10**18)
+        self.assertTrue(self.watcher.poll_once())
+        self.assertNotEqual(self.output_mtime("blog", "post.html"), 0)
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertTrue(f.read().startswith("<main>"))
+
+    def test_new_and_removed_pages(self):
+        self.write(os.path.join(self.content, "blog", "new.md"), "# New\n\nnew")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.watcher.poll_once()
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "new.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+
+    def test_bad_edit_is_not_fatal(self):
+        self.write(os.path.join(self.content, "index.md"), "no title", mtime_ns=10**18)
+        self.assertTrue(self.watcher.poll_once())
+        self.assertEqual(self.output_mtime("index.html"), 0)
+
+    def test_static_files_are_copied(self):
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.watcher.poll_once()
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body {}")
+        os.remove(os.path.join(self.static, "index.css"))
+        self.watcher.poll_once()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+
+    def test_hardlinked_static_files_are_replaced(self):
+        source = self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.watcher.link_mode = "hardlink"
+        self.watcher.poll_once()
+        self.write(source, "main {}", mtime_ns=10**18)
+        # the dest is the edited source's own inode, a plain copy would fail
+        self.watcher.poll_once()
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "main {}")
+
+    def test_failed_writes_are_reported(self):
+        writer = OutputWriter(threads=1)
+        set_output_writer(writer)
+        self.addCleanup(set_output_writer, None)
+        self.addCleanup(writer.close)
+        dest = os.path.join(self.public, "index.html")
+        os.remove(dest)
+        os.makedirs(dest)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nedited", mtime_ns=10**18)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.watcher.poll_once()
+        self.assertIn(f"error rendering {os.path.join(self.content, 'index.md')}: write failed", out.getvalue())
+
+    def test_siblings_follow_edits_and_removals(self):
+        self.watcher.precompressor = Precompressor(os.path.join(self.root, "precompress.json"), ("gzip",), min_size=1)
+        page = os.path.join(self.content, "index.md")
+        style = self.write(os.path.join(self.static, "index.css"), "body { color: red }" * 10)
+        self.write(page, "# Home\n\n" + "first " * 100, mtime_ns=10**18)
+        self.watcher.poll_once()
+        self.write(page, "# Home\n\n" + "second " * 100, mtime_ns=2 * 10**18)
+        self.watcher.poll_once()
+        with gzip.open(os.path.join(self.public, "index.html.gz"), "rt") as f:
+            self.assertIn("second", f.read())
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.css.gz")))
+        os.remove(style)
+        self.watcher.poll_once()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
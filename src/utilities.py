@@ -1,5 +1,7 @@
-from htmlnode import HtmlNode, ParentNode, LeafNode
+from htmlnode import HtmlNode, ParentNode, LeafNode, RawNode
 from textnode import TextNode, TextType, BlockType
+from inline_tokenizer import tokenize_inline
+from block_scanner import classify_lines, iter_markdown_blocks
 import re
 
 def text_node_to_html_node(text_node: TextNode):
@@ -101,85 +103,164 @@ def split_nodes_decorator(func):
         return func(old_nodes)
     return wrapper
 
-def text_to_textnodes(text: str) -> list[TextNode]:
-    nodes = [TextNode(text, TextType.TEXT)]
-    new_nodes = nodes.copy()
-    map = {
-        TextType.IMAGE: split_nodes_image,
-        TextType.LINK: split_nodes_link,
-        TextType.BOLD: split_nodes_bold,
-        TextType.ITALIC: split_nodes_italics,
-        TextType.CODE: split_nodes_code,
-    }
-    for k, v in map.items():
-        type: TextType = k
-        new_nodes = v(new_nodes)
-        # func = v
-        # new_nodes = split_nodes_decorator(v)(new_nodes)
-        # print(f"type: {type}")
-        # print("new_nodes:", new_nodes)
+# optional inline_cache.InlineCache consulted by text_to_textnodes, and
+# block_cache.BlockCache the build passes to markdown_to_html_node
+_inline_cache = None
+_block_cache = None
+_image_variants = None
+# optional ast_cache.AstCache of parsed page trees
+_ast_cache = None
 
-    return new_nodes
+def set_inline_cache(cache):
+    global _inline_cache
+    _inline_cache = cache
 
-def markdown_to_blocks(markdown: str) -> list[str]:
-    uncleaned_blocks: list[str] = markdown.split("\n\n")
-    blocks = []
-    for block in uncleaned_blocks:
-        cleaned_block = clean_block(block)
-        if cleaned_block:
-            blocks.append(cleaned_block)
+def get_inline_cache():
+    return _inline_cache
+
+def set_block_cache(cache):
+    global _block_cache
+    _block_cache = cache
+
+def get_block_cache():
+    return _block_cache
 
-    return blocks
+def set_image_variants(images):
+    global _image_variants
+    _image_variants = images
+
+def get_image_variants():
+    return _image_variants
+
+def set_ast_cache(cache):
+    global _ast_cache
+    _ast_cache = cache
+
+def get_ast_cache():
+    return _ast_cache
+
+def text_to_textnodes(text: str) -> list[TextNode]:
+    # tokenizes spans of the original text instead of chaining the
+    # split_nodes_image/_link/_bold/_italics/_code passes over node lists;
+    # the output is node-for-node identical
+    cache = _inline_cache
+    if cache is None:
+        return tokenize_inline(text)
+    nodes = cache.get(text)
+    if nodes is None:
+        nodes = tokenize_inline(text)
+        cache.put(text, nodes)
+    return list(nodes)
+
+def markdown_to_blocks(markdown: str) -> list[str]:
+    return [block for _, block in iter_markdown_blocks(markdown)]
 
     
 def clean_block(block: str) -> str:
-    # print("block:", block)
-    stripped_block = block.strip()
-    while stripped_block and stripped_block[0] in ["\n", " "]:
-        stripped_block = stripped_block[1:]
+    return block.strip()
 
-    while stripped_block and stripped_block[-1] in ["\n", " "]:
-        stripped_block = stripped_block[:-1]
+def block_to_block_type(block: str):
+    return classify_lines(block.split("\n"))
 
-    return stripped_block
+def markdown_to_html_node(markdown, basepath: str = "/", block_cache=None):
+    return blocks_to_html_node(iter_markdown_blocks(markdown), basepath, block_cache)
 
-def block_to_block_type(block: str):
-    lines = block.split("\n")
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
-        return BlockType.CODE
-    if block.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if block.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.ULIST
-    if block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.OLIST
-    return BlockType.PARAGRAPH
-
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+def blocks_to_html_node(typed_blocks, basepath: str = "/", block_cache=None, images=None, minify: bool = False, references=None):
+    # typed_blocks: (BlockType, block text) pairs, e.g. from iter_blocks.
+    # With a block cache, each block is rendered (links already rewritten
+    # for basepath) once and later spliced in as a raw leaf
+    children = [block_html_node(block_type, block, basepath, block_cache, images, minify, references) for block_type, block in typed_blocks]
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def block_html_node(block_type: BlockType, block: str, basepath: str = "/", block_cache=None, images=None, minify: bool = False, references=None) -> HtmlNode:
+    # references, a (links, images) pair of lists, gets the block's link
+    # and image urls as written in the markdown
+    if block_cache is None:
+        html_node = block_to_html_node(block, block_type)
+        if references is not None:
+            node_references(html_node, references)
+        annotate_images(html_node, images, basepath)
+        rewrite_base_path(html_node, basepath)
+        return html_node
+    variant = images.fingerprint if images is not None and "![" in block else ""
+    if minify:
+        variant += "\0minify"
+    key = block_cache.key(block, block_type, basepath, variant)
+    html = block_cache.get(key)
+    if html is None:
+        html_node = block_to_html_node(block, block_type)
+        if references is not None:
+            node_references(html_node, references)
+        annotate_images(html_node, images, basepath)
+        rewrite_base_path(html_node, basepath)
+        html = html_node.to_html(minify=minify)
+        block_cache.put(key, html)
+    elif references is not None:
+        block_references(block_type, block, references)
+    return RawNode(html)
+
+
+def node_references(node: HtmlNode, references):
+    # appends the link and image urls of a parsed tree, before base path
+    # rewriting, to references in document order
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.children:
+            stack.extend(reversed(current.children))
+        elif current.tag == "a" and current.props:
+            references[0].append(current.props["href"])
+        elif current.tag == "img" and current.props:
+            references[1].append(current.props["src"])
+
+
+def block_references(block_type: BlockType, block: str, references):
+    # node_references() for a block cache hit, which comes back as raw
+    # HTML: only that block is tokenized again
+    if block_type == BlockType.CODE or "](" not in block:
+        return
+    for node in text_to_textnodes(block):
+        if node.text_type == TextType.LINK:
+            references[0].append(node.url)
+        elif node.text_type == TextType.IMAGE:
+            references[1].append(node.url)
+
+
+class StreamedBlocks:
+    # stands in for the page's <div> node in CompiledTemplate.write: each
+    # block is parsed, rendered and written before the next one is read, so
+    # only one block's text and nodes are alive at a time. references
+    # collects link and image urls as blocks pass, see block_html_node().
+    def __init__(self, typed_blocks, basepath: str = "/", block_cache=None, images=None, references=None):
+        self.typed_blocks = typed_blocks
+        self.basepath = basepath
+        self.block_cache = block_cache
+        self.images = images
+        self.references = references
+
+    def write_html(self, fp, minify: bool = False):
+        fp.write("<div>")
+        for block_type, block in self.typed_blocks:
+            block_html_node(block_type, block, self.basepath, self.block_cache, self.images, minify, self.references).write_html(fp, minify)
+        fp.write("</div>")
+
+
+def cached_page_tree(markdown: str, typed_blocks, ast_cache) -> ParentNode:
+    # the page's parsed tree, before base path rewriting and image
+    # annotation, from the AST cache; parsed and stored on a miss
+    key = ast_cache.key(markdown)
+    tree = ast_cache.get(key)
+    if tree is None:
+        tree = ParentNode("div", [block_to_html_node(block, block_type) for block_type, block in typed_blocks], None)
+        ast_cache.put(key, tree)
+    return tree
+
+
+def block_to_html_node(block, block_type: BlockType | None = None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     if block_type == BlockType.PARAGRAPH:
         return paragraph_to_html_node(block)
     if block_type == BlockType.HEADING:
@@ -204,6 +285,42 @@ def text_to_children(text):
     return children
 
 
+def annotate_images(node: HtmlNode, images, basepath: str = "/"):
+    # gives <img> tags of pipeline images their size and srcset; runs before
+    # rewrite_base_path, which only rewrites src
+    if images is None:
+        return
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.children:
+            stack.extend(current.children)
+        elif current.tag == "img" and current.props:
+            image = images.get(current.props.get("src"))
+            if image is None:
+                continue
+            current.props["width"] = str(image["width"])
+            current.props["height"] = str(image["height"])
+            if image["srcset"]:
+                current.props["srcset"] = ", ".join(f"{basepath}{url[1:]} {width}w" for url, width in image["srcset"])
+
+
+def rewrite_base_path(node: HtmlNode, basepath: str):
+    # points root-relative link and image targets at the site's base path
+    if basepath == "/":
+        return
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.children:
+            stack.extend(current.children)
+        elif current.props:
+            for key in ("href", "src"):
+                url = current.props.get(key)
+                if url is not None and url.startswith("/"):
+                    current.props[key] = basepath + url[1:]
+
+
 def paragraph_to_html_node(block):
     lines = block.split("\n")
     paragraph = " ".join(lines)
@@ -0,0 +1,177 @@
+import os
+import time
+from file_utilities import place_file
+from generate_content import collect_pages, flush_output_writer, get_dependency_graph, get_minify_html, get_search_index, get_site_catalog, page_is_draft, remove_generated_page, render_page_job, render_pages
+
+
+def snapshot_tree(dir_path: str) -> dict[str, tuple[int, int]]:
+    snapshot = {}
+    for dir_name, _, filenames in os.walk(dir_path):
+        for filename in filenames:
+            path = os.path.join(dir_name, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def diff_snapshots(old: dict, new: dict) -> tuple[list[str], list[str]]:
+    changed = [path for path, state in new.items() if old.get(path) != state]
+    removed = [path for path in old if path not in new]
+    return changed, removed
+
+
+class SiteWatcher:
+    # polls content/, static/ and the template and regenerates only what an
+    # edit affects; the page list stays in memory and load_template() keeps
+    # the compiled template until the file changes
+    def __init__(self, dir_path_content, dir_path_static, template_path, dest_dir_path, basepath, workers: int = 1, link_mode: str = "copy", precompressor=None):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.dest_dir_path = dest_dir_path
+        self.basepath = basepath
+        self.workers = workers
+        self.link_mode = link_mode
+        self.precompressor = precompressor
+        self.pages: dict[str, str] = dict(collect_pages(dir_path_content, dest_dir_path))
+        self.content_snapshot = snapshot_tree(dir_path_content)
+        self.static_snapshot = snapshot_tree(dir_path_static)
+        self.template_state = self.template_snapshot()
+
+    def template_snapshot(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.template_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def page_dest_path(self, from_path: str) -> str:
+        rel_path = os.path.relpath(from_path, self.dir_path_content)
+        return os.path.splitext(os.path.join(self.dest_dir_path, rel_path))[0] + ".html"
+
+    def poll_once(self) -> bool:
+        # returns whether anything was rebuilt
+        rebuilt = False
+        # outputs written and deleted by this poll, for the precompressor
+        written: list[str] = []
+        deleted: list[str] = []
+        content_snapshot = snapshot_tree(self.dir_path_content)
+        changed, removed = diff_snapshots(self.content_snapshot, content_snapshot)
+        self.content_snapshot = content_snapshot
+        graph = get_dependency_graph()
+        for from_path in removed:
+            dest_path = self.pages.pop(from_path, None)
+            if dest_path is not None:
+                remove_generated_page(dest_path, self.dest_dir_path)
+                deleted.append(dest_path)
+                if graph is not None:
+                    graph.remove_page(from_path)
+                rebuilt = True
+        drafts = [from_path for from_path in changed if page_is_draft(from_path)]
+        for from_path in drafts:
+            # a page marked as a draft is unpublished like a removed one
+            changed.remove(from_path)
+            dest_path = self.pages.pop(from_path, None)
+            if dest_path is not None:
+                remove_generated_page(dest_path, self.dest_dir_path)
+                deleted.append(dest_path)
+                if graph is not None:
+                    graph.remove_page(from_path)
+                rebuilt = True
+        for from_path in changed:
+            self.pages.setdefault(from_path, self.page_dest_path(from_path))
+
+        template_state = self.template_snapshot()
+        if template_state != self.template_state and template_state is not None:
+            self.template_state = template_state
+            if graph is not None and graph.pages:
+                # pages built from another template are left alone; pages
+                # the graph has not seen yet are rendered to be safe
+                affected = set(graph.affected(self.template_path)[0])
+                pages = [(from_path, dest_path) for from_path, dest_path in sorted(self.pages.items()) if os.path.normpath(from_path) in affected or os.path.normpath(from_path) not in graph.pages]
+                print(f"template changed, regenerating {len(pages)} pages")
+            else:
+                pages = sorted(self.pages.items())
+                print("template changed, regenerating every page")
+            self.regenerate(pages)
+            written.extend(dest_path for _, dest_path in pages)
+            rebuilt = True
+        elif changed:
+            pages = [(from_path, self.pages[from_path]) for from_path in changed]
+            self.regenerate(pages)
+            written.extend(dest_path for _, dest_path in pages)
+            rebuilt = True
+
+        static_snapshot = snapshot_tree(self.dir_path_static)
+        changed, removed = diff_snapshots(self.static_snapshot, static_snapshot)
+        self.static_snapshot = static_snapshot
+        for path in removed:
+            dest_path = os.path.join(self.dest_dir_path, os.path.relpath(path, self.dir_path_static))
+            if os.path.isfile(dest_path):
+                print(f" - removing {dest_path}")
+                os.remove(dest_path)
+            deleted.append(dest_path)
+            if graph is not None:
+                graph.remove_asset(path)
+            rebuilt = True
+        for path in changed:
+            dest_path = os.path.join(self.dest_dir_path, os.path.relpath(path, self.dir_path_static))
+            print(f" * {path} -> {dest_path}")
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            # as the sync places it: a hardlinked dest is the source's inode
+            place_file(path, dest_path, self.link_mode)
+            written.append(dest_path)
+            if graph is not None:
+                graph.record_asset(path, dest_path)
+            rebuilt = True
+        search_index = get_search_index()
+        if rebuilt and search_index is not None:
+            search_index.finish(sorted(self.pages.items()))
+        catalog = get_site_catalog()
+        if rebuilt and catalog is not None:
+            catalog.finish(sorted(self.pages.items()), self.template_path, get_minify_html())
+            catalog.save()
+        if rebuilt and graph is not None:
+            # image variants do not change while watching
+            graph.generated.update(search_index.outputs() if search_index is not None else ())
+            graph.generated.update(catalog.outputs if catalog is not None else ())
+            self.report_broken_links(graph)
+        if rebuilt and self.precompressor is not None:
+            # edited outputs get fresh siblings, deleted ones lose theirs
+            written.extend(search_index.outputs() if search_index is not None else ())
+            written.extend(catalog.outputs if catalog is not None else ())
+            self.precompressor.update(written, deleted)
+        return rebuilt
+
+    def report_broken_links(self, graph):
+        for from_path, url in graph.broken_links(self.dest_dir_path):
+            print(f"broken link in {from_path}: {url}")
+
+    def regenerate(self, pages: list[tuple[str, str]]):
+        # a page with a bad edit is reported and skipped, never fatal
+        if self.workers > 1 and len(pages) > 1:
+            errors = render_pages(pages, self.template_path, self.basepath, self.workers)
+        else:
+            results = [render_page_job((from_path, self.template_path, dest_path, self.basepath)) for from_path, dest_path in pages]
+            # queued writes land before links are checked, failed ones are
+            # reported like a bad edit
+            write_errors = dict(flush_output_writer(pages))
+            errors = [(from_path, error if error is not None else write_errors[from_path]) for from_path, error in results if error is not None or from_path in write_errors]
+        for from_path, error in errors:
+            print(f"error rendering {from_path}: {error}")
+
+    def run(self, interval: float = 0.5):
+        print(f"watching {self.dir_path_content}, {self.dir_path_static} and {self.template_path} (ctrl-c to stop)")
+        try:
+            while True:
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    # a bad edit should not end the session
+                    print(f"rebuild failed: {type(e).__name__}: {e}")
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("stopped watching")